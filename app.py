@@ -1,38 +1,174 @@
+import click
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import uuid
+import zlib
+from datetime import date, datetime, timezone
+from functools import wraps
+from pathlib import Path
 from flask import Flask, render_template, request, redirect, url_for, session
-from db import get_all_observations
-from db import verify_password, get_db
+from flask import current_app
+from flask.cli import AppGroup
+from flask import make_response, stream_template
+from flask import Response, jsonify, send_file, stream_with_context
+from markupsafe import Markup, escape
+from db import stream_observations_page
+from db import verify_password, get_user_by_email
 
 from flask import abort
-from db import get_all_teachers
+from db import get_all_teachers, get_teacher_overview, TEACHER_OVERVIEW_SORTS
 from db import get_classes_with_learner_counts_for_teacher
 from db import get_principal_teacher_summary
-from db import get_principal_dashboard_summary
+from db import get_principal_dashboard_snapshot
 from db import get_observation_by_id, update_observation
 from db import (
     init_db,
-    get_or_create_teacher,
+    get_teacher_by_email,
     save_observation,
     get_recent_observations,
     get_weekly_summary,
-    seed_default_classes,
     get_classes_for_teacher,
-    seed_default_learners,
+    get_class_ids_for_teacher,
     get_learners_for_class,
     get_learner_with_class,
+    save_observations_bulk,
+    get_learners_for_teacher,
+    sync_observations,
     get_db,
+    init_app,
       soft_delete_observation,
+    migrate,
+    check_query_plans,
+    rebuild_rollups,
+    check_rollups,
+    search_observations,
+    rebuild_search_index,
+    get_learner_skill_states,
+    get_learner_timeline,
+    get_class_progress,
+    get_classes_in_scope,
+    get_data_version_stamp,
+    slow_query_report,
+    DB_EXECUTOR_THREADS,
+    SEARCH_MARK_OPEN,
+    SEARCH_MARK_CLOSE,
 )
 
+from exports import stream_csv, stream_xlsx
+from exports import stream_parquet_zip, write_parquet_dataset
+from report_cards import (
+    cached_report_cards,
+    generate_report_cards,
+    payload_hash,
+    prune_report_cards,
+    write_report_card_zip,
+)
+from roster_import import RosterImportError, import_roster_file
+from heatmap import LEVELS, class_grade, mastery_matrix, matrix_csv, matrix_payload
+from metrics import init_metrics
+from assets import build_assets, init_assets, prune_assets
+
 from db import (
     get_all_teachers,
     get_teacher_by_id,
     get_classes_for_teacher_readonly,
-    get_observations_for_teacher_readonly,
+    stream_observations_for_teacher_readonly,
 )
 
 
-app = Flask(__name__)
-app.secret_key = "cbc-connect-v2-secret"  # will be replaced later
+# -------------------------------------------------
+# CONFIG (ENVIRONMENT-DRIVEN)
+# -------------------------------------------------
+DEFAULT_CONFIG = {
+    "OBSERVATIONS_PAGE_SIZE": 50,
+    "MAX_PAGE_SIZE": 200,
+    "MAX_SYNC_BATCH": 500,
+    # streamed pages: flush every N characters
+    "STREAM_BUFFER_SIZE": 8192,
+}
+
+
+def config_from_env(environ=None):
+    """
+    Settings from CBC_* environment variables, on top of DEFAULT_CONFIG.
+    Unset optional values are left out so create_app's fallbacks apply.
+    """
+    environ = os.environ if environ is None else environ
+    config = dict(DEFAULT_CONFIG)
+    config.update({
+        "DASHBOARD_REFRESH_SECONDS": int(environ.get("CBC_DASHBOARD_REFRESH", "30")),
+        # opt-in: funnel observation writes through one group-commit writer
+        "GROUP_COMMIT": environ.get("CBC_GROUP_COMMIT") == "1",
+        # bearer token for Prometheus scrapes of /metrics; unset = principal only
+        "METRICS_TOKEN": environ.get("CBC_METRICS_TOKEN"),
+        # log statements slower than this (ms) with their query plan; 0 = off
+        "SLOW_QUERY_MS": int(environ.get("CBC_SLOW_QUERY_MS", "250")),
+        # JSON lines file for the slow-query log; unset = the app's log output
+        "SLOW_QUERY_LOG": environ.get("CBC_SLOW_QUERY_LOG"),
+        # gzip streamed pages on the fly
+        "STREAM_GZIP": environ.get("CBC_STREAM_GZIP", "1") == "1",
+        # fingerprint static assets at startup; 0 = use the `flask build-assets` output
+        "ASSETS_BUILD": environ.get("CBC_ASSETS_BUILD", "1") == "1",
+        # asgi.py: threads (each with a connection) that run db calls
+        "DB_EXECUTOR_THREADS": int(environ.get("CBC_DB_THREADS", DB_EXECUTOR_THREADS)),
+        # migrate and seed in create_app; 0 when a deploy step does it
+        "INIT_DB": environ.get("CBC_INIT_DB", "1") == "1",
+    })
+
+    for key, name in (("SECRET_KEY", "CBC_SECRET_KEY"), ("DATABASE", "CBC_DATABASE")):
+        if environ.get(name):
+            config[key] = environ[name]
+    return config
+
+
+def _instance_secret_key(app):
+    """
+    Without CBC_SECRET_KEY, a random key kept in the instance folder:
+    created once, then shared by every worker and restart, so sessions
+    survive both. O_EXCL settles the race between workers starting
+    together.
+    """
+    path = Path(app.instance_path, "secret_key")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return path.read_text().strip()
+
+    key = secrets.token_hex(32)
+    with os.fdopen(fd, "w") as fh:
+        fh.write(key)
+    return key
+
+
+# Views and commands are collected here at import and registered on
+# every app create_app builds.
+class RouteTable:
+    """
+    @routes.route(...) with the same arguments as @app.route. Unlike a
+    blueprint it adds no endpoint prefix, so url_for("dashboard") and
+    the metrics labels stay as they are.
+    """
+
+    def __init__(self):
+        self.rules = []
+
+    def route(self, rule, **options):
+        def decorator(view):
+            self.rules.append((rule, view, options))
+            return view
+        return decorator
+
+    def init_app(self, app):
+        for rule, view, options in self.rules:
+            app.add_url_rule(rule, view_func=view, **options)
+
+
+routes = RouteTable()
+cli = AppGroup("cbc")
 
 # -------------------------------------------------
 # TEMP teacher account (for flow testing only)
@@ -51,25 +187,246 @@ def require_teacher():
     if session.get("role") != "teacher":
         abort(403)
 
+# Observation levels, best first, with the marks used in the forms
+PROGRESS_LEVELS = [
+    ("Doing well", "🟢"),
+    ("Improving", "🟡"),
+    ("Needs support", "🔴"),
+]
+
+# -------------------------------------------------
+# SEARCH HIGHLIGHTING
+# -------------------------------------------------
+def search_marks(text):
+    """
+    Escapes a search result field, then turns the FTS match markers
+    into <mark> tags, so note text is never rendered as HTML.
+    """
+    return Markup(
+        str(escape(text or ""))
+        .replace(SEARCH_MARK_OPEN, "<mark>")
+        .replace(SEARCH_MARK_CLOSE, "</mark>")
+    )
+
+# -------------------------------------------------
+# PAGINATION (KEYSET)
+# -------------------------------------------------
+def observations_page_for(teacher_id):
+    """
+    Reads ?before= / ?after= / ?page_size= and returns one keyset page
+    whose rows stream straight off the cursor into the template.
+    """
+    page_size = request.args.get(
+        "page_size",
+        current_app.config["OBSERVATIONS_PAGE_SIZE"],
+        type=int
+    )
+    page_size = max(1, min(page_size, current_app.config["MAX_PAGE_SIZE"]))
+
+    try:
+        page = stream_observations_page(
+            teacher_id,
+            before=request.args.get("before"),
+            after=request.args.get("after"),
+            limit=page_size
+        )
+    except ValueError:
+        abort(400)
+
+    page.page_size = page_size
+    return page
+
+
+# -------------------------------------------------
+# STREAMED PAGES
+# -------------------------------------------------
+def _buffered(chunks, size):
+    # Jinja yields tiny fragments; send them in a few KB at a time
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _gzipped(chunks):
+    # sync-flush every chunk so the browser can render what it has
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def stream_page(template_name, **context):
+    """
+    Renders a template as it is sent: the first bytes leave before the
+    rows are read, and row lists passed as RowStreams are read off the
+    cursor as the loop reaches them, so memory does not grow with the
+    page. Gzipped on the fly when the client accepts it.
+
+    stream_template keeps the request (and its pooled connection) alive
+    until the last chunk is sent.
+    """
+    chunks = _buffered(stream_template(template_name, **context), current_app.config["STREAM_BUFFER_SIZE"])
+    response = Response(chunks, mimetype="text/html")
+
+    response.vary.add("Accept-Encoding")
+    if current_app.config["STREAM_GZIP"] and request.accept_encodings["gzip"]:
+        response.response = _gzipped(chunks)
+        response.content_encoding = "gzip"
+
+    return response
+
+
+# -------------------------------------------------
+# CONDITIONAL GET (DATA-VERSION ETAGS)
+# -------------------------------------------------
+def _template_fingerprint(app):
+    # a deploy that changes a template must not be answered with 304,
+    # nor one that changes the stylesheet URLs the pages link
+    digest = hashlib.sha1()
+    for path in sorted(Path(app.root_path, app.template_folder).rglob("*.html")):
+        digest.update(path.read_bytes())
+    digest.update(json.dumps(app.extensions["assets"], sort_keys=True).encode())
+    return digest.hexdigest()[:12]
+
+
+
+def _parse_stamp(value):
+    # data_versions.updated_at is SQLite CURRENT_TIMESTAMP (UTC)
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+def teacher_validators():
+    if not session.get("teacher_logged_in") or session.get("role") != "teacher":
+        return None
+    teacher_id = session["teacher_id"]
+    version, updated_at = get_data_version_stamp(teacher_id)
+    return f"teacher-{teacher_id}-{version}", _parse_stamp(updated_at)
+
+
+def principal_dashboard_validators():
+    if "user_id" not in session or session.get("role") != "principal":
+        return None
+    # the snapshot carries the version its figures were read at
+    summary = get_principal_dashboard_snapshot()
+    return f"school-{summary['data_version']}", _parse_stamp(summary["data_updated_at"])
+
+
+def conditional(validators, daily=False):
+    """
+    ETag / Last-Modified from a data version, checked before the view
+    runs: if the client's copy is current it gets a bodiless 304 and no
+    query or template work happens. validators() returns (key,
+    last modified) for the signed-in user, or None to let the view
+    handle the request (e.g. redirect to login).
+
+    daily=True is for pages whose figures depend on today's date
+    ("last 7 days"), so they also change at midnight UTC.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            found = validators()
+            if found is None:
+                return view(*args, **kwargs)
+
+            key, last_modified = found
+            today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+            parts = [current_app.extensions["template_fingerprint"], request.full_path, key]
+            if daily:
+                parts.append(today.date().isoformat())
+                last_modified = max(last_modified or today, today)
+            etag = hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+            if request.if_none_match:
+                current = request.if_none_match.contains(etag)
+            else:
+                current = bool(
+                    last_modified and request.if_modified_since
+                    and last_modified <= request.if_modified_since
+                )
+
+            if current:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # always revalidate; pages are per user, never shared
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapped
+    return decorator
+
+
+# -------------------------------------------------
+# EXPORTS (STREAMED)
+# -------------------------------------------------
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "xlsx": (
+        stream_xlsx,
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+}
+
+
+def export_response(fmt, teacher_id, name):
+    stream, mimetype = EXPORT_FORMATS[fmt]
+    filename = f"{name}-{date.today().isoformat()}.{fmt}"
+
+    # stream_with_context keeps the request's pooled connection alive
+    # until the generator has sent its last batch
+    return Response(
+        stream_with_context(stream(teacher_id)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def report_cards_response(name, class_id=None, teacher_id=None):
+    # only what `flask report-cards` has rendered: a request never
+    # renders PDFs (or forks a process pool) itself
+    results, missing = cached_report_cards(class_id=class_id, teacher_id=teacher_id)
+
+    fh = tempfile.TemporaryFile()
+    write_report_card_zip(results, fh, missing)
+    fh.seek(0)
+
+    response = send_file(
+        fh,
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name=f"{name}-{date.today().isoformat()}.zip"
+    )
+    response.headers["X-Report-Cards-Missing"] = str(len(missing))
+    return response
+
+
 # -------------------------------------------------
 # LOGIN
 # -------------------------------------------------
-@app.route("/", methods=["GET", "POST"])
+@routes.route("/", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
         email = request.form.get("email")
         password = request.form.get("password")
 
-        conn = get_db()
-        cur = conn.cursor()
-
         # Fetch user
-        cur.execute(
-            "SELECT id, password_hash, role, is_active FROM users WHERE email = ?",
-            (email,)
-        )
-        user = cur.fetchone()
-        conn.close()
+        user = get_user_by_email(email)
 
         if not user or not user["is_active"]:
             return render_template(
@@ -83,24 +440,23 @@ def login():
                 error="Invalid login details"
             )
 
+        # Teacher flow: accounts are provisioned by the roster import
+        teacher = None
+        if user["role"] == "teacher":
+            teacher = get_teacher_by_email(email)
+            if not teacher:
+                return render_template(
+                    "auth/login.html",
+                    error="Account not set up yet — ask the principal to import the roster"
+                )
+
         # 🔐 Secure session
         session.clear()
         session["user_id"] = user["id"]
         session["role"] = user["role"]
 
-
-
-        # Teacher flow (unchanged behavior)
-        if user["role"] == "teacher":
-            teacher_id = get_or_create_teacher(
-                email,
-                "Amina Hassan",
-                "Mathematics"
-            )
-
-            seed_default_classes(teacher_id)
-
-            session["teacher_id"] = teacher_id
+        if teacher:
+            session["teacher_id"] = teacher["id"]
             session["teacher_logged_in"] = True
 
             return redirect(url_for("dashboard"))
@@ -117,21 +473,13 @@ def login():
 # -------------------------------------------------
 # PRINCIPAL LOGIN (READ-ONLY)
 # -------------------------------------------------
-@app.route("/principal/login", methods=["GET", "POST"])
+@routes.route("/principal/login", methods=["GET", "POST"])
 def principal_login():
     if request.method == "POST":
         email = request.form.get("email")
         password = request.form.get("password")
 
-        conn = get_db()
-        cur = conn.cursor()
-
-        cur.execute(
-            "SELECT id, password_hash, role, is_active FROM users WHERE email = ?",
-            (email,)
-        )
-        user = cur.fetchone()
-        conn.close()
+        user = get_user_by_email(email)
 
         if not user or not user["is_active"]:
             return render_template(
@@ -164,7 +512,7 @@ def principal_login():
 # -------------------------------------------------
 # PRINCIPAL HOME (TEMP)
 # -------------------------------------------------
-@app.route("/principal")
+@routes.route("/principal")
 def principal_home():
     if "user_id" not in session:
         return redirect(url_for("principal_login"))
@@ -177,7 +525,7 @@ def principal_home():
 # -------------------------------------------------
 # PRINCIPAL — TEACHER LIST (READ-ONLY)
 # -------------------------------------------------
-@app.route("/principal/teachers")
+@routes.route("/principal/teachers")
 def principal_teachers():
     if "user_id" not in session:
         return redirect(url_for("principal_login"))
@@ -185,16 +533,23 @@ def principal_teachers():
     if session.get("role") != "principal":
         abort(403)
 
-    teachers = get_all_teachers()
+    sort = request.args.get("sort", "name")
+    if sort not in TEACHER_OVERVIEW_SORTS:
+        sort = "name"
+    descending = request.args.get("dir") == "desc"
+
+    teachers = get_teacher_overview(sort, descending)
     return render_template(
         "principal/teachers.html",
-        teachers=teachers
+        teachers=teachers,
+        sort=sort,
+        descending=descending
     )
 
 # -------------------------------------------------
 # PRINCIPAL — TEACHER DRILL-DOWN (READ-ONLY)
 # -------------------------------------------------
-@app.route("/principal/teacher/<int:teacher_id>")
+@routes.route("/principal/teacher/<int:teacher_id>")
 def principal_teacher_view(teacher_id):
     if "user_id" not in session:
         return redirect(url_for("principal_login"))
@@ -208,12 +563,11 @@ def principal_teacher_view(teacher_id):
 
     classes = get_classes_with_learner_counts_for_teacher(teacher_id)
 
-    observations = get_observations_for_teacher_readonly(teacher_id)
-
     summary = get_principal_teacher_summary(teacher_id)
 
+    observations = stream_observations_for_teacher_readonly(teacher_id)
 
-    return render_template(
+    return stream_page(
         "principal/teacher_view.html",
         teacher=teacher,
         classes=classes,
@@ -221,10 +575,101 @@ def principal_teacher_view(teacher_id):
         summary=summary
     )
 
+# -------------------------------------------------
+# PRINCIPAL — ROSTER IMPORT (CSV / XLSX)
+# -------------------------------------------------
+@routes.route("/principal/roster/import", methods=["GET", "POST"])
+def principal_roster_import():
+    if "user_id" not in session:
+        return redirect(url_for("principal_login"))
+
+    if session.get("role") != "principal":
+        abort(403)
+
+    if request.method == "GET":
+        return render_template("principal/roster_import.html")
+
+    upload = request.files.get("roster")
+    if not upload or not upload.filename:
+        return render_template(
+            "principal/roster_import.html",
+            errors=["Choose a .csv or .xlsx roster file to upload."]
+        ), 400
+
+    try:
+        result = import_roster_file(upload.stream, upload.filename)
+    except RosterImportError as e:
+        return render_template(
+            "principal/roster_import.html",
+            errors=e.errors
+        ), 400
+
+    return render_template(
+        "principal/roster_import.html",
+        result=result
+    )
+
+# -------------------------------------------------
+# PRINCIPAL — REPORT EXPORTS (SCHOOL-WIDE)
+# -------------------------------------------------
+@routes.route("/principal/reports/export.<any(csv, xlsx):fmt>")
+def principal_reports_export(fmt):
+    if "user_id" not in session:
+        return redirect(url_for("principal_login"))
+
+    if session.get("role") != "principal":
+        abort(403)
+
+    # optional: narrow the school export to one teacher
+    teacher_id = request.args.get("teacher_id", type=int)
+    if teacher_id is not None and not get_teacher_by_id(teacher_id):
+        abort(404)
+
+    name = "school-observations" if teacher_id is None else f"teacher-{teacher_id}-observations"
+    return export_response(fmt, teacher_id, name)
+
+@routes.route("/principal/report-cards.zip")
+def principal_report_cards():
+    if "user_id" not in session:
+        return redirect(url_for("principal_login"))
+
+    if session.get("role") != "principal":
+        abort(403)
+
+    # optional scope: one class or one teacher; default is the school
+    class_id = request.args.get("class_id", type=int)
+    teacher_id = request.args.get("teacher_id", type=int)
+
+    if teacher_id is not None and not get_teacher_by_id(teacher_id):
+        abort(404)
+
+    return report_cards_response(
+        "school-report-cards",
+        class_id=class_id,
+        teacher_id=teacher_id
+    )
+
+
+@routes.route("/principal/analytics/export.zip")
+def principal_analytics_export():
+    if "user_id" not in session:
+        return redirect(url_for("principal_login"))
+
+    if session.get("role") != "principal":
+        abort(403)
+
+    filename = f"cbc-observations-parquet-{date.today().isoformat()}.zip"
+    return Response(
+        stream_with_context(stream_parquet_zip()),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # -------------------------------------------------
 # PRINCIPAL — DASHBOARD
 # -------------------------------------------------
-@app.route("/principal/dashboard")
+@routes.route("/principal/dashboard")
+@conditional(principal_dashboard_validators, daily=True)
 def principal_dashboard():
     if "user_id" not in session:
         return redirect(url_for("principal_login"))
@@ -232,7 +677,8 @@ def principal_dashboard():
     if session.get("role") != "principal":
         abort(403)
 
-    summary = get_principal_dashboard_summary()
+    # constant-time read; refreshed in the background
+    summary = get_principal_dashboard_snapshot()
 
     return render_template(
         "principal/dashboard.html",
@@ -245,7 +691,8 @@ def principal_dashboard():
 # -------------------------------------------------
 # DASHBOARD
 # -------------------------------------------------
-@app.route("/dashboard")
+@routes.route("/dashboard")
+@conditional(teacher_validators, daily=True)
 def dashboard():
     if not session.get("teacher_logged_in"):
         return redirect(url_for("login"))
@@ -258,25 +705,26 @@ def dashboard():
 # -------------------------------------------------
 
 
-@app.route("/observations")
+@routes.route("/observations")
 def observations():
     # 🔐 Security gate: must be logged-in teacher
     require_teacher()
 
     teacher_id = session["teacher_id"]
 
-    observations = get_all_observations(teacher_id)
+    page = observations_page_for(teacher_id)
 
-    return render_template(
+    return stream_page(
         "observations.html",
-        observations=observations
+        observations=page.observations,
+        page=page
     )
 
 
 # -------------------------------------------------
 # CLASSES (PHASE B1-B: DB-DRIVEN)
 # -------------------------------------------------
-@app.route("/classes")
+@routes.route("/classes")
 def classes():
     if not session.get("teacher_logged_in"):
         return redirect(url_for("login"))
@@ -289,7 +737,7 @@ def classes():
     return render_template("classes.html", classes=classes)
 # -------------------------------------------------
 
-@app.route("/learners")
+@routes.route("/learners")
 def learners():
     if not session.get("teacher_logged_in"):
         return redirect(url_for("login"))
@@ -300,13 +748,51 @@ def learners():
     if not class_id:
         return redirect(url_for("classes"))
 
-    seed_default_learners(class_id)
+    # 🔒 Ownership check before any roster or progress is read
+    if class_id not in get_class_ids_for_teacher(session["teacher_id"]):
+        abort(403)
+
     learners = get_learners_for_class(class_id)
+    progress = get_class_progress(class_id)
+
+    return render_template(
+        "learners.html",
+        learners=learners,
+        progress=progress,
+        levels=PROGRESS_LEVELS
+    )
+# -------------------------------------------------
+
+@routes.route("/learner/<int:learner_id>")
+def learner_profile(learner_id):
+    # teachers see their own learners; principals any learner
+    role = session.get("role")
+    if role not in ("teacher", "principal"):
+        return redirect(url_for("login"))
+
+    learner = get_learner_with_class(learner_id)
+    if not learner:
+        abort(404)
+
+    if role == "teacher" and learner["class_id"] not in get_class_ids_for_teacher(session["teacher_id"]):
+        abort(403)
+
+    skills = get_learner_skill_states(learner_id)
+
+    timeline = {}
+    for o in get_learner_timeline(learner_id):
+        timeline.setdefault(o["skill"], []).append(o)
 
-    return render_template("learners.html", learners=learners)
+    return render_template(
+        "learner.html",
+        learner=learner,
+        skills=skills,
+        timeline=timeline,
+        levels=dict(PROGRESS_LEVELS)
+    )
 # -------------------------------------------------
 
-@app.route("/observe", methods=["GET", "POST"])
+@routes.route("/observe", methods=["GET", "POST"])
 def observe():
     # 🔐 Security gate: must be logged-in teacher
     require_teacher()
@@ -326,10 +812,7 @@ def observe():
 
     # 🔒 Ownership check:
     # Ensure the learner belongs to a class owned by this teacher
-    classes = get_classes_for_teacher(teacher_id)
-    allowed_class_ids = {c["id"] for c in classes}
-
-    if learner["class_id"] not in allowed_class_ids:
+    if learner["class_id"] not in get_class_ids_for_teacher(teacher_id):
         abort(403)
 
     if request.method == "POST":
@@ -363,10 +846,176 @@ def observe():
     return render_template("observe.html", learner=learner)
 
 
+# -------------------------------------------------
+# WHOLE-CLASS OBSERVATION ENTRY
+# -------------------------------------------------
+@routes.route("/observe/class", methods=["GET", "POST"])
+def observe_class():
+    # 🔐 Security gate: must be logged-in teacher
+    require_teacher()
+
+    class_id = request.args.get("class_id", type=int)
+    if not class_id:
+        abort(400)
+
+    teacher_id = session["teacher_id"]
+
+    # 🔒 Ownership check (once for the whole class)
+    if class_id not in get_class_ids_for_teacher(teacher_id):
+        abort(403)
+
+    class_row = next(c for c in get_classes_for_teacher(teacher_id) if c["id"] == class_id)
+
+    learners = get_learners_for_class(class_id)
+
+    if request.method == "POST":
+        activity = request.form.get("activity", "").strip()
+        skill = request.form.get("skill", "").strip()
+
+        # only learners of this class are read from the form
+        entries = []
+        for learner in learners:
+            level = request.form.get(f"level_{learner['id']}", "").strip()
+            if level:
+                note = request.form.get(f"note_{learner['id']}", "").strip()
+                entries.append((learner["id"], level, note))
+
+        # 🔒 Basic validation
+        if not activity or not skill or not entries:
+            return render_template(
+                "observe_class.html",
+                class_row=class_row,
+                learners=learners,
+                error="Choose an activity, a skill and at least one learner's level."
+            )
+
+        save_observations_bulk(
+            teacher_id=teacher_id,
+            class_name=class_row["name"],
+            activity=activity,
+            skill=skill,
+            entries=entries,
+        )
+
+        return redirect(url_for("learners", class_id=class_id))
+
+    return render_template(
+        "observe_class.html",
+        class_row=class_row,
+        learners=learners
+    )
+
+
+# -------------------------------------------------
+# OFFLINE SYNC (JSON API)
+# -------------------------------------------------
+def parse_sync_item(raw, learners_by_id):
+    """
+    Validates one queued observation. Returns (item, None) or
+    (None, error message).
+    """
+    if not isinstance(raw, dict):
+        return None, "item must be an object"
+
+    try:
+        client_uuid = str(uuid.UUID(str(raw.get("client_uuid"))))
+    except ValueError:
+        return None, "client_uuid must be a UUID"
+
+    # JSON true/false would pass as 1/0, and lists/objects can't be looked up
+    learner_id = raw.get("learner_id")
+    if not isinstance(learner_id, int) or isinstance(learner_id, bool):
+        return None, "learner_id must be an integer"
+
+    learner = learners_by_id.get(learner_id)
+    if learner is None:
+        return None, "unknown learner"
+
+    fields = {}
+    for name in ("activity", "skill", "level", "note"):
+        value = raw.get(name) or ""
+        if not isinstance(value, str):
+            return None, f"{name} must be a string"
+        fields[name] = value.strip()
+
+    if not fields["activity"] or not fields["skill"] or not fields["level"]:
+        return None, "activity, skill, and level are required"
+
+    observed_at = raw.get("observed_at")
+    if observed_at is not None:
+        try:
+            moment = datetime.fromisoformat(str(observed_at))
+        except ValueError:
+            return None, "observed_at must be ISO 8601"
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        # stored like CURRENT_TIMESTAMP: UTC, second precision
+        observed_at = moment.strftime("%Y-%m-%d %H:%M:%S")
+
+    return {
+        "client_uuid": client_uuid,
+        "learner_id": learner["id"],
+        "class_name": learner["class_name"],
+        "observed_at": observed_at,
+        **fields,
+    }, None
+
+
+def sync_batch(teacher_id, payload, max_batch):
+    """
+    Validates and stores one offline-sync batch for teacher_id.
+    Returns (JSON body, status); shared by the WSGI view and asgi.py.
+    """
+    raw_items = payload.get("observations") if isinstance(payload, dict) else None
+    if not isinstance(raw_items, list):
+        return {"error": "expected {\"observations\": [...]}"}, 400
+
+    if len(raw_items) > max_batch:
+        return {"error": "batch too large", "max": max_batch}, 413
+
+    # 🔒 Ownership: one query covers every learner this teacher may observe
+    learners_by_id = {l["id"]: l for l in get_learners_for_teacher(teacher_id)}
+
+    results = [None] * len(raw_items)
+    valid = []
+    for index, raw in enumerate(raw_items):
+        item, error = parse_sync_item(raw, learners_by_id)
+        if error:
+            client_uuid = raw.get("client_uuid") if isinstance(raw, dict) else None
+            results[index] = {"client_uuid": client_uuid, "status": "invalid", "error": error}
+        else:
+            valid.append((index, item))
+
+    if valid:
+        stored = sync_observations(teacher_id, [item for _, item in valid])
+        for (index, item), (status, observation_id) in zip(valid, stored):
+            results[index] = {
+                "client_uuid": item["client_uuid"],
+                "status": status,
+                "id": observation_id,
+            }
+
+    return {"results": results}, 200
+
+
+@routes.route("/api/sync/observations", methods=["POST"])
+def sync_observations_api():
+    if session.get("role") != "teacher" or "teacher_id" not in session:
+        return jsonify(error="not signed in as a teacher"), 401
+
+    body, status = sync_batch(
+        session["teacher_id"],
+        request.get_json(silent=True),
+        current_app.config["MAX_SYNC_BATCH"]
+    )
+    return jsonify(body), status
+
+
 # -------------------------------------------------
 # RECENT OBSERVATIONS
 # -------------------------------------------------
-@app.route("/show")
+@routes.route("/show")
+@conditional(teacher_validators)
 def show():
     if not session.get("teacher_logged_in"):
         return redirect(url_for("login"))
@@ -381,7 +1030,7 @@ def show():
 # -------------------------------------------------
 # EDIT OBSERVATION (TEACHER ONLY)
 # -------------------------------------------------
-@app.route("/observations/<int:observation_id>/edit", methods=["GET", "POST"])
+@routes.route("/observations/<int:observation_id>/edit", methods=["GET", "POST"])
 def edit_observation(observation_id):
     if not session.get("teacher_logged_in"):
         return redirect(url_for("login"))
@@ -416,7 +1065,7 @@ def edit_observation(observation_id):
         observation=observation
     )
 
-@app.route("/observations/delete/<int:observation_id>", methods=["POST"])
+@routes.route("/observations/delete/<int:observation_id>", methods=["POST"])
 def delete_observation(observation_id):
     if not session.get("teacher_logged_in"):
         return redirect(url_for("login"))
@@ -437,7 +1086,8 @@ def delete_observation(observation_id):
 # -------------------------------------------------
 # WEEKLY SUMMARY
 # -------------------------------------------------
-@app.route("/week")
+@routes.route("/week")
+@conditional(teacher_validators, daily=True)
 def week():
     if not session.get("teacher_logged_in"):
         return redirect(url_for("login"))
@@ -450,7 +1100,99 @@ def week():
     return render_template("week.html", summary=summary)
 # -------------------------------------------------
 
-@app.route("/reports")
+@routes.route("/search")
+def search():
+    # teachers search their own observations, principals the school
+    if session.get("role") == "principal":
+        teacher_id = None
+    elif session.get("role") == "teacher" and session.get("teacher_id"):
+        teacher_id = session["teacher_id"]
+    else:
+        return redirect(url_for("login"))
+
+    q = request.args.get("q", "").strip()
+    page = request.args.get("page", 1, type=int)
+
+    found = search_observations(q, teacher_id=teacher_id, page=page)
+
+    return render_template(
+        "search.html",
+        q=q,
+        found=found,
+        school_wide=teacher_id is None
+    )
+# -------------------------------------------------
+
+def heatmap_scope():
+    """
+    Resolves ?class_id= / ?grade= against the caller's classes: a
+    teacher's own, or the whole school for principals.
+    Returns (classes in scope, selected classes, title).
+    """
+    teacher_id = None if session.get("role") == "principal" else session["teacher_id"]
+    classes = get_classes_in_scope(teacher_id)
+
+    class_id = request.args.get("class_id", type=int)
+    grade = request.args.get("grade")
+
+    if class_id is not None:
+        selected = [c for c in classes if c["id"] == class_id]
+        if not selected:
+            abort(404)
+        return classes, selected, selected[0]["name"]
+
+    if grade:
+        selected = [c for c in classes if class_grade(c["name"]) == grade]
+        if not selected:
+            abort(404)
+        return classes, selected, grade
+
+    return classes, [], None
+
+
+@routes.route("/heatmap")
+def heatmap():
+    if session.get("role") not in ("teacher", "principal"):
+        return redirect(url_for("login"))
+
+    classes, selected, title = heatmap_scope()
+    matrix = mastery_matrix(selected) if selected else None
+
+    return render_template(
+        "heatmap.html",
+        classes=classes,
+        grades=sorted({class_grade(c["name"]) for c in classes}),
+        matrix=matrix,
+        title=title,
+        levels=LEVELS,
+        marks=dict(PROGRESS_LEVELS)
+    )
+
+
+@routes.route("/heatmap.<any(json, csv):fmt>")
+def heatmap_export(fmt):
+    if session.get("role") not in ("teacher", "principal"):
+        return redirect(url_for("login"))
+
+    _, selected, title = heatmap_scope()
+    if not selected:
+        abort(400)
+
+    matrix = mastery_matrix(selected)
+
+    if fmt == "json":
+        return jsonify(title=title, **matrix_payload(matrix))
+
+    filename = f"mastery-{title.lower().replace(' ', '-')}.csv"
+    return Response(
+        matrix_csv(matrix),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+# -------------------------------------------------
+
+@routes.route("/reports")
+@conditional(teacher_validators)
 def reports():
     if not session.get("teacher_logged_in"):
         return redirect(url_for("login"))
@@ -458,26 +1200,386 @@ def reports():
     require_teacher()   # 👈 ADD THIS LINE
 
     teacher_id = session["teacher_id"]
-    observations = get_recent_observations(teacher_id, limit=1000)
+    page = observations_page_for(teacher_id)
 
-    return render_template(
+    return stream_page(
         "reports.html",
-        observations=observations
+        observations=page.observations,
+        page=page
     )
 
 
 
+@routes.route("/reports/export.<any(csv, xlsx):fmt>")
+def reports_export(fmt):
+    if not session.get("teacher_logged_in"):
+        return redirect(url_for("login"))
+
+    require_teacher()
+
+    teacher_id = session["teacher_id"]
+    return export_response(fmt, teacher_id, "observations")
+
+
+@routes.route("/reports/report-cards.zip")
+def report_cards():
+    if not session.get("teacher_logged_in"):
+        return redirect(url_for("login"))
+
+    require_teacher()
+
+    teacher_id = session["teacher_id"]
+    class_id = request.args.get("class_id", type=int)
+
+    if class_id is None:
+        return report_cards_response("report-cards", teacher_id=teacher_id)
+
+    # 🔒 Ownership check: only this teacher's classes
+    if class_id not in get_class_ids_for_teacher(teacher_id):
+        abort(403)
+
+    return report_cards_response("class-report-cards", class_id=class_id)
+
+
 # -------------------------------------------------
 # LOGOUT
 # -------------------------------------------------
-@app.route("/logout")
+@routes.route("/logout")
 def logout():
     session.clear()
     return redirect(url_for("login"))
 
+# -------------------------------------------------
+# CLI — DATABASE MAINTENANCE
+# -------------------------------------------------
+@cli.command("migrate")
+def migrate_command():
+    """Apply pending schema migrations."""
+    applied = migrate(get_db())
+    click.echo(f"Applied migrations: {applied or 'none'}")
+
+
+@cli.command("check-query-plans")
+def check_query_plans_command():
+    """Fail if a read helper stops using its index."""
+    migrate(get_db())
+
+    problems = check_query_plans()
+    for helper, problem in problems:
+        click.echo(f"{helper}: {problem}", err=True)
+
+    if problems:
+        raise SystemExit(1)
+
+    click.echo("All read helpers use their indexes.")
+
+
+@cli.command("build-assets")
+@click.option("--prune", is_flag=True,
+              help="Also delete fingerprinted files from earlier builds.")
+def build_assets_command(prune):
+    """Fingerprint and pre-compress the static CSS/JS."""
+    manifest = build_assets(current_app.static_folder, current_app.config["ASSETS_FOLDER"])
+    for name, built in sorted(manifest.items()):
+        click.echo(f"{name} -> {built}")
+
+    if prune:
+        removed = prune_assets(current_app.config["ASSETS_FOLDER"], manifest)
+        click.echo(f"Removed {len(removed)} old files.")
+
+
+@cli.command("import-roster")
+@click.argument("roster_file", type=click.Path(exists=True, dir_okay=False))
+def import_roster_command(roster_file):
+    """Provision teachers, classes and learners from a CSV/XLSX roster."""
+    with open(roster_file, "rb") as fh:
+        try:
+            result = import_roster_file(fh, roster_file)
+        except RosterImportError as e:
+            for error in e.errors:
+                click.echo(error, err=True)
+            raise SystemExit(1)
+
+    click.echo(
+        f"{result['teachers']} teachers ({result['users_created']} new logins), "
+        f"{result['classes_created']} new classes, "
+        f"{result['learners_created']} new learners."
+    )
+
+
+@cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """Backfill the daily rollups and learner skill state from raw observations."""
+    rebuild_rollups()
+    click.echo("Daily rollups rebuilt.")
+
+
+@cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Re-index every live observation for full-text search."""
+    rebuild_search_index()
+    click.echo("Search index rebuilt.")
+
+
+@cli.command("check-rollups")
+def check_rollups_command():
+    """Compare the daily rollups and learner skill state against raw observations."""
+    mismatches = check_rollups()
+    for table, key, expected, actual in mismatches:
+        click.echo(f"{table} {key}: expected {expected}, found {actual}", err=True)
+
+    if mismatches:
+        raise SystemExit(1)
+
+    click.echo("Daily rollups match raw observations.")
+
+
+@cli.command("export-parquet")
+@click.argument("out_dir", type=click.Path(file_okay=False))
+@click.option("--incremental", is_flag=True,
+              help="Only rewrite the last exported month and newer ones.")
+def export_parquet_command(out_dir, incremental):
+    """Write the observation dataset as month-partitioned Parquet."""
+    result = write_parquet_dataset(out_dir, incremental=incremental)
+
+    for month, rows in sorted(result["partitions"].items()):
+        click.echo(f"month={month}: {rows} rows")
+
+    if not result["partitions"]:
+        click.echo("Nothing to export.")
+
+
+@cli.command("report-cards")
+@click.argument("out_zip", type=click.Path(dir_okay=False))
+@click.option("--class-id", type=int, help="Only this class.")
+@click.option("--teacher-id", type=int, help="Only this teacher's classes.")
+@click.option("--workers", type=int, default=None,
+              help="Worker processes (default: one per CPU).")
+@click.option("--prune/--no-prune", default=True, show_default=True,
+              help="Delete cached cards that match no learner any more.")
+def report_cards_command(out_zip, class_id, teacher_id, workers, prune):
+    """Render end-of-term PDF report cards into one zip (and the cache the web downloads serve)."""
+    results = generate_report_cards(
+        class_id=class_id,
+        teacher_id=teacher_id,
+        max_workers=workers
+    )
+
+    with open(out_zip, "wb") as fh:
+        write_report_card_zip(results, fh)
+
+    rendered = sum(1 for _, _, cached in results if not cached)
+    click.echo(
+        f"{len(results)} report cards ({rendered} rendered, "
+        f"{len(results) - rendered} unchanged) -> {out_zip}"
+    )
+
+    if prune:
+        # a school-wide run already knows every current hash
+        scoped = class_id is not None or teacher_id is not None
+        keep = None if scoped else {payload_hash(payload) for payload, _, _ in results}
+        click.echo(f"{prune_report_cards(keep)} stale cached cards removed.")
+
+
+@cli.command("slow-queries")
+@click.argument("log_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--top", type=int, default=10, show_default=True)
+def slow_queries_command(log_file, top):
+    """Report the slowest statement fingerprints from a slow-query log."""
+    records = []
+    with open(log_file) as fh:
+        for line in fh:
+            # tolerate log prefixes before the JSON object
+            start = line.find("{")
+            if start == -1:
+                continue
+            try:
+                record = json.loads(line[start:])
+            except ValueError:
+                continue
+            if record.get("event") == "slow_query":
+                records.append(record)
+
+    for group in slow_query_report(records, top):
+        scans = f"  FULL SCAN: {', '.join(group['full_scans'])}" if group["full_scans"] else ""
+        click.echo(
+            f"{group['fingerprint']}  {group['count']:>5}x  total {group['total_ms']:>10.1f} ms  "
+            f"mean {group['mean_ms']:>8.1f}  max {group['max_ms']:>8.1f}  "
+            f"[{', '.join(group['helpers'])}]{scans}"
+        )
+        click.echo(f"    {group['sql']}")
+
+    if not records:
+        click.echo("No slow queries logged.")
+
+
+# -------------------------------------------------
+# CLI — SYNTHETIC DATA & BENCHMARKS
+# -------------------------------------------------
+@cli.command("generate-data")
+@click.option("--schools", type=int, default=1, show_default=True)
+@click.option("--teachers", "teachers_per_school", type=int, default=20, show_default=True,
+              help="Teachers per school.")
+@click.option("--classes", "classes_per_teacher", type=int, default=3, show_default=True,
+              help="Classes per teacher.")
+@click.option("--learners", "learners_per_class", type=int, default=40, show_default=True,
+              help="Learners per class.")
+@click.option("--observations", type=int, default=100000, show_default=True)
+@click.option("--days", type=int, default=180, show_default=True,
+              help="Spread observations over this many days.")
+@click.option("--end-date", type=click.DateTime(["%Y-%m-%d"]), default=None,
+              help="Last day of data (default: today). Fix it for repeatable runs.")
+@click.option("--seed", type=int, default=42, show_default=True)
+def generate_data_command(schools, teachers_per_school, classes_per_teacher,
+                          learners_per_class, observations, days, end_date, seed):
+    """Fill the database with deterministic synthetic data."""
+    # loaded here so serving the app never imports the generator
+    from synthetic import generate
+
+    def progress(written, total):
+        click.echo(f"\r{written}/{total} observations", nl=False)
+
+    result = generate(
+        schools=schools,
+        teachers_per_school=teachers_per_school,
+        classes_per_teacher=classes_per_teacher,
+        learners_per_class=learners_per_class,
+        observations=observations,
+        days=days,
+        end_date=end_date.date() if end_date else None,
+        seed=seed,
+        progress=progress,
+    )
+
+    click.echo()
+    click.echo(
+        f"{result['teachers']} teachers, {result['classes']} classes, "
+        f"{result['learners']} learners, {result['observations']} observations "
+        f"(seed {result['seed']}, ending {result['end_date']})."
+    )
+
+
+@cli.command("benchmark")
+@click.argument("out_json", type=click.Path(dir_okay=False))
+@click.option("--iterations", type=int, default=None,
+              help="Timed runs per case (default: benchmark.BENCH_ITERATIONS).")
+@click.option("--exports", is_flag=True, help="Also time the export downloads.")
+@click.option("--compare", "baseline", type=click.Path(exists=True, dir_okay=False),
+              help="Earlier results to compare p50 latencies against.")
+def benchmark_command(out_json, iterations, exports, baseline):
+    """Time every db helper and route; writes into the database, so use a copy."""
+    # loaded here so serving the app never imports numpy or the benchmark suite
+    from benchmark import BENCH_ITERATIONS, compare, run_benchmark, save_results
+
+    migrate(get_db())
+
+    results = run_benchmark(
+        current_app._get_current_object(),
+        iterations=iterations or BENCH_ITERATIONS,
+        include_exports=exports
+    )
+    save_results(results, out_json)
+
+    for section in ("helpers", "routes"):
+        click.echo(f"{section}:")
+        for name, r in results[section].items():
+            click.echo(
+                f"  {name:<48} p50 {r['p50_ms']:>9.2f}  p95 {r['p95_ms']:>9.2f}  "
+                f"p99 {r['p99_ms']:>9.2f} ms  {r['statements']:>4} stmts  "
+                f"{r['vm_steps']:>10} steps"
+            )
+
+    missing = results["not_benchmarked"]
+    if missing["helpers"] or missing["routes"]:
+        click.echo(f"not benchmarked: {', '.join(missing['helpers'] + missing['routes'])}")
+
+    if baseline:
+        with open(baseline) as fh:
+            old = json.load(fh)
+        click.echo(f"p50 vs {old['meta'].get('commit') or baseline}:")
+        for section, name, before, after, ratio in compare(old, results):
+            change = f"{ratio:.2f}x" if ratio is not None else "n/a"
+            click.echo(f"  {name:<48} {before:>9.2f} -> {after:>9.2f} ms  {change}")
+
+    click.echo(f"Results written to {out_json}")
+
+
+@cli.command("benchmark-serving")
+@click.argument("out_json", type=click.Path(dir_okay=False))
+@click.option("--slow-clients", type=int, default=64, show_default=True,
+              help="Clients syncing and downloading exports over a slow link.")
+@click.option("--duration", type=float, default=10, show_default=True,
+              help="Seconds to time fast requests with the slow clients connected.")
+@click.option("--workers", type=int, default=2, show_default=True)
+@click.option("--threads", type=int, default=4, show_default=True,
+              help="Per worker: gthread threads (WSGI) or db executor threads (ASGI).")
+def benchmark_serving_command(out_json, slow_clients, duration, workers, threads):
+    """Compare gunicorn (WSGI) and uvicorn (ASGI) under slow clients; writes into the database, so use a copy."""
+    from benchmark import pick_samples, run_serving_benchmark, save_results
+
+    migrate(get_db())
+    samples = pick_samples()
+
+    results = run_serving_benchmark(
+        samples, slow_clients=slow_clients, duration=duration,
+        workers=workers, threads=threads,
+    )
+    save_results(results, out_json)
+
+    for mode in ("wsgi", "asgi"):
+        click.echo(f"{mode}:")
+        for phase in ("idle", "loaded"):
+            r = results[mode][phase]
+            click.echo(
+                f"  {phase:<8} p50 {r['p50_ms']:>9.2f}  p95 {r['p95_ms']:>9.2f}  "
+                f"p99 {r['p99_ms']:>9.2f}  max {r['max_ms']:>9.2f} ms  "
+                f"{r['per_second']:>7.1f} req/s  {r['failed']} failed"
+            )
+        c = results[mode]["slow_clients"]
+        click.echo(
+            f"  slow     {c['uploads']} syncs ({c['upload_errors']} failed), "
+            f"{c['downloads']} exports + {c['download_bytes']} bytes ({c['download_errors']} failed)"
+        )
+
+    click.echo(f"Results written to {out_json}")
+
+
+# -------------------------------------------------
+# APP FACTORY
+# -------------------------------------------------
+def create_app(config=None):
+    """
+    Builds the app: CBC_* environment settings, then config on top.
+    Also migrates and seeds the database (INIT_DB), which is idempotent
+    and safe to race; under gunicorn with preload_app it runs once, in
+    the master, before any worker forks.
+    """
+    app = Flask(__name__)
+    app.config.update(config_from_env())
+    app.config.update(config or {})
+    if not app.config.get("SECRET_KEY"):
+        app.config["SECRET_KEY"] = _instance_secret_key(app)
+
+    init_app(app)
+    init_metrics(app)
+    init_assets(app)
+
+    routes.init_app(app)
+    app.add_template_filter(search_marks, "search_marks")
+    for command in cli.commands.values():
+        app.cli.add_command(command)
+
+    app.extensions["template_fingerprint"] = _template_fingerprint(app)
+
+    if app.config["INIT_DB"]:
+        with app.app_context():
+            init_db()
+
+    return app
+
+
 # -------------------------------------------------
 # APP ENTRY
 # -------------------------------------------------
 if __name__ == "__main__":
-    init_db()
-    app.run(debug=True)
+    create_app().run(debug=True)
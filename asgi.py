@@ -0,0 +1,380 @@
+# ASGI entry point:
+#
+#     uvicorn --factory asgi:create_asgi_app --host 0.0.0.0 --port 8000
+#
+# Slow clients cost a coroutine here, not a thread: request bodies are
+# read and responses written on the event loop, and only the work in
+# between runs on db.DbExecutor's bounded threads. The offline-sync
+# batch and the report exports are served natively; every other route
+# is the Flask view, run step by step on the same executor.
+import asyncio
+import contextvars
+import io
+import json
+import sys
+import time
+from contextlib import aclosing
+from datetime import date
+from urllib.parse import parse_qs
+
+from itsdangerous import BadSignature
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_cookie
+from werkzeug.utils import get_content_type
+
+from app import EXPORT_FORMATS, create_app, sync_batch
+from db import DB_EXECUTOR_THREADS, DbExecutor, SqlStats, get_teacher_by_id
+from exports import stream_parquet_zip
+from metrics import IN_FLIGHT, REQUESTS, REQUEST_LATENCY, SQL_QUERIES, SQL_TIME
+
+_DONE = object()
+
+
+# -------------------------------------------------
+# ASGI <-> WSGI PLUMBING
+# -------------------------------------------------
+def _header(scope, name):
+    values = [value.decode("latin1") for key, value in scope["headers"] if key == name]
+    return ",".join(values) or None
+
+
+def build_environ(scope, body):
+    script_name = scope.get("root_path", "")
+    path_info = scope["path"]
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get("server") or ("localhost", 80)
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name.encode("utf-8").decode("latin1"),
+        "PATH_INFO": path_info.encode("utf-8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+
+    for key, value in scope["headers"]:
+        name = key.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+async def _read_body(receive):
+    """
+    The whole request body, read on the loop however slowly it
+    arrives; None if the client went away first.
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _watch_disconnect(receive, disconnected):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    disconnected.set()
+
+
+async def _send_response(send, status, content_type, body):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode("latin1")),
+            (b"content-length", str(len(body)).encode("latin1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+# -------------------------------------------------
+# ASGI APP
+# -------------------------------------------------
+class AsgiApp:
+    """
+    Serves the Flask app over ASGI. URLs are matched against the Flask
+    app's own url_map; endpoints in self.native have async handlers,
+    everything else goes to the Flask view. Native handlers only take
+    the signed-in, happy path and pass anything else (redirects, 403,
+    404) to the Flask view, so error responses stay identical.
+    """
+
+    def __init__(self, flask_app, executor=None):
+        self.flask_app = flask_app
+        self.executor = executor or DbExecutor(
+            flask_app.config.get("DB_EXECUTOR_THREADS", DB_EXECUTOR_THREADS)
+        )
+        self.native = {
+            "sync_observations_api": self.sync_observations_api,
+            "reports_export": self.reports_export,
+            "principal_reports_export": self.principal_reports_export,
+            "principal_analytics_export": self.principal_analytics_export,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            # no websocket routes
+            await send({"type": "websocket.close"})
+            return
+
+        endpoint, values = self._match(scope)
+        handler = self.native.get(endpoint)
+        if handler is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        # the Flask request hooks do not run here, so record the same metrics
+        start = time.perf_counter()
+        stats = SqlStats()
+        status = 500
+        IN_FLIGHT.inc()
+        try:
+            status = await handler(scope, receive, send, values, stats)
+        finally:
+            IN_FLIGHT.dec()
+            # None: handed to the Flask view, whose hooks recorded it
+            if status is not None:
+                REQUESTS.inc((endpoint, scope["method"], str(status)))
+                REQUEST_LATENCY.observe((endpoint, scope["method"]), time.perf_counter() - start)
+                SQL_QUERIES.observe((endpoint,), stats.queries)
+                SQL_TIME.observe((endpoint,), stats.seconds)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _match(self, scope):
+        adapter = self.flask_app.url_map.bind(
+            "localhost",
+            script_name=scope.get("root_path") or None,
+            url_scheme=scope.get("scheme", "http"),
+        )
+        path = scope["path"][len(scope.get("root_path", "")):]
+        try:
+            return adapter.match(path, scope["method"])
+        except HTTPException:
+            # 404, 405 and slash redirects are the Flask app's to answer
+            return None, {}
+
+    def _session(self, scope):
+        """
+        The Flask session from the signed cookie, read-only.
+        """
+        cookies = parse_cookie(_header(scope, b"cookie") or "")
+        value = cookies.get(self.flask_app.config["SESSION_COOKIE_NAME"])
+        if not value:
+            return {}
+
+        serializer = self.flask_app.session_interface.get_signing_serializer(self.flask_app)
+        max_age = int(self.flask_app.permanent_session_lifetime.total_seconds())
+        try:
+            return serializer.loads(value, max_age=max_age)
+        except BadSignature:
+            return {}
+
+    # ---------------------------------------------
+    # FLASK VIEWS (WSGI, STEP BY STEP)
+    # ---------------------------------------------
+    async def wsgi(self, scope, receive, send):
+        """
+        Runs the Flask app for one request. The body is read first, on
+        the loop; then the call and each chunk of the response are
+        separate executor steps, so no thread waits while a chunk goes
+        out to a slow client. The steps share one context, which keeps
+        Flask's request context and the SQL stats with the request
+        whichever thread runs them.
+        """
+        body = await _read_body(receive)
+        if body is None:
+            return
+
+        context = contextvars.copy_context()
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in headers
+            ]
+
+        def call():
+            result = self.flask_app(build_environ(scope, body), start_response)
+            chunks = iter(result)
+            # start_response may wait for the first chunk
+            first = next(chunks, _DONE) if not started else None
+            return result, chunks, first
+
+        result, chunks, first = await self.executor.run(context.run, call)
+
+        disconnected = asyncio.Event()
+        watcher = asyncio.create_task(_watch_disconnect(receive, disconnected))
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": started["status"],
+                "headers": started["headers"],
+            })
+
+            chunk = first
+            while chunk is not _DONE and not disconnected.is_set():
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                chunk = await self.executor.run(context.run, next, chunks, _DONE)
+
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            watcher.cancel()
+            if hasattr(result, "close"):
+                # a stream_with_context response pops its request context
+                # (teardown, pooled connection back) here; any other was
+                # torn down before call() returned
+                await self.executor.run(context.run, result.close)
+
+    async def _delegate(self, scope, receive, send):
+        await self.wsgi(scope, receive, send)
+        return None
+
+    # ---------------------------------------------
+    # OFFLINE SYNC (NATIVE)
+    # ---------------------------------------------
+    async def sync_observations_api(self, scope, receive, send, values, stats):
+        session = self._session(scope)
+        if session.get("role") != "teacher" or "teacher_id" not in session:
+            return await self._delegate(scope, receive, send)
+
+        # a phone on a poor network may take seconds to upload the batch
+        body = await _read_body(receive)
+        if body is None:
+            return None
+
+        # as request.get_json(silent=True): JSON content type, else nothing
+        content_type = (_header(scope, b"content-type") or "").split(";")[0].strip().lower()
+        payload = None
+        if content_type == "application/json" or (
+            content_type.startswith("application/") and content_type.endswith("+json")
+        ):
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                pass
+
+        result, status = await self.executor.run(
+            sync_batch,
+            session["teacher_id"],
+            payload,
+            self.flask_app.config["MAX_SYNC_BATCH"],
+            stats=stats
+        )
+        # compact, as jsonify sends it outside debug mode
+        data = f"{self.flask_app.json.dumps(result, separators=(',', ':'))}\n".encode("utf-8")
+        await _send_response(send, status, "application/json", data)
+        return status
+
+    # ---------------------------------------------
+    # EXPORTS (NATIVE, STREAMED)
+    # ---------------------------------------------
+    async def reports_export(self, scope, receive, send, values, stats):
+        session = self._session(scope)
+        if not session.get("teacher_logged_in") or session.get("role") != "teacher":
+            return await self._delegate(scope, receive, send)
+
+        fmt = values["fmt"]
+        stream, mimetype = EXPORT_FORMATS[fmt]
+        filename = f"observations-{date.today().isoformat()}.{fmt}"
+        return await self._stream(receive, send, stream, (session["teacher_id"],),
+                                  mimetype, filename, stats)
+
+    async def principal_reports_export(self, scope, receive, send, values, stats):
+        session = self._session(scope)
+        if "user_id" not in session or session.get("role") != "principal":
+            return await self._delegate(scope, receive, send)
+
+        # as request.args.get("teacher_id", type=int)
+        raw = parse_qs(scope["query_string"].decode("latin1")).get("teacher_id", [None])[0]
+        try:
+            teacher_id = int(raw) if raw is not None else None
+        except ValueError:
+            teacher_id = None
+
+        if teacher_id is not None:
+            if not await self.executor.run(get_teacher_by_id, teacher_id, stats=stats):
+                return await self._delegate(scope, receive, send)
+
+        fmt = values["fmt"]
+        stream, mimetype = EXPORT_FORMATS[fmt]
+        name = "school-observations" if teacher_id is None else f"teacher-{teacher_id}-observations"
+        filename = f"{name}-{date.today().isoformat()}.{fmt}"
+        return await self._stream(receive, send, stream, (teacher_id,), mimetype, filename, stats)
+
+    async def principal_analytics_export(self, scope, receive, send, values, stats):
+        session = self._session(scope)
+        if "user_id" not in session or session.get("role") != "principal":
+            return await self._delegate(scope, receive, send)
+
+        filename = f"cbc-observations-parquet-{date.today().isoformat()}.zip"
+        return await self._stream(receive, send, stream_parquet_zip, (),
+                                  "application/zip", filename, stats)
+
+    async def _stream(self, receive, send, make_stream, args, mimetype, filename, stats):
+        """
+        Sends make_stream(*args) as a download. Each batch is produced
+        on the executor, then sent from the loop; a client that goes
+        away stops the export at the next batch.
+        """
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", get_content_type(mimetype, "utf-8").encode("latin1")),
+                (b"content-disposition", f'attachment; filename="{filename}"'.encode("latin1")),
+            ],
+        })
+
+        disconnected = asyncio.Event()
+        watcher = asyncio.create_task(_watch_disconnect(receive, disconnected))
+        try:
+            async with aclosing(self.executor.iterate(make_stream, *args, stats=stats)) as chunks:
+                async for chunk in chunks:
+                    if disconnected.is_set():
+                        break
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode("utf-8")
+                    if chunk:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            watcher.cancel()
+        return 200
+
+
+def create_asgi_app(config=None):
+    return AsgiApp(create_app(config))
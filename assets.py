@@ -0,0 +1,195 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from flask import abort, current_app, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    # optional: without it only gzip variants are built
+    brotli = None
+
+# globs under the static folder that get fingerprinted copies
+ASSET_SOURCES = ("css/*.css", "js/*.js")
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+
+# fingerprinted names never change content, so caches may keep them a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+IMMUTABLE_MAX_AGE = 31536000
+
+# best first: brotli is ~15% smaller than gzip on CSS
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+# -------------------------------------------------
+# BUILD (FINGERPRINT + PRE-COMPRESS)
+# -------------------------------------------------
+def minify_css(text):
+    """
+    Drops comments and the whitespace around punctuation. Deliberately
+    simple: the stylesheets hold no strings or urls that could contain
+    these characters.
+    """
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    # only after the colon: a space before one is a descendant selector
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}").strip()
+
+
+def _fingerprinted(filename, digest):
+    stem, dot, ext = filename.rpartition(".")
+    return f"{stem}.{digest}.{ext}" if dot else f"{filename}.{digest}"
+
+
+def _write(path, data):
+    # write-then-rename, so a worker never serves a half-written file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def build_assets(static_folder, out_folder):
+    """
+    Writes content-hashed copies of every asset source into
+    out_folder (css/base.<hash>.css, ...) with .gz and, when the brotli
+    package is installed, .br variants beside them. Stylesheets are
+    minified first. Files that already exist are left alone, so
+    rebuilding unchanged sources costs one hash per file.
+
+    Returns the manifest: source name -> fingerprinted name.
+    """
+    static_folder = Path(static_folder)
+    out_folder = Path(out_folder)
+    manifest = {}
+
+    for pattern in ASSET_SOURCES:
+        for source in sorted(static_folder.glob(pattern)):
+            name = source.relative_to(static_folder).as_posix()
+            data = source.read_bytes()
+            if source.suffix == ".css":
+                data = minify_css(data.decode("utf-8")).encode("utf-8")
+
+            digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+            built = _fingerprinted(name, digest)
+            target = out_folder / built
+
+            if not target.exists():
+                # mtime=0 keeps the .gz bytes identical across builds
+                _write(target.with_name(target.name + ".gz"),
+                       gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write(target.with_name(target.name + ".br"),
+                           brotli.compress(data, quality=11))
+                # the plain file last: its presence marks a finished build
+                _write(target, data)
+
+            manifest[name] = built
+
+    _write(out_folder / MANIFEST_NAME,
+           json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    return manifest
+
+
+def prune_assets(out_folder, manifest):
+    """
+    Deletes fingerprinted files the manifest no longer points at.
+    Pages cached before a deploy may still link the old names, so run
+    this once those have had time to revalidate.
+    """
+    out_folder = Path(out_folder)
+    keep = {MANIFEST_NAME}
+    for built in manifest.values():
+        keep.update((built, built + ".gz", built + ".br"))
+
+    removed = []
+    for path in sorted(out_folder.rglob("*")):
+        name = path.relative_to(out_folder).as_posix()
+        if path.is_file() and name not in keep:
+            path.unlink()
+            removed.append(name)
+    return removed
+
+
+def load_manifest(out_folder):
+    path = Path(out_folder, MANIFEST_NAME)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text("utf-8"))
+
+
+# -------------------------------------------------
+# TEMPLATE HELPER
+# -------------------------------------------------
+def asset_url(filename, **values):
+    """
+    Drop-in for url_for('static', filename=...): the fingerprinted URL
+    when the file was built, the plain static URL otherwise.
+    """
+    built = current_app.extensions["assets"].get(filename)
+    if built is None:
+        return url_for("static", filename=filename, **values)
+    return url_for("assets", filename=built, **values)
+
+
+# -------------------------------------------------
+# SERVING
+# -------------------------------------------------
+def asset_view(filename):
+    """
+    Serves a fingerprinted file, pre-compressed when the client accepts
+    it. Any built name is served, not just the current ones, so pages
+    cached before a deploy keep their stylesheet.
+    """
+    # the variants are only reached through Accept-Encoding
+    if filename.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+        abort(404)
+
+    folder = current_app.config["ASSETS_FOLDER"]
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    name, encoding = filename, None
+    for candidate, suffix in ENCODINGS:
+        path = safe_join(folder, filename + suffix)
+        if request.accept_encodings[candidate] and path and os.path.isfile(path):
+            name, encoding = filename + suffix, candidate
+            break
+
+    response = send_from_directory(folder, name, mimetype=mimetype,
+                                   max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_assets(app):
+    """
+    Builds the fingerprinted assets (cheap when nothing changed) and
+    registers /assets/<name> plus the asset_url template helper. With
+    ASSETS_BUILD off, e.g. on a read-only deploy, the manifest written
+    by `flask build-assets` is used as is.
+    """
+    app.config.setdefault("ASSETS_FOLDER", os.path.join(app.static_folder, "dist"))
+    app.config.setdefault("ASSETS_BUILD", True)
+
+    if app.config["ASSETS_BUILD"]:
+        manifest = build_assets(app.static_folder, app.config["ASSETS_FOLDER"])
+    else:
+        manifest = load_manifest(app.config["ASSETS_FOLDER"])
+
+    app.extensions["assets"] = manifest
+    app.add_url_rule("/assets/<path:filename>", "assets", asset_view)
+    app.add_template_global(asset_url)
@@ -0,0 +1,817 @@
+import asyncio
+import inspect
+import json
+import os
+import platform
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import numpy as np
+from flask import g
+
+import db
+from db import BASE_DIR, capture_query_plans, get_db, sql_stats, table_scans
+
+BENCH_ITERATIONS = 30
+# heavy cases (exports, rebuilds, full checks) run this many times
+HEAVY_ITERATIONS = 3
+# the progress handler fires every N SQLite VM instructions
+VM_STEP_GRANULARITY = 100
+
+BENCH_PASSWORD = "password123"
+
+# db.py functions that are plumbing, not data helpers
+NOT_HELPERS = {
+    "get_db", "close_db", "reset_pool", "set_database_path", "init_app", "enable_group_commit",
+    "disable_group_commit", "roster_cached", "invalidate_roster_cache",
+    "roster_cache_stats", "migrate", "init_db", "seed_demo_classes",
+    "seed_demo_learners", "seed_demo_teachers", "seed_default_users",
+    "mark_dashboard_stale", "refresh_dashboard_snapshot", "encode_cursor",
+    "decode_cursor", "build_search_query", "explain_query_plan",
+    "capture_query_plans", "check_query_plans", "table_scans", "hash_password",
+    "verify_password", "bulk_observation_load", "sql_stats",
+    "begin_sql_stats", "end_sql_stats", "enable_slow_query_log",
+    "fingerprint_sql", "slow_query_report",
+}
+
+# route body marker: fetch once, then time the If-None-Match revalidation
+REVALIDATE = "revalidate"
+
+# serving benchmark: how fast a slow client sends or reads, in bytes/s
+# (a poor 2G/3G link), and the receive buffer that keeps a slow reader
+# from having the whole response buffered by the kernel
+SLOW_CLIENT_RATE = 4096
+SLOW_CLIENT_RCVBUF = 4096
+SLOW_CLIENT_TICK = 0.1
+# a fast request that takes longer than this counts as failed
+PROBE_TIMEOUT = 10
+SERVING_PORT = 8950
+
+
+# -------------------------------------------------
+# PROBE (VM STEPS)
+# -------------------------------------------------
+class Probe:
+    """
+    Counts SQLite VM steps (progress handler) on one connection. They
+    stand in for rows scanned: SQLite does not expose per-statement
+    row counts to Python, and a full scan costs a few steps per row
+    visited. Statements and SQL time come from db.sql_stats().
+    """
+
+    def __init__(self):
+        self.vm_steps = 0
+
+    def attach(self, conn):
+        conn.set_progress_handler(self._on_steps, VM_STEP_GRANULARITY)
+
+    @staticmethod
+    def detach(conn):
+        conn.set_progress_handler(None, 0)
+
+    def reset(self):
+        self.vm_steps = 0
+
+    def _on_steps(self):
+        self.vm_steps += VM_STEP_GRANULARITY
+        return 0
+
+
+def summarize(samples_ns, stats, vm_steps):
+    ms = np.array(samples_ns, dtype=np.float64) / 1e6
+    return {
+        "n": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "statements": stats.queries // len(ms),
+        "sql_ms": round(stats.seconds * 1000 / len(ms), 3),
+        "vm_steps": vm_steps // len(ms),
+    }
+
+
+def _drain(result):
+    # generators and row streams only do their work when consumed
+    rows = getattr(result, "observations", result)
+    if inspect.isgenerator(rows) or isinstance(rows, db.RowStream):
+        for _ in rows:
+            pass
+
+
+# -------------------------------------------------
+# SAMPLE DATA FOR THE CASES
+# -------------------------------------------------
+def pick_samples():
+    """
+    The busiest teacher and one of their classes, learners and
+    observations, so every case runs against realistic volumes.
+    """
+    cur = get_db().cursor()
+
+    cur.execute("""
+        SELECT t.id, t.email
+        FROM daily_observation_rollups r
+        JOIN teachers t ON t.id = r.teacher_id
+        GROUP BY r.teacher_id
+        ORDER BY SUM(r.observations) DESC
+        LIMIT 1
+    """)
+    teacher = cur.fetchone()
+    if teacher is None:
+        cur.execute("SELECT id, email FROM teachers ORDER BY id LIMIT 1")
+        teacher = cur.fetchone()
+    if teacher is None:
+        raise ValueError("No teachers to benchmark; generate data first.")
+
+    cur.execute("""
+        SELECT c.id, c.name, COUNT(l.id) AS learners
+        FROM classes c
+        JOIN learners l ON l.class_id = c.id
+        WHERE c.teacher_id = ?
+        GROUP BY c.id
+        ORDER BY learners DESC
+        LIMIT 1
+    """, (teacher["id"],))
+    class_row = cur.fetchone()
+
+    cur.execute(
+        "SELECT id FROM learners WHERE class_id = ? ORDER BY id",
+        (class_row["id"],)
+    )
+    learner_ids = [row["id"] for row in cur.fetchall()]
+
+    page = db.get_observations_page(teacher["id"])
+    observation_id = page["observations"][0]["id"] if page["observations"] else None
+
+    cur.execute("SELECT MAX(substr(created_at, 1, 7)) FROM observations")
+    month = cur.fetchone()[0]
+
+    return {
+        "teacher_id": teacher["id"],
+        "teacher_email": teacher["email"],
+        "class_id": class_row["id"],
+        "class_name": class_row["name"],
+        "learner_ids": learner_ids,
+        "observation_id": observation_id,
+        "older_cursor": page["older"],
+        "month": month,
+    }
+
+
+def helper_cases(s):
+    """
+    (name, callable, args, heavy) for every read and write helper.
+    Cached roster lookups are unwrapped so the database cost is timed.
+    """
+    tid, cid, lid = s["teacher_id"], s["class_id"], s["learner_ids"][0]
+    oid = s["observation_id"]
+    raw = inspect.unwrap
+
+    def sync_batch():
+        return [
+            {
+                "client_uuid": str(uuid.uuid4()),
+                "learner_id": learner_id,
+                "class_name": s["class_name"],
+                "activity": "Group work",
+                "skill": "Communication",
+                "level": "Improving",
+                "note": "benchmark",
+                "observed_at": None,
+            }
+            for learner_id in s["learner_ids"][:20]
+        ]
+
+    def save_fresh():
+        return db.save_observation(tid, s["class_name"], lid, "Group work", "Creativity", "Improving", "benchmark")
+
+    def save_then_edit():
+        # the edit path on a row that is still in today's rollups
+        new_id = save_fresh()
+        db.update_observation(new_id, tid, "Oral response", "Communication", "Doing well", "benchmark")
+        return new_id
+
+    return [
+        # reads
+        ("get_user_by_email", db.get_user_by_email, (s["teacher_email"],), False),
+        ("get_teacher_by_email", db.get_teacher_by_email, (s["teacher_email"],), False),
+        ("get_teacher_by_id", raw(db.get_teacher_by_id), (tid,), False),
+        ("get_all_teachers", db.get_all_teachers, (), False),
+        ("get_teacher_overview", db.get_teacher_overview, ("total_observations", True), False),
+        ("get_principal_teacher_summary", db.get_principal_teacher_summary, (tid,), False),
+        ("get_classes_for_teacher_readonly", db.get_classes_for_teacher_readonly, (tid,), False),
+        ("get_observations_for_teacher_readonly", db.get_observations_for_teacher_readonly, (tid,), False),
+        ("get_observation_by_id", db.get_observation_by_id, (oid, tid), False),
+        ("get_classes_for_teacher", raw(db.get_classes_for_teacher), (tid,), False),
+        ("get_class_ids_for_teacher", raw(db.get_class_ids_for_teacher), (tid,), False),
+        ("get_learners_for_class", raw(db.get_learners_for_class), (cid,), False),
+        ("get_classes_with_learner_counts_for_teacher", db.get_classes_with_learner_counts_for_teacher, (tid,), False),
+        ("get_principal_dashboard_summary", db.get_principal_dashboard_summary, (), False),
+        ("get_principal_dashboard_snapshot", db.get_principal_dashboard_snapshot, (), False),
+        ("get_learners_for_teacher", raw(db.get_learners_for_teacher), (tid,), False),
+        ("get_recent_observations", db.get_recent_observations, (tid,), False),
+        ("get_observations_page", db.get_observations_page, (tid,), False),
+        ("get_observations_page (older)", db.get_observations_page, (tid, s["older_cursor"]), False),
+        ("stream_observations_page", db.stream_observations_page, (tid,), False),
+        ("stream_observations_for_teacher_readonly", db.stream_observations_for_teacher_readonly, (tid,), False),
+        ("get_weekly_summary", db.get_weekly_summary, (tid,), False),
+        ("get_learner_with_class", raw(db.get_learner_with_class), (lid,), False),
+        ("get_learner_skill_states", db.get_learner_skill_states, (lid,), False),
+        ("get_learner_timeline", db.get_learner_timeline, (lid,), False),
+        ("get_class_progress", db.get_class_progress, (cid,), False),
+        ("get_data_versions", db.get_data_versions, ([tid],), False),
+        ("get_school_data_version", db.get_school_data_version, (), False),
+        ("get_data_version_stamp", db.get_data_version_stamp, (tid,), False),
+        ("get_classes_in_scope", db.get_classes_in_scope, (tid,), False),
+        ("get_mastery_rows", db.get_mastery_rows, ([cid],), False),
+        ("search_observations (teacher)", db.search_observations, ("group", tid), False),
+        ("search_observations (school)", db.search_observations, ("group",), False),
+        ("get_schema_version", db.get_schema_version, (get_db(),), False),
+        ("iter_observation_batches (teacher)", db.iter_observation_batches, (tid,), True),
+        ("iter_analytics_batches (last month)", db.iter_analytics_batches, (s["month"],), True),
+        ("iter_report_card_rows (class)", db.iter_report_card_rows, (cid,), True),
+        ("check_rollups", db.check_rollups, (), True),
+        # writes
+        ("save_observation", save_fresh, (), False),
+        ("save_observation + update_observation", save_then_edit, (), False),
+        ("update_observation", db.update_observation, (oid, tid, "Oral response", "Communication", "Doing well", "benchmark"), False),
+        ("soft_delete_observation", lambda: db.soft_delete_observation(save_fresh(), tid), (), False),
+        ("save_observations_bulk", db.save_observations_bulk, (
+            tid, s["class_name"], "Group work", "Collaboration",
+            [(learner_id, "Improving", "") for learner_id in s["learner_ids"]],
+        ), False),
+        ("sync_observations (20)", lambda: db.sync_observations(tid, sync_batch()), (), False),
+        ("import_roster (no-op)", db.import_roster, (
+            [(s["teacher_email"], *_teacher_details(tid), None)], [], [],
+        ), False),
+        ("rebuild_rollups", db.rebuild_rollups, (), True),
+        ("rebuild_search_index", db.rebuild_search_index, (), True),
+    ]
+
+
+def _teacher_details(teacher_id):
+    teacher = inspect.unwrap(db.get_teacher_by_id)(teacher_id)
+    return teacher["name"], teacher["subject"]
+
+
+def route_cases(s, include_exports=False):
+    """
+    (name, role, method, url, body, heavy) for the app's routes.
+    """
+    tid, cid, lid = s["teacher_id"], s["class_id"], s["learner_ids"][0]
+    oid = s["observation_id"]
+    observe_form = {
+        "activity": "Group work",
+        "skill": "Communication",
+        "level": "Doing well",
+        "note": "benchmark",
+    }
+
+    def sync_body():
+        return {"observations": [
+            {
+                "client_uuid": str(uuid.uuid4()),
+                "learner_id": learner_id,
+                "activity": "Group work",
+                "skill": "Communication",
+                "level": "Improving",
+            }
+            for learner_id in s["learner_ids"][:10]
+        ]}
+
+    cases = [
+        ("GET /", "anonymous", "GET", "/", None, False),
+        ("GET /principal/login", "anonymous", "GET", "/principal/login", None, False),
+        ("GET /principal", "principal", "GET", "/principal", None, False),
+        ("GET /dashboard", "teacher", "GET", "/dashboard", None, False),
+        ("GET /classes", "teacher", "GET", "/classes", None, False),
+        ("GET /observations", "teacher", "GET", "/observations", None, False),
+        ("GET /observations (older)", "teacher", "GET", f"/observations?before={s['older_cursor']}", None, False),
+        ("GET /learners", "teacher", "GET", f"/learners?class_id={cid}", None, False),
+        ("GET /learner/<id>", "teacher", "GET", f"/learner/{lid}", None, False),
+        ("GET /observe", "teacher", "GET", f"/observe?learner_id={lid}&class_id={cid}", None, False),
+        ("GET /observe/class", "teacher", "GET", f"/observe/class?class_id={cid}", None, False),
+        ("GET /observations/<id>/edit", "teacher", "GET", f"/observations/{oid}/edit", None, False),
+        ("GET /show", "teacher", "GET", "/show", None, False),
+        ("GET /week", "teacher", "GET", "/week", None, False),
+        ("GET /reports", "teacher", "GET", "/reports", None, False),
+        ("GET /dashboard (304)", "teacher", "GET", "/dashboard", REVALIDATE, False),
+        ("GET /reports (304)", "teacher", "GET", "/reports", REVALIDATE, False),
+        ("GET /search (teacher)", "teacher", "GET", "/search?q=group", None, False),
+        ("GET /heatmap (class)", "teacher", "GET", f"/heatmap?class_id={cid}", None, False),
+        ("GET /heatmap.json (class)", "teacher", "GET", f"/heatmap.json?class_id={cid}", None, False),
+        ("GET /heatmap.csv (class)", "teacher", "GET", f"/heatmap.csv?class_id={cid}", None, False),
+        ("POST /observe", "teacher", "POST", f"/observe?learner_id={lid}&class_id={cid}", observe_form, False),
+        ("POST /api/sync/observations (10)", "teacher", "POST", "/api/sync/observations", sync_body, False),
+        ("GET /principal/dashboard", "principal", "GET", "/principal/dashboard", None, False),
+        ("GET /principal/teachers", "principal", "GET", "/principal/teachers", None, False),
+        ("GET /principal/teacher/<id>", "principal", "GET", f"/principal/teacher/{tid}", None, False),
+        ("GET /principal/roster/import", "principal", "GET", "/principal/roster/import", None, False),
+        ("GET /search (school)", "principal", "GET", "/search?q=group", None, False),
+        ("GET /principal/dashboard (304)", "principal", "GET", "/principal/dashboard", REVALIDATE, False),
+        ("GET /metrics", "principal", "GET", "/metrics", None, False),
+    ]
+
+    if s.get("stylesheet"):
+        cases.append(("GET /assets/<stylesheet>", "anonymous", "GET", f"/assets/{s['stylesheet']}", None, False))
+
+    if include_exports:
+        cases += [
+            ("GET /reports/export.csv", "teacher", "GET", "/reports/export.csv", None, True),
+            ("GET /reports/export.xlsx", "teacher", "GET", "/reports/export.xlsx", None, True),
+            ("GET /reports/report-cards.zip", "teacher", "GET", f"/reports/report-cards.zip?class_id={cid}", None, True),
+            ("GET /principal/reports/export.csv", "principal", "GET", "/principal/reports/export.csv", None, True),
+            ("GET /principal/report-cards.zip", "principal", "GET", f"/principal/report-cards.zip?class_id={cid}", None, True),
+            ("GET /principal/analytics/export.zip", "principal", "GET", "/principal/analytics/export.zip", None, True),
+        ]
+
+    return cases
+
+
+# -------------------------------------------------
+# RUNNERS
+# -------------------------------------------------
+def run_helpers(cases, iterations=BENCH_ITERATIONS):
+    conn = get_db()
+    probe = Probe()
+    results = {}
+
+    for name, fn, args, heavy in cases:
+        runs = HEAVY_ITERATIONS if heavy else iterations
+        samples = []
+        probe.reset()
+        probe.attach(conn)
+        try:
+            with sql_stats() as stats:
+                for _ in range(runs):
+                    start = time.perf_counter_ns()
+                    _drain(fn(*args))
+                    samples.append(time.perf_counter_ns() - start)
+        finally:
+            probe.detach(conn)
+
+        results[name] = summarize(samples, stats, probe.vm_steps)
+        results[name]["full_scans"] = _full_scans(fn, args)
+
+    return results
+
+
+def _full_scans(fn, args):
+    # plans come from the same statements the helper traced
+    try:
+        plans = capture_query_plans(fn, *args)
+    except sqlite3.Error:
+        return None
+    return sorted(set(table_scans([detail for _, plan in plans for detail in plan])))
+
+
+def run_routes(app, cases, samples, iterations=BENCH_ITERATIONS):
+    probe = Probe()
+
+    def attach():
+        probe.attach(get_db())
+
+    def detach(exc=None):
+        if "db" in g:
+            Probe.detach(g.db)
+
+    app.before_request(attach)
+    app.teardown_request(detach)
+
+    clients = {
+        "anonymous": app.test_client(),
+        "teacher": _login(app, "/", samples["teacher_email"]),
+        "principal": _login(app, "/principal/login", "principal@school.test", "admin123"),
+    }
+
+    adapter = app.url_map.bind("localhost")
+    results = {}
+    for name, role, method, url, body, heavy in cases:
+        client = clients[role]
+        runs = HEAVY_ITERATIONS if heavy else iterations
+        timings = []
+        statuses = {}
+        probe.reset()
+
+        headers = {}
+        if body == REVALIDATE:
+            headers["If-None-Match"] = client.get(url).headers.get("ETag", "")
+
+        # the test client runs each request on this thread
+        with sql_stats() as stats:
+            for _ in range(runs):
+                payload = body() if callable(body) else body
+                start = time.perf_counter_ns()
+                if method == "GET":
+                    response = client.get(url, headers=headers)
+                elif callable(body):
+                    response = client.post(url, json=payload)
+                else:
+                    response = client.post(url, data=payload)
+                response.get_data()
+                timings.append(time.perf_counter_ns() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        results[name] = summarize(timings, stats, probe.vm_steps)
+        results[name]["endpoint"] = adapter.match(url.split("?")[0], method=method)[0]
+        results[name]["status"] = {str(code): n for code, n in sorted(statuses.items())}
+
+    return results
+
+
+def _login(app, path, email, password=BENCH_PASSWORD):
+    client = app.test_client()
+    response = client.post(path, data={"email": email, "password": password})
+    if response.status_code != 302:
+        raise ValueError(f"Could not sign in as {email} for the benchmark.")
+    return client
+
+
+def uncovered(app, helper_results, route_results):
+    """
+    Helpers and routes the suite does not time, so gaps are visible
+    in the results instead of silently missing.
+    """
+    timed = {name.split(" ")[0] for name in helper_results}
+    helpers = sorted(
+        name
+        for name, fn in inspect.getmembers(db, inspect.isfunction)
+        if fn.__module__ == "db" and not name.startswith("_")
+        and name not in NOT_HELPERS and name not in timed
+    )
+
+    routed = {result["endpoint"] for result in route_results.values()}
+    routes = sorted(
+        rule.rule for rule in app.url_map.iter_rules()
+        if rule.endpoint != "static" and rule.endpoint not in routed
+    )
+    return {"helpers": helpers, "routes": routes}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset_counts():
+    cur = get_db().cursor()
+    counts = {}
+    for table in ("teachers", "classes", "learners", "observations"):
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cur.fetchone()[0]
+    return counts
+
+
+def run_benchmark(app, iterations=BENCH_ITERATIONS, include_exports=False):
+    """
+    Times every helper (inside an app context) and every route
+    (through the test client) against the configured database.
+    Writes go to that database, so point it at a scratch copy.
+    """
+    with app.app_context():
+        samples = pick_samples()
+        samples["stylesheet"] = app.extensions["assets"].get("css/base.css")
+        meta = {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "iterations": iterations,
+            "dataset": dataset_counts(),
+        }
+        helpers = run_helpers(helper_cases(samples), iterations)
+
+    routes = run_routes(app, route_cases(samples, include_exports), samples, iterations)
+
+    return {
+        "meta": meta,
+        "helpers": helpers,
+        "routes": routes,
+        "not_benchmarked": uncovered(app, helpers, routes),
+    }
+
+
+def compare(old, new):
+    """
+    Yields (section, name, old p50, new p50, ratio) for every case
+    present in both result sets.
+    """
+    for section in ("helpers", "routes"):
+        for name, result in new[section].items():
+            before = old.get(section, {}).get(name)
+            if before is None:
+                continue
+            ratio = result["p50_ms"] / before["p50_ms"] if before["p50_ms"] else None
+            yield section, name, before["p50_ms"], result["p50_ms"], ratio
+
+
+# -------------------------------------------------
+# SERVING MODES (WSGI VS ASGI UNDER SLOW CLIENTS)
+# -------------------------------------------------
+def _server_command(mode, port, workers, threads):
+    if mode == "wsgi":
+        # gunicorn.conf.py supplies the rest (gthread, preload, timeouts)
+        return [
+            sys.executable, "-m", "gunicorn",
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(workers), "--threads", str(threads),
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "--factory", "asgi:create_asgi_app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+
+
+def start_server(mode, port, workers, threads):
+    """
+    Runs the app under gunicorn (wsgi) or uvicorn (asgi) against the
+    current database, with the same number of processes and of threads
+    per process doing the work (gthread threads / DbExecutor threads).
+    """
+    env = dict(
+        os.environ,
+        CBC_DATABASE=str(db.DB_PATH),
+        CBC_DB_THREADS=str(threads),
+        # already migrated by the caller
+        CBC_INIT_DB="0",
+    )
+    server = subprocess.Popen(
+        _server_command(mode, port, workers, threads),
+        cwd=BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with {server.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+
+    stop_server(server)
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def _request_head(method, path, cookie=None, body_length=None, content_type=None):
+    lines = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1", "Connection: close"]
+    if cookie:
+        lines.append(f"Cookie: {cookie}")
+    if content_type:
+        lines.append(f"Content-Type: {content_type}")
+    if body_length is not None:
+        lines.append(f"Content-Length: {body_length}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin1")
+
+
+async def _connect(port, rcvbuf=None):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if rcvbuf:
+        # before connecting, so the advertised window is small from the start
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+    return await asyncio.open_connection(sock=sock)
+
+
+async def _exchange(port, head, body=b""):
+    """
+    One request at full speed: (status, headers text, body bytes).
+    """
+    reader, writer = await _connect(port)
+    try:
+        writer.write(head + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    headers, _, content = response.partition(b"\r\n\r\n")
+    headers = headers.decode("latin1")
+    return int(headers.split(" ", 2)[1]), headers, content
+
+
+async def _sign_in(port, path, email, password):
+    form = urlencode({"email": email, "password": password}).encode("latin1")
+    status, headers, _ = await _exchange(
+        port,
+        _request_head("POST", path, body_length=len(form),
+                      content_type="application/x-www-form-urlencoded"),
+        form,
+    )
+    cookie = re.search(r"(?im)^set-cookie: *(session=[^;]+)", headers)
+    if status != 302 or cookie is None:
+        raise ValueError(f"Could not sign in as {email} for the benchmark.")
+    return cookie.group(1)
+
+
+async def _probe(port, cookie, path, stop, latencies, failures):
+    """
+    A client on a good connection, loading path back to back.
+    """
+    head = _request_head("GET", path, cookie)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            status, _, _ = await asyncio.wait_for(_exchange(port, head), PROBE_TIMEOUT)
+        except (asyncio.TimeoutError, OSError):
+            failures.append("timeout")
+            continue
+        if status != 200:
+            failures.append(str(status))
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def _slow_upload(port, cookie, make_body, stop, counts):
+    """
+    A phone syncing its queue over a poor link: the batch trickles in
+    at SLOW_CLIENT_RATE, again and again until stopped.
+    """
+    chunk = max(1, int(SLOW_CLIENT_RATE * SLOW_CLIENT_TICK))
+    while not stop.is_set():
+        body = json.dumps(make_body()).encode("utf-8")
+        try:
+            reader, writer = await _connect(port)
+        except OSError:
+            counts["upload_errors"] += 1
+            await asyncio.sleep(SLOW_CLIENT_TICK)
+            continue
+        try:
+            writer.write(_request_head("POST", "/api/sync/observations", cookie,
+                                       len(body), "application/json"))
+            for offset in range(0, len(body), chunk):
+                if stop.is_set():
+                    return
+                writer.write(body[offset:offset + chunk])
+                await writer.drain()
+                await asyncio.sleep(SLOW_CLIENT_TICK)
+            status_line = await reader.readline()
+            await reader.read()
+            if b" 200 " in status_line:
+                counts["uploads"] += 1
+            else:
+                counts["upload_errors"] += 1
+        except OSError:
+            counts["upload_errors"] += 1
+        finally:
+            writer.close()
+
+
+async def _slow_download(port, cookie, path, stop, counts):
+    """
+    An export downloaded over a poor link, read at SLOW_CLIENT_RATE
+    through a small receive buffer so the server has to wait for it.
+    """
+    chunk = max(1, int(SLOW_CLIENT_RATE * SLOW_CLIENT_TICK))
+    head = _request_head("GET", path, cookie)
+    while not stop.is_set():
+        try:
+            reader, writer = await _connect(port, rcvbuf=SLOW_CLIENT_RCVBUF)
+        except OSError:
+            counts["download_errors"] += 1
+            await asyncio.sleep(SLOW_CLIENT_TICK)
+            continue
+        try:
+            writer.write(head)
+            await writer.drain()
+            while not stop.is_set():
+                data = await reader.read(chunk)
+                if not data:
+                    counts["downloads"] += 1
+                    break
+                counts["download_bytes"] += len(data)
+                await asyncio.sleep(SLOW_CLIENT_TICK)
+        except OSError:
+            counts["download_errors"] += 1
+        finally:
+            writer.close()
+
+
+def _latency_summary(latencies, failures, seconds):
+    ms = np.array(latencies) * 1000 if latencies else np.array([np.nan])
+    return {
+        "requests": len(latencies),
+        "failed": len(failures),
+        "per_second": round(len(latencies) / seconds, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(np.max(ms)), 2),
+    }
+
+
+async def _serve_load(port, samples, slow_clients, duration, probes):
+    teacher = await _sign_in(port, "/", samples["teacher_email"], BENCH_PASSWORD)
+    learner_ids = samples["learner_ids"][:50]
+
+    def sync_body():
+        return {"observations": [
+            {
+                "client_uuid": str(uuid.uuid4()),
+                "learner_id": learner_id,
+                "activity": "Group work",
+                "skill": "Communication",
+                "level": "Improving",
+                "note": "serving benchmark, sent over a slow link",
+            }
+            for learner_id in learner_ids
+        ]}
+
+    async def measure(seconds):
+        stop = asyncio.Event()
+        latencies, failures = [], []
+        tasks = [
+            asyncio.create_task(_probe(port, teacher, "/dashboard", stop, latencies, failures))
+            for _ in range(probes)
+        ]
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+        return _latency_summary(latencies, failures, seconds)
+
+    idle = await measure(min(duration, 3))
+
+    stop = asyncio.Event()
+    counts = dict.fromkeys(
+        ("uploads", "upload_errors", "downloads", "download_bytes", "download_errors"), 0
+    )
+    slow = []
+    for n in range(slow_clients):
+        if n % 2:
+            slow.append(_slow_download(port, teacher, "/reports/export.csv", stop, counts))
+        else:
+            slow.append(_slow_upload(port, teacher, sync_body, stop, counts))
+    slow = [asyncio.create_task(client) for client in slow]
+
+    # let the slow clients connect and get stuck in first
+    await asyncio.sleep(1)
+    loaded = await measure(duration)
+    stop.set()
+    await asyncio.gather(*slow)
+
+    return {"idle": idle, "loaded": loaded, "slow_clients": counts}
+
+
+def run_serving_benchmark(samples, slow_clients=64, duration=10, workers=2,
+                          threads=4, probes=4, port=SERVING_PORT):
+    """
+    Starts the app under gunicorn (WSGI) and then uvicorn (ASGI) and
+    times fast /dashboard requests, first alone and then while
+    slow_clients clients sync batches and download exports over a slow
+    link. Under WSGI each slow client holds a worker thread; under ASGI
+    it holds a coroutine. Writes into the database, so use a copy.
+    """
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "slow_clients": slow_clients,
+            "slow_client_rate": SLOW_CLIENT_RATE,
+            "duration": duration,
+            "workers": workers,
+            "threads": threads,
+            "probes": probes,
+        },
+    }
+
+    for mode in ("wsgi", "asgi"):
+        server = start_server(mode, port, workers, threads)
+        try:
+            results[mode] = asyncio.run(
+                _serve_load(port, samples, slow_clients, duration, probes)
+            )
+        finally:
+            stop_server(server)
+
+    return results
+
+
+def save_results(results, path):
+    with open(path, "w") as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
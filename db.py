@@ -1,29 +1,878 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
 import sqlite3
+import sys
+import inspect
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import partial, wraps
 from pathlib import Path
+from types import SimpleNamespace
+from flask import g, has_app_context
 from werkzeug.security import generate_password_hash, check_password_hash
 
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR / "instance" / "cbc.db"
 
+# Connection tuning (applied once per connection, not per query)
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KIB = 20000
+MMAP_SIZE = 256 * 1024 * 1024
+POOL_SIZE = 8
+
+# Group commit (opt-in): how many writes share one transaction, and how
+# long the writer lingers for company (0 = take only what already
+# queued up while the previous group was committing)
+GROUP_COMMIT_MAX_BATCH = 64
+GROUP_COMMIT_MAX_WAIT = 0
+
+# Async access (asgi.py): threads, each with its own connection, that
+# run db.py calls for the event loop
+DB_EXECUTOR_THREADS = 8
+
+# Roster cache (classes, learners, teachers): entries and lifetime.
+# The TTL bounds staleness across worker processes, which do not see
+# each other's invalidations.
+ROSTER_CACHE_SIZE = 2048
+ROSTER_CACHE_TTL = 300
+
+DASHBOARD_REFRESH_SECONDS = 30
+DASHBOARD_MIN_REFRESH_GAP = 1
+
+OBSERVATIONS_PAGE_SIZE = 50
+SEARCH_PAGE_SIZE = 20
+EXPORT_BATCH_SIZE = 500
+
+# statements slower than this are logged with their plan; None = off
+SLOW_QUERY_MS = None
+
 
 # -------------------------------------------------
-# DB CONNECTION
+# SQL INSTRUMENTATION (PER CONTEXT)
 # -------------------------------------------------
-def get_db():
+# A context variable rather than a thread-local: for plain threads it
+# is the same thing, and a request run step by step on executor
+# threads (asgi.py) carries its stats along in its context.
+_sql_stats = ContextVar("cbc_sql_stats", default=None)
+
+
+class SqlStats:
+    """
+    Statements run and seconds spent in SQLite on one thread while
+    collection is on. Nested collections roll up into their parent.
+    """
+
+    __slots__ = ("queries", "seconds", "parent")
+
+    def __init__(self, parent=None):
+        self.queries = 0
+        self.seconds = 0.0
+        self.parent = parent
+
+
+def begin_sql_stats():
+    stats = SqlStats(_sql_stats.get())
+    _sql_stats.set(stats)
+    return stats
+
+
+def end_sql_stats():
+    stats = _sql_stats.get()
+    if stats is None:
+        return None
+
+    _sql_stats.set(stats.parent)
+    if stats.parent is not None:
+        stats.parent.queries += stats.queries
+        stats.parent.seconds += stats.seconds
+    return stats
+
+
+@contextmanager
+def sql_stats():
+    stats = begin_sql_stats()
+    try:
+        yield stats
+    finally:
+        end_sql_stats()
+
+
+def _trace_statement(sql):
+    # statements inside a trigger are reported as "-- TRIGGER ..."
+    # comments; they belong to the statement that fired the trigger
+    stats = _sql_stats.get()
+    if stats is not None and not sql.startswith("--"):
+        stats.queries += 1
+
+
+def _timed(method):
+    @wraps(method)
+    def timed(self, *args, **kwargs):
+        stats = _sql_stats.get()
+        if stats is None:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            stats.seconds += time.perf_counter() - start
+    return timed
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Times each statement from execute() through its last fetch. The
+    time goes to the thread's SqlStats when one is being collected;
+    statements slower than SLOW_QUERY_MS go to the slow-query log.
+
+    A statement ends when it returns no rows, its rows run out, the
+    cursor runs another statement, or the cursor is closed or dropped;
+    a fetchone() that finds it already slow ends it at once, as a
+    helper reading one row may keep the cursor for a long while.
+    """
+
+    _statement = None
+    _elapsed = 0.0
+
+    def _step(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._elapsed += elapsed
+            stats = _sql_stats.get()
+            if stats is not None:
+                stats.seconds += elapsed
+
+    def _begin(self, sql, parameters, many):
+        self._finish()
+        if SLOW_QUERY_MS is not None:
+            # the calling helper is looked up in _finish, and only for
+            # a statement that turned out slow: walking the stack on
+            # every execute costs more than most of them take
+            self._statement = (sql, parameters, many)
+        self._elapsed = 0.0
+
+    def _finish(self, if_slow=False):
+        statement = self._statement
+        if statement is None or SLOW_QUERY_MS is None:
+            self._statement = None
+            return
+
+        slow = self._elapsed * 1000 >= SLOW_QUERY_MS
+        if slow or not if_slow:
+            self._statement = None
+        if slow:
+            _log_slow_query(self.connection, *statement, _calling_helper(), self._elapsed)
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters, False)
+        self._step(sqlite3.Cursor.execute, sql, parameters)
+        if self.description is None:
+            self._finish()
+        return self
+
+    def executemany(self, sql, parameters):
+        self._begin(sql, parameters, True)
+        self._step(sqlite3.Cursor.executemany, sql, parameters)
+        self._finish()
+        return self
+
+    def executescript(self, script):
+        self._finish()
+        return self._step(sqlite3.Cursor.executescript, script)
+
+    def fetchone(self):
+        row = self._step(sqlite3.Cursor.fetchone)
+        self._finish(if_slow=row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._step(sqlite3.Cursor.fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._step(sqlite3.Cursor.fetchall)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            return self._step(sqlite3.Cursor.__next__)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # helpers often read one row and drop the cursor
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TimedConnection(sqlite3.Connection):
+    # Connection.execute() would build a plain cursor; route it (and
+    # commit / rollback, which write the WAL) through the timed one
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    commit = _timed(sqlite3.Connection.commit)
+    rollback = _timed(sqlite3.Connection.rollback)
+
+
+# -------------------------------------------------
+# SLOW QUERY LOG
+# -------------------------------------------------
+slow_query_logger = logging.getLogger("cbc.slow_query")
+
+# frames of the instrumentation itself, skipped when naming the caller
+_INSTRUMENTATION_FRAMES = {
+    "_calling_helper", "_finish", "_begin", "execute", "executemany",
+    "executescript", "fetchone", "fetchmany", "fetchall", "__next__",
+    "close", "__del__",
+}
+
+
+def _calling_helper():
+    """
+    The db helper that issued the statement: the innermost public
+    db.py function on the stack, else the private one, else the first
+    function outside db.py (exports, report cards, ...). Called as the
+    statement ends, so a stream read elsewhere names its reader.
+    """
+    frame = sys._getframe(1)
+    private = None
+    while frame is not None:
+        name = frame.f_code.co_name
+        if frame.f_globals.get("__name__") == __name__:
+            if name not in _INSTRUMENTATION_FRAMES:
+                if not name.startswith("_"):
+                    return name
+                private = private or name
+        elif private is not None:
+            return private
+        else:
+            return f"{frame.f_globals.get('__name__')}.{name}"
+        frame = frame.f_back
+    return private
+
+
+def _parameter_shape(parameters):
+    # types only: values can hold learners' names and teachers' notes
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters]
+
+
+def fingerprint_sql(sql):
+    """
+    Normalizes a statement so runs that differ only in literals or
+    IN-list length group together: whitespace collapsed, literals and
+    placeholders replaced by ?, (?, ?, ...) folded to (?...).
+    """
+    text = re.sub(r"--[^\n]*", " ", sql)
+    text = re.sub(r"'(?:[^']|'')*'", "?", text)
+    text = re.sub(r"(?<![\w.])\d+(?:\.\d+)?\b", "?", text)
+    text = re.sub(r":\w+", "?", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    text = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(?...)", text)
+    return text
+
+
+def _log_slow_query(conn, sql, parameters, many, helper, elapsed):
+    if many:
+        rows = parameters if isinstance(parameters, (list, tuple)) else None
+        shape = {
+            "rows": len(rows) if rows is not None else None,
+            "row": _parameter_shape(rows[0]) if rows else None,
+        }
+        sample = rows[0] if rows else None
+    else:
+        shape = _parameter_shape(parameters)
+        sample = parameters
+
+    plan = []
+    if sample is not None:
+        # a plain cursor, so explaining is neither timed nor logged
+        try:
+            plan = [
+                row[-1]
+                for row in conn.cursor(sqlite3.Cursor).execute(
+                    "EXPLAIN QUERY PLAN " + sql, sample
+                ).fetchall()
+            ]
+        except sqlite3.Error:
+            plan = []
+
+    normalized = fingerprint_sql(sql)
+    scans = table_scans(plan)
+    slow_query_logger.warning(json.dumps({
+        "event": "slow_query",
+        "fingerprint": hashlib.sha1(normalized.encode()).hexdigest()[:12],
+        "sql": normalized,
+        "params": shape,
+        "duration_ms": round(elapsed * 1000, 3),
+        "threshold_ms": SLOW_QUERY_MS,
+        "helper": helper,
+        "plan": plan,
+        "full_scan": bool(scans),
+        "full_scans": scans,
+    }))
+
+
+def slow_query_report(records, top=10):
+    """
+    Aggregates slow-query records (dicts from the log) by fingerprint,
+    slowest total first: count, total / max / mean ms, the helpers
+    that issued it and whether any run did a full-table scan.
+    """
+    groups = {}
+    for record in records:
+        group = groups.setdefault(record["fingerprint"], {
+            "fingerprint": record["fingerprint"],
+            "sql": record["sql"],
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "helpers": set(),
+            "full_scans": set(),
+        })
+        group["count"] += 1
+        group["total_ms"] += record["duration_ms"]
+        group["max_ms"] = max(group["max_ms"], record["duration_ms"])
+        group["helpers"].add(record["helper"] or "?")
+        group["full_scans"].update(record.get("full_scans", []))
+
+    report = sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)[:top]
+    for group in report:
+        group["mean_ms"] = round(group["total_ms"] / group["count"], 3)
+        group["total_ms"] = round(group["total_ms"], 3)
+        group["helpers"] = sorted(group["helpers"])
+        group["full_scans"] = sorted(group["full_scans"])
+    return report
+
+
+# -------------------------------------------------
+# DB CONNECTION (POOLED, ONE PER REQUEST)
+# -------------------------------------------------
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+_local = threading.local()
+
+
+def _connect():
+    """
+    Opens a new connection with the production PRAGMAs applied.
+    Only called when the pool is empty.
+    """
     # ensure instance directory exists before creating DB file
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        factory=TimedConnection,
+    )
     conn.row_factory = sqlite3.Row
+    conn.set_trace_callback(_trace_statement)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def _acquire():
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return _connect()
+
+
+def _release(conn):
+    # never hand a half-finished transaction to the next request
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+def get_db():
+    """
+    Returns the connection bound to the current app context.
+    Every helper called during one request shares it; it goes back
+    to the pool on teardown. Outside an app context (scripts) each
+    thread keeps one connection of its own.
+    """
+    if has_app_context():
+        if "db" not in g:
+            g.db = _acquire()
+        return g.db
+
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _connect()
     return conn
 
 
+def close_db(exc=None):
+    conn = g.pop("db", None)
+    if conn is not None:
+        _release(conn)
+
+
+def reset_pool():
+    """
+    Drops every pooled connection (e.g. after DB_PATH changes or a fork).
+    """
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def set_database_path(path):
+    """
+    Points new connections at path; pooled ones to the old file go.
+    """
+    global DB_PATH
+    DB_PATH = Path(path)
+    reset_pool()
+
+
+def init_app(app):
+    app.teardown_appcontext(close_db)
+
+    if app.config.get("DATABASE"):
+        set_database_path(app.config["DATABASE"])
+
+    if app.config.get("GROUP_COMMIT"):
+        enable_group_commit()
+
+    if app.config.get("DASHBOARD_REFRESH_SECONDS"):
+        _dashboard_snapshot.interval = app.config["DASHBOARD_REFRESH_SECONDS"]
+
+    if app.config.get("SLOW_QUERY_MS"):
+        enable_slow_query_log(app.config["SLOW_QUERY_MS"], app.config.get("SLOW_QUERY_LOG"))
+
+
+def enable_slow_query_log(threshold_ms, path=None):
+    """
+    Logs statements slower than threshold_ms as one JSON object per
+    line, to path if given, else through the "cbc.slow_query" logger.
+    """
+    global SLOW_QUERY_MS
+    SLOW_QUERY_MS = threshold_ms
+
+    if path and not slow_query_logger.handlers:
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.propagate = False
+
+
 # -------------------------------------------------
-# INIT DATABASE
+# ASYNC ACCESS (BOUNDED EXECUTOR)
 # -------------------------------------------------
-def init_db():
-    conn = get_db()
-    cur = conn.cursor()
+_EXHAUSTED = object()
+
+
+@contextmanager
+def _bound_connection(conn):
+    # what get_db() returns on this thread outside an app context
+    previous = getattr(_local, "conn", None)
+    _local.conn = conn
+    try:
+        yield conn
+    finally:
+        _local.conn = previous
+
+
+def _run_counted(stats, fn, args):
+    with sql_stats() as counted:
+        try:
+            return fn(*args)
+        finally:
+            stats.queries += counted.queries
+            stats.seconds += counted.seconds
+
+
+class DbExecutor:
+    """
+    Runs blocking db.py calls for async code on a fixed set of
+    threads. Each thread opens one connection when it starts and keeps
+    it (get_db() outside an app context returns it), so at most
+    max_workers calls touch SQLite at once however many requests are
+    waiting on the event loop.
+    """
+
+    def __init__(self, max_workers=DB_EXECUTOR_THREADS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._connections = []
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _start_thread(self):
+        conn = _local.conn = _connect()
+        with self._lock:
+            self._connections.append(conn)
+
+    def _get_executor(self):
+        # same fork rule as the group-commit writer
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._connections = []
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="cbc-db",
+                    initializer=self._start_thread
+                )
+        return self._executor
+
+    async def run(self, fn, *args, stats=None):
+        """
+        Awaits fn(*args) run on an executor thread. Statements it runs
+        are added to stats (a SqlStats) when given.
+        """
+        call = partial(fn, *args) if stats is None else partial(_run_counted, stats, fn, args)
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+
+    async def iterate(self, make_iterator, *args, stats=None):
+        """
+        Async iterator over make_iterator(*args), one step per executor
+        call, so no thread waits while the consumer sends a chunk to a
+        slow client. A stream (an export cursor) outlives its steps and
+        may resume on another thread, so it gets a pooled connection of
+        its own instead of a thread's. The connection is taken and given
+        back in executor steps too: the loop never touches SQLite. Use
+        with contextlib.aclosing.
+        """
+        conn = None
+        iterator = None
+
+        def step():
+            nonlocal conn, iterator
+            if conn is None:
+                conn = _acquire()
+            with _bound_connection(conn):
+                if iterator is None:
+                    iterator = iter(make_iterator(*args))
+                return next(iterator, _EXHAUSTED)
+
+        def close():
+            try:
+                with _bound_connection(conn):
+                    if hasattr(iterator, "close"):
+                        iterator.close()
+            finally:
+                _release(conn)
+
+        try:
+            while True:
+                item = await self.run(step, stats=stats)
+                if item is _EXHAUSTED:
+                    break
+                yield item
+        finally:
+            if conn is not None:
+                await self.run(close)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            connections, self._connections = self._connections, []
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for conn in connections:
+            conn.close()
+
+
+# -------------------------------------------------
+# WRITES (DIRECT OR GROUP COMMIT)
+# -------------------------------------------------
+class WriteQueue:
+    """
+    One writer thread that owns its own connection and commits queued
+    write operations in small groups: one BEGIN IMMEDIATE ... COMMIT
+    (one fsync, one lock acquisition) for up to max_batch operations.
+
+    Each operation runs inside its own SAVEPOINT so a failing one is
+    rolled back alone; its caller gets the exception, the rest commit.
+    Callers block on a Future that resolves only after COMMIT returns,
+    so durability is the same as a direct commit.
+    """
+
+    def __init__(self, max_batch=GROUP_COMMIT_MAX_BATCH, max_wait=GROUP_COMMIT_MAX_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, op, *args):
+        self._ensure_started()
+        future = Future()
+        self._jobs.put((future, op, args))
+        return future
+
+    def stop(self):
+        if self._thread is not None and self._pid == os.getpid():
+            self._jobs.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _ensure_started(self):
+        # (re)start lazily, also in a forked worker: threads do not
+        # survive fork, so a pid change means we need our own writer
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._jobs = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="cbc-group-commit",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _next_group(self):
+        first = self._jobs.get()
+        if first is None:
+            return None
+
+        group = [first]
+        while len(group) < self.max_batch:
+            try:
+                if self.max_wait:
+                    job = self._jobs.get(timeout=self.max_wait)
+                else:
+                    job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._jobs.put(None)
+                break
+            group.append(job)
+        return group
+
+    def _run(self):
+        conn = _connect()
+        cur = conn.cursor()
+
+        while True:
+            group = self._next_group()
+            if group is None:
+                break
+
+            outcomes = []
+            try:
+                cur.execute("BEGIN IMMEDIATE")
+                for future, op, args in group:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    cur.execute("SAVEPOINT write_op")
+                    try:
+                        outcomes.append((future, op(cur, *args), None))
+                        cur.execute("RELEASE write_op")
+                    except Exception as exc:
+                        cur.execute("ROLLBACK TO write_op")
+                        cur.execute("RELEASE write_op")
+                        outcomes.append((future, None, exc))
+                conn.commit()
+            except Exception as exc:
+                if conn.in_transaction:
+                    conn.rollback()
+                for future, _, _ in group:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for future, result, error in outcomes:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+        conn.close()
+
+
+_write_queue = None
+
+
+def enable_group_commit(max_batch=GROUP_COMMIT_MAX_BATCH, max_wait=GROUP_COMMIT_MAX_WAIT):
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteQueue(max_batch=max_batch, max_wait=max_wait)
+    return _write_queue
+
+
+def disable_group_commit():
+    global _write_queue
+    if _write_queue is not None:
+        _write_queue.stop()
+    _write_queue = None
+
+
+def _write(op, *args):
+    """
+    Runs op(cur, *args) as one committed write. With group commit
+    enabled it goes through the writer thread; otherwise it runs on the
+    request's connection and commits immediately.
+    """
+    if _write_queue is not None:
+        result = _write_queue.submit(op, *args).result()
+    else:
+        conn = get_db()
+        cur = conn.cursor()
+        try:
+            # take the write lock up front, as the writer thread does,
+            # so reads an op makes before writing are not raced
+            if not conn.in_transaction:
+                cur.execute("BEGIN IMMEDIATE")
+            result = op(cur, *args)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    mark_dashboard_stale()
+    return result
+
+
+# -------------------------------------------------
+# ROSTER CACHE (LRU + TTL)
+# -------------------------------------------------
+class RosterCache:
+    """
+    Small thread-safe LRU with a TTL for roster lookups, which almost
+    never change during a term. Every roster write calls
+    invalidate_roster_cache(); hits and misses are counted per lookup.
+    """
+
+    def __init__(self, maxsize=ROSTER_CACHE_SIZE, ttl=ROSTER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits[key[0]] = self.hits.get(key[0], 0) + 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses[key[0]] = self.misses.get(key[0], 0) + 1
+            return False, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+            }
+
+
+_roster_cache = RosterCache()
+
+
+def roster_cached(name):
+    """
+    Caches a roster lookup by its arguments. Results are frozen into
+    tuples so callers cannot mutate shared data; None (not found) is
+    never cached, so a newly created row is visible at once.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args):
+            key = (name, *args)
+            hit, value = _roster_cache.get(key)
+            if hit:
+                return value
+
+            value = fn(*args)
+            if isinstance(value, list):
+                value = tuple(value)
+            if value is not None:
+                _roster_cache.set(key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidate_roster_cache():
+    # roster writes are rare, so dropping everything is cheap and
+    # avoids tracking which teacher / class each entry depends on
+    _roster_cache.clear()
+
+
+def roster_cache_stats():
+    return _roster_cache.stats()
 
+
+# -------------------------------------------------
+# SCHEMA MIGRATIONS
+# -------------------------------------------------
+def _migration_core_tables(cur):
     # -------------------------------
     # TEACHERS TABLE
     # -------------------------------
@@ -83,18 +932,6 @@ def init_db():
         )
     """)
 
-    # -------------------------------------------------
-    # SOFT DELETE SUPPORT (PHASE 6C-0)
-    # -------------------------------------------------
-    cur.execute("PRAGMA table_info(observations)")
-    columns = [row["name"] for row in cur.fetchall()]
-
-    if "is_deleted" not in columns:
-        cur.execute("""
-            ALTER TABLE observations
-            ADD COLUMN is_deleted INTEGER DEFAULT 0
-        """)
-
     # -------------------------------
     # USERS TABLE (SECURITY CORE)
     # -------------------------------
@@ -109,6 +946,321 @@ def init_db():
         )
     """)
 
+
+def _migration_soft_delete(cur):
+    # SOFT DELETE SUPPORT (PHASE 6C-0)
+    # Databases created before schema_version existed may already
+    # have the column, so this step stays conditional.
+    cur.execute("PRAGMA table_info(observations)")
+    columns = [row["name"] for row in cur.fetchall()]
+
+    if "is_deleted" not in columns:
+        cur.execute("""
+            ALTER TABLE observations
+            ADD COLUMN is_deleted INTEGER DEFAULT 0
+        """)
+
+
+def _migration_observation_indexes(cur):
+    # Teacher listings: filter on owner + live rows, newest first
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_observations_teacher_live_created
+        ON observations (teacher_id, is_deleted, created_at DESC)
+    """)
+
+    # Per-learner history of live rows only
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_observations_learner_live
+        ON observations (learner_id, created_at)
+        WHERE is_deleted = 0
+    """)
+
+    # School-wide date window (principal dashboard)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_observations_created
+        ON observations (created_at)
+    """)
+
+
+def _migration_roster_indexes(cur):
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_learners_class_name
+        ON learners (class_id, name)
+    """)
+
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_classes_teacher_name
+        ON classes (teacher_id, name)
+    """)
+
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_teachers_name
+        ON teachers (name)
+    """)
+
+
+def _migration_daily_rollups(cur):
+    # Per-teacher, per-day totals (all-time and window sums)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_observation_rollups (
+            teacher_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            observations INTEGER NOT NULL,
+            PRIMARY KEY (teacher_id, day)
+        ) WITHOUT ROWID
+    """)
+
+    # Same grain split by learner and skill, so COUNT(DISTINCT ...)
+    # over a window stays exact without touching raw observations
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_observation_learner_skills (
+            teacher_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            learner_id INTEGER NOT NULL,
+            skill TEXT NOT NULL,
+            observations INTEGER NOT NULL,
+            PRIMARY KEY (teacher_id, day, learner_id, skill)
+        ) WITHOUT ROWID
+    """)
+
+    _rebuild_rollups(cur)
+
+
+def _migration_observation_keyset_index(cur):
+    # (created_at, id) keyset pages walk this index in either direction
+    # with no sort step; it supersedes the created_at DESC index.
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_observations_teacher_live_keyset
+        ON observations (teacher_id, is_deleted, created_at, id)
+    """)
+
+    cur.execute("DROP INDEX IF EXISTS idx_observations_teacher_live_created")
+
+
+def _migration_client_uuid(cur):
+    # Idempotency key for observations queued offline on a device
+    cur.execute("PRAGMA table_info(observations)")
+    columns = [row["name"] for row in cur.fetchall()]
+
+    if "client_uuid" not in columns:
+        cur.execute("ALTER TABLE observations ADD COLUMN client_uuid TEXT")
+
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_observations_client_uuid
+        ON observations (client_uuid)
+        WHERE client_uuid IS NOT NULL
+    """)
+
+
+def _migration_observation_search(cur):
+    # FTS5 index over the text a teacher writes, with observations as
+    # its external content; only live (is_deleted = 0) rows are indexed
+    cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS observations_fts USING fts5(
+            activity,
+            skill,
+            note,
+            content = 'observations',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+
+    # An external-content "delete" must repeat the indexed values, so
+    # each trigger removes the old row only if it was live and adds the
+    # new one only if it is live.
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS observations_fts_insert
+        AFTER INSERT ON observations
+        WHEN new.is_deleted = 0
+        BEGIN
+            INSERT INTO observations_fts (rowid, activity, skill, note)
+            VALUES (new.id, new.activity, new.skill, new.note);
+        END
+    """)
+
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS observations_fts_delete
+        AFTER DELETE ON observations
+        WHEN old.is_deleted = 0
+        BEGIN
+            INSERT INTO observations_fts (observations_fts, rowid, activity, skill, note)
+            VALUES ('delete', old.id, old.activity, old.skill, old.note);
+        END
+    """)
+
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS observations_fts_update
+        AFTER UPDATE OF activity, skill, note, is_deleted ON observations
+        BEGIN
+            INSERT INTO observations_fts (observations_fts, rowid, activity, skill, note)
+            SELECT 'delete', old.id, old.activity, old.skill, old.note
+            WHERE old.is_deleted = 0;
+
+            INSERT INTO observations_fts (rowid, activity, skill, note)
+            SELECT new.id, new.activity, new.skill, new.note
+            WHERE new.is_deleted = 0;
+        END
+    """)
+
+    _rebuild_search_index(cur)
+
+
+def _migration_learner_skill_state(cur):
+    # Latest level / first seen / count per learner and skill, so a
+    # learner profile or class roster never re-reads raw observations
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS learner_skill_state (
+            learner_id INTEGER NOT NULL,
+            skill TEXT NOT NULL,
+            latest_level TEXT NOT NULL,
+            first_observed_at TIMESTAMP NOT NULL,
+            last_observed_at TIMESTAMP NOT NULL,
+            observations INTEGER NOT NULL,
+            PRIMARY KEY (learner_id, skill)
+        ) WITHOUT ROWID
+    """)
+
+    _rebuild_learner_skill_state(cur)
+
+
+# (table, teacher id of the changed row) for the data-version triggers
+_VERSIONED_TABLES = [
+    ("observations", "{row}.teacher_id"),
+    ("learners", "(SELECT teacher_id FROM classes WHERE id = {row}.class_id)"),
+    ("classes", "{row}.teacher_id"),
+    ("teachers", "{row}.id"),
+]
+
+
+def _migration_data_versions(cur):
+    # Monotonic counters per teacher and for the whole school, bumped
+    # by triggers on every write to the tables views are built from;
+    # caches compare versions instead of re-reading data
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope TEXT NOT NULL,
+            scope_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (scope, scope_id)
+        ) WITHOUT ROWID
+    """)
+
+    for table, teacher_expr in _VERSIONED_TABLES:
+        for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+            teacher_id = teacher_expr.format(row=row)
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_data_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO data_versions (scope, scope_id, version)
+                    VALUES ('teacher', COALESCE({teacher_id}, 0), 1),
+                           ('school', 0, 1)
+                    ON CONFLICT (scope, scope_id)
+                    DO UPDATE SET version = version + 1;
+                END
+            """)
+
+
+def _migration_data_version_timestamps(cur):
+    # When each counter last moved, for Last-Modified headers; the
+    # triggers are recreated to stamp it alongside the bump
+    cur.execute("ALTER TABLE data_versions ADD COLUMN updated_at TIMESTAMP")
+    cur.execute("UPDATE data_versions SET updated_at = CURRENT_TIMESTAMP")
+
+    for table, teacher_expr in _VERSIONED_TABLES:
+        for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+            teacher_id = teacher_expr.format(row=row)
+            name = f"{table}_data_version_{event.lower()}"
+            cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cur.execute(f"""
+                CREATE TRIGGER {name}
+                AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO data_versions (scope, scope_id, version, updated_at)
+                    VALUES ('teacher', COALESCE({teacher_id}, 0), 1, CURRENT_TIMESTAMP),
+                           ('school', 0, 1, CURRENT_TIMESTAMP)
+                    ON CONFLICT (scope, scope_id)
+                    DO UPDATE SET version = version + 1,
+                                  updated_at = excluded.updated_at;
+                END
+            """)
+
+
+# Ordered, append-only. Never edit a step that has shipped;
+# add a new one with the next version number instead.
+MIGRATIONS = [
+    (1, "core tables", _migration_core_tables),
+    (2, "observations soft delete", _migration_soft_delete),
+    (3, "observation read indexes", _migration_observation_indexes),
+    (4, "roster indexes", _migration_roster_indexes),
+    (5, "daily observation rollups", _migration_daily_rollups),
+    (6, "observation keyset index", _migration_observation_keyset_index),
+    (7, "observation client uuid", _migration_client_uuid),
+    (8, "observation full-text search", _migration_observation_search),
+    (9, "learner skill state", _migration_learner_skill_state),
+    (10, "data version counters", _migration_data_versions),
+    (11, "data version timestamps", _migration_data_version_timestamps),
+]
+
+
+def get_schema_version(conn):
+    row = conn.execute(
+        "SELECT COALESCE(MAX(version), 0) FROM schema_version"
+    ).fetchone()
+    return row[0]
+
+
+def migrate(conn):
+    """
+    Applies every pending migration, one transaction per step.
+    BEGIN IMMEDIATE serialises concurrent runners (several workers
+    starting at once); each re-checks the version after taking the lock.
+    Returns the list of versions applied.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    applied = []
+
+    for version, name, step in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+
+            step(conn.cursor())
+            conn.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (version, name)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+
+    return applied
+
+
+# -------------------------------------------------
+# INIT DATABASE
+# -------------------------------------------------
+def init_db():
+    conn = get_db()
+
+    migrate(conn)
+
     # -------------------------------
     # SEED DATA (AFTER ALL TABLES)
     # -------------------------------
@@ -118,7 +1270,8 @@ def init_db():
     seed_demo_learners()
 
     conn.commit()
-    conn.close()
+    invalidate_roster_cache()
+    mark_dashboard_stale()
 
 
 # -------------------------------------------------
@@ -266,7 +1419,6 @@ def seed_demo_learners():
 
 
     conn.commit()
-    conn.close()
 
 
    
@@ -275,29 +1427,154 @@ def seed_demo_learners():
 # -------------------------------------------------
 # TEACHERS
 # -------------------------------------------------
-def get_or_create_teacher(email, name, subject):
+def get_teacher_by_email(email):
     conn = get_db()
     cur = conn.cursor()
 
-    cur.execute("SELECT id FROM teachers WHERE email = ?", (email,))
-    row = cur.fetchone()
-
-    if row:
-        teacher_id = row["id"]
-    else:
-        cur.execute(
-            "INSERT INTO teachers (email, name, subject) VALUES (?, ?, ?)",
-            (email, name, subject)
-        )
-        conn.commit()
-        teacher_id = cur.lastrowid
+    cur.execute(
+        "SELECT id, name, email, subject FROM teachers WHERE email = ?",
+        (email,)
+    )
 
-    conn.close()
-    return teacher_id
+    return cur.fetchone()
 
 
 # -------------------------------------------------
-# TEACHERS (READ-ONLY — PRINCIPAL)
+# ROSTER IMPORT (BULK PROVISIONING)
+# -------------------------------------------------
+def import_roster(teachers, classes, learners):
+    """
+    Provisions teachers, their logins, classes and learners in one
+    transaction with executemany.
+
+    teachers: [(email, name, subject, password_hash or None)]
+    classes:  [(teacher_email, class_name, subject)]
+    learners: [(teacher_email, class_name, learner_name)]
+
+    Teachers are upserted on email; classes and learners are matched
+    on name within their teacher / class and only added when missing
+    (learner names are not unique, so there is no unique index to
+    upsert on). Existing logins are never overwritten.
+
+    If a teacher would end up without a login, or an email already
+    belongs to a login that is not a teacher's (the principal, say),
+    the transaction is rolled back and those emails come back in
+    "missing_logins" / "not_teachers".
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        all_emails = [email for email, _, _, _ in teachers]
+        placeholders = ", ".join("?" for _ in all_emails)
+        cur.execute(
+            f"SELECT email FROM users WHERE email IN ({placeholders}) AND role <> 'teacher'",
+            all_emails
+        )
+        not_teachers = sorted(row["email"] for row in cur.fetchall())
+
+        if not_teachers:
+            conn.rollback()
+            return {"missing_logins": [], "not_teachers": not_teachers}
+
+        emails = [email for email, _, _, password_hash in teachers if not password_hash]
+        missing_logins = []
+        if emails:
+            placeholders = ", ".join("?" for _ in emails)
+            cur.execute(
+                f"SELECT email FROM users WHERE email IN ({placeholders})",
+                emails
+            )
+            existing = {row["email"] for row in cur.fetchall()}
+            missing_logins = sorted(set(emails) - existing)
+
+        if missing_logins:
+            conn.rollback()
+            return {"missing_logins": missing_logins, "not_teachers": []}
+
+        cur.executemany(
+            """
+            INSERT INTO users (email, password_hash, role)
+            VALUES (?, ?, 'teacher')
+            ON CONFLICT (email) DO NOTHING
+            """,
+            [(email, h) for email, _, _, h in teachers if h]
+        )
+        users_created = cur.rowcount if cur.rowcount > 0 else 0
+
+        cur.executemany(
+            """
+            INSERT INTO teachers (email, name, subject)
+            VALUES (?, ?, ?)
+            ON CONFLICT (email)
+            DO UPDATE SET name = excluded.name, subject = excluded.subject
+            """,
+            [(email, name, subject) for email, name, subject, _ in teachers]
+        )
+
+        cur.executemany(
+            """
+            UPDATE classes SET subject = ?
+            WHERE name = ?
+              AND subject <> ?
+              AND teacher_id = (SELECT id FROM teachers WHERE email = ?)
+            """,
+            [(subject, name, subject, email) for email, name, subject in classes]
+        )
+
+        cur.executemany(
+            """
+            INSERT INTO classes (teacher_id, name, subject)
+            SELECT t.id, ?, ?
+            FROM teachers t
+            WHERE t.email = ?
+              AND NOT EXISTS (
+                  SELECT 1 FROM classes c
+                  WHERE c.teacher_id = t.id AND c.name = ?
+              )
+            """,
+            [(name, subject, email, name) for email, name, subject in classes]
+        )
+        classes_created = cur.rowcount if cur.rowcount > 0 else 0
+
+        cur.executemany(
+            """
+            INSERT INTO learners (class_id, name)
+            SELECT c.id, ?
+            FROM classes c
+            JOIN teachers t ON c.teacher_id = t.id
+            WHERE t.email = ?
+              AND c.name = ?
+              AND NOT EXISTS (
+                  SELECT 1 FROM learners l
+                  WHERE l.class_id = c.id AND l.name = ?
+              )
+            """,
+            [(learner, email, class_name, learner) for email, class_name, learner in learners]
+        )
+        learners_created = cur.rowcount if cur.rowcount > 0 else 0
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    invalidate_roster_cache()
+    mark_dashboard_stale()
+
+    return {
+        "missing_logins": [],
+        "not_teachers": [],
+        "teachers": len(teachers),
+        "users_created": users_created,
+        "classes_created": classes_created,
+        "learners_created": learners_created,
+    }
+
+
+# -------------------------------------------------
+# TEACHERS (READ-ONLY — PRINCIPAL)
 # -------------------------------------------------
 def get_all_teachers():
     conn = get_db()
@@ -310,12 +1587,84 @@ def get_all_teachers():
     """)
 
     rows = cur.fetchall()
-    conn.close()
     return rows
 
+# Sortable overview columns -> fixed ORDER BY expressions (never user input)
+TEACHER_OVERVIEW_SORTS = {
+    "name": "t.name",
+    "subject": "t.subject",
+    "learners": "learners",
+    "total_observations": "total_observations",
+    "observations_last_7_days": "observations_last_7_days",
+    "observations_last_30_days": "observations_last_30_days",
+    "distinct_skills": "distinct_skills",
+    "last_activity": "last_activity",
+}
+
+
+def get_teacher_overview(sort="name", descending=False):
+    """
+    One row per teacher with their roster size and observation stats,
+    from a single statement: each source is grouped by teacher once
+    (observation figures from the daily rollups) and joined on
+    teacher id, so the cost does not grow per teacher.
+    """
+    order = TEACHER_OVERVIEW_SORTS.get(sort, "t.name")
+    direction = "DESC" if descending else "ASC"
+
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute(f"""
+        WITH roster AS (
+            SELECT c.teacher_id, COUNT(l.id) AS learners
+            FROM classes c
+            LEFT JOIN learners l ON l.class_id = c.id
+            GROUP BY c.teacher_id
+        ),
+        activity AS (
+            SELECT
+                teacher_id,
+                SUM(observations) AS total,
+                SUM(CASE WHEN day >= date('now', '-7 days')
+                         THEN observations ELSE 0 END) AS last_7_days,
+                SUM(CASE WHEN day >= date('now', '-30 days')
+                         THEN observations ELSE 0 END) AS last_30_days,
+                MAX(day) AS last_day
+            FROM daily_observation_rollups
+            GROUP BY teacher_id
+        ),
+        skills AS (
+            SELECT teacher_id, COUNT(DISTINCT skill) AS distinct_skills
+            FROM daily_observation_learner_skills
+            GROUP BY teacher_id
+        )
+        SELECT
+            t.id,
+            t.name,
+            t.email,
+            t.subject,
+            COALESCE(roster.learners, 0) AS learners,
+            COALESCE(activity.total, 0) AS total_observations,
+            COALESCE(activity.last_7_days, 0) AS observations_last_7_days,
+            COALESCE(activity.last_30_days, 0) AS observations_last_30_days,
+            COALESCE(skills.distinct_skills, 0) AS distinct_skills,
+            activity.last_day AS last_activity
+        FROM teachers t
+        LEFT JOIN roster ON roster.teacher_id = t.id
+        LEFT JOIN activity ON activity.teacher_id = t.id
+        LEFT JOIN skills ON skills.teacher_id = t.id
+        ORDER BY {order} {direction}, t.name
+    """)
+
+    rows = cur.fetchall()
+    return rows
+
+
 # -------------------------------------------------
 # PRINCIPAL — READ-ONLY HELPERS
 # -------------------------------------------------
+@roster_cached("teacher")
 def get_teacher_by_id(teacher_id):
     conn = get_db()
     cur = conn.cursor()
@@ -327,7 +1676,6 @@ def get_teacher_by_id(teacher_id):
     """, (teacher_id,))
 
     row = cur.fetchone()
-    conn.close()
     return row
 
 def get_principal_teacher_summary(teacher_id):
@@ -343,24 +1691,19 @@ def get_principal_teacher_summary(teacher_id):
     """, (teacher_id,))
     total_learners = cur.fetchone()["total_learners"]
 
-    # Total observations (all-time)
-    cur.execute("""
-        SELECT COUNT(*) AS total_observations
-        FROM observations
-        WHERE teacher_id = ?
-    """, (teacher_id,))
-    total_observations = cur.fetchone()["total_observations"]
-
-    # Observations in last 7 days
+    # Observations all-time and in the last 7 days (from daily rollups)
     cur.execute("""
-        SELECT COUNT(*) AS observations_last_7_days
-        FROM observations
+        SELECT
+            SUM(observations) AS total_observations,
+            SUM(CASE WHEN day >= date('now', '-7 days')
+                     THEN observations END) AS observations_last_7_days
+        FROM daily_observation_rollups
         WHERE teacher_id = ?
-          AND date(created_at) >= date('now', '-7 days')
     """, (teacher_id,))
-    last_7_days = cur.fetchone()["observations_last_7_days"]
+    row = cur.fetchone()
+    total_observations = row["total_observations"]
+    last_7_days = row["observations_last_7_days"]
 
-    conn.close()
     return {
         "total_learners": total_learners or 0,
         "total_observations": total_observations or 0,
@@ -381,14 +1724,10 @@ def get_classes_for_teacher_readonly(teacher_id):
     """, (teacher_id,))
 
     rows = cur.fetchall()
-    conn.close()
     return rows
 
 
-def get_observations_for_teacher_readonly(teacher_id, limit=100):
-    conn = get_db()
-    cur = conn.cursor()
-
+def _execute_observations_for_teacher_readonly(cur, teacher_id, limit):
     cur.execute("""
         SELECT
             observations.created_at,
@@ -402,14 +1741,26 @@ def get_observations_for_teacher_readonly(teacher_id, limit=100):
         JOIN learners ON observations.learner_id = learners.id
         JOIN classes ON learners.class_id = classes.id
         WHERE observations.teacher_id = ?
+          AND observations.is_deleted = 0
         ORDER BY observations.created_at DESC
         LIMIT ?
     """, (teacher_id, limit))
+    return cur
+
+
+def get_observations_for_teacher_readonly(teacher_id, limit=100):
+    conn = get_db()
+    cur = _execute_observations_for_teacher_readonly(conn.cursor(), teacher_id, limit)
 
     rows = cur.fetchall()
-    conn.close()
     return rows
 
+
+def stream_observations_for_teacher_readonly(teacher_id, limit=100):
+    conn = get_db()
+    cur = _execute_observations_for_teacher_readonly(conn.cursor(), teacher_id, limit)
+    return RowStream(cur)
+
 # -------------------------------------------------
 # OBSERVATIONS — EDIT HELPERS (PHASE 6B)
 # -------------------------------------------------
@@ -436,13 +1787,24 @@ def get_observation_by_id(observation_id, teacher_id):
     """, (observation_id, teacher_id))
 
     row = cur.fetchone()
-    conn.close()
     return row
 
 
 def update_observation(observation_id, teacher_id, activity, skill, level, note):
-    conn = get_db()
-    cur = conn.cursor()
+    return _write(
+        _update_observation,
+        observation_id, teacher_id, activity, skill, level, note
+    )
+
+
+def _update_observation(cur, observation_id, teacher_id, activity, skill, level, note):
+    _apply_rollup_delta(cur, observation_id, teacher_id, -1)
+
+    cur.execute(
+        "SELECT learner_id, skill FROM observations WHERE id = ? AND teacher_id = ? AND is_deleted = 0",
+        (observation_id, teacher_id)
+    )
+    old = cur.fetchone()
 
     cur.execute("""
         UPDATE observations
@@ -455,38 +1817,21 @@ def update_observation(observation_id, teacher_id, activity, skill, level, note)
           AND is_deleted = 0
     """, (activity, skill, level, note, observation_id, teacher_id))
 
-    conn.commit()
-    conn.close()
+    _apply_rollup_delta(cur, observation_id, teacher_id, +1)
+
+    if old:
+        # the skill may have changed: refresh both the old and new pair
+        _refresh_learner_skill_state(cur, [
+            (old["learner_id"], old["skill"]),
+            (old["learner_id"], skill),
+        ])
 
 
 
 # -------------------------------------------------
 # CLASSES
 # -------------------------------------------------
-def seed_default_classes(teacher_id):
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute(
-        "SELECT COUNT(*) FROM classes WHERE teacher_id = ?",
-        (teacher_id,)
-    )
-    count = cur.fetchone()[0]
-
-    if count == 0:
-        cur.executemany(
-            "INSERT INTO classes (teacher_id, name, subject) VALUES (?, ?, ?)",
-            [
-                (teacher_id, "Grade 10 A", "Mathematics"),
-                (teacher_id, "Grade 10 B", "Mathematics"),
-                (teacher_id, "Grade 11 Science", "Mathematics"),
-            ]
-        )
-
-    conn.commit()
-    conn.close()
-
-
+@roster_cached("classes_for_teacher")
 def get_classes_for_teacher(teacher_id):
     conn = get_db()
     cur = conn.cursor()
@@ -497,39 +1842,21 @@ def get_classes_for_teacher(teacher_id):
     )
 
     rows = cur.fetchall()
-    conn.close()
     return rows
 
 
+@roster_cached("class_ids_for_teacher")
+def get_class_ids_for_teacher(teacher_id):
+    """
+    Frozen set of the teacher's class ids, for O(1) ownership checks.
+    """
+    return frozenset(c["id"] for c in get_classes_for_teacher(teacher_id))
+
+
 # -------------------------------------------------
 # LEARNERS (PHASE B2)
 # -------------------------------------------------
-def seed_default_learners(class_id):
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute(
-        "SELECT COUNT(*) FROM learners WHERE class_id = ?",
-        (class_id,)
-    )
-    count = cur.fetchone()[0]
-
-    if count == 0:
-        cur.executemany(
-            "INSERT INTO learners (class_id, name) VALUES (?, ?)",
-            [
-                (class_id, "Faith Achieng"),
-                (class_id, "Brian Kamau"),
-                (class_id, "Mark Otieno"),
-                (class_id, "Sarah Wanjiku"),
-                (class_id, "John Mwangi"),
-            ]
-        )
-
-    conn.commit()
-    conn.close()
-
-
+@roster_cached("learners_for_class")
 def get_learners_for_class(class_id):
     conn = get_db()
     cur = conn.cursor()
@@ -540,7 +1867,6 @@ def get_learners_for_class(class_id):
     )
 
     rows = cur.fetchall()
-    conn.close()
     return rows
 
 # -------------------------------------------------
@@ -564,49 +1890,414 @@ def get_classes_with_learner_counts_for_teacher(teacher_id):
     """, (teacher_id,))
 
     rows = cur.fetchall()
-    conn.close()
     return rows
 def get_principal_dashboard_summary():
+    """
+    Every dashboard figure in one statement. Counts of the roster
+    tables come from their smallest covering index; observation totals
+    come from the daily rollups, never the raw table. The school data
+    version is read in the same statement, so it always matches the
+    figures (the page's ETag is built from it).
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute("""
+        WITH recent AS (
+            SELECT teacher_id, SUM(observations) AS total
+            FROM daily_observation_rollups
+            WHERE day >= date('now', '-7 days')
+            GROUP BY teacher_id
+        ),
+        top_teacher AS (
+            SELECT t.name, recent.total
+            FROM recent
+            JOIN teachers t ON recent.teacher_id = t.id
+            ORDER BY recent.total DESC
+            LIMIT 1
+        )
+        SELECT
+            (SELECT COUNT(*) FROM teachers) AS total_teachers,
+            (SELECT COUNT(*) FROM classes) AS total_classes,
+            (SELECT COUNT(*) FROM learners) AS total_learners,
+            (SELECT COALESCE(SUM(observations), 0)
+             FROM daily_observation_rollups) AS total_observations,
+            (SELECT COALESCE(SUM(total), 0) FROM recent) AS observations_last_7_days,
+            (SELECT name FROM top_teacher) AS most_active_teacher,
+            (SELECT total FROM top_teacher) AS most_active_teacher_observations,
+            v.version AS data_version,
+            v.updated_at AS data_updated_at,
+            datetime('now') AS taken_at
+        FROM (SELECT 1)
+        LEFT JOIN data_versions v ON v.scope = 'school' AND v.scope_id = 0
+    """)
+
+    return dict(cur.fetchone())
+
+
+# -------------------------------------------------
+# PRINCIPAL DASHBOARD SNAPSHOT (STALE-WHILE-REVALIDATE)
+# -------------------------------------------------
+class DashboardSnapshot:
+    """
+    Holds the last computed principal dashboard so page views are a
+    plain read. A background thread recomputes it every `interval`
+    seconds, or sooner once a write marks it stale; bursts of writes
+    are coalesced to at most one refresh per `min_gap` seconds.
+
+    Until the first refresh lands the caller computes it inline.
+    """
+
+    def __init__(self, compute, interval=DASHBOARD_REFRESH_SECONDS,
+                 min_gap=DASHBOARD_MIN_REFRESH_GAP):
+        self.compute = compute
+        self.interval = interval
+        self.min_gap = min_gap
+        self._value = None
+        self._stale = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def get(self):
+        self._ensure_started()
+        value = self._value
+        if value is None:
+            value = self.refresh()
+        return value
+
+    def refresh(self):
+        value = self.compute()
+        self._value = value
+        return value
+
+    def mark_stale(self):
+        self._stale.set()
+
+    def reset(self):
+        self._value = None
+
+    def _ensure_started(self):
+        # same fork rule as the group-commit writer
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._stale = threading.Event()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="cbc-dashboard-snapshot",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._stale.wait(self.interval)
+            self._stale.clear()
+            try:
+                self.refresh()
+            except sqlite3.Error:
+                # keep serving the previous snapshot; retry next round
+                pass
+            time.sleep(self.min_gap)
+
+
+_dashboard_snapshot = DashboardSnapshot(get_principal_dashboard_summary)
+
+
+def get_principal_dashboard_snapshot():
+    return _dashboard_snapshot.get()
+
+
+def refresh_dashboard_snapshot():
+    return _dashboard_snapshot.refresh()
+
+
+def mark_dashboard_stale():
+    _dashboard_snapshot.mark_stale()
+
+
+# -------------------------------------------------
+# DAILY ROLLUPS (SUMMARY READ MODEL)
+# -------------------------------------------------
+def _apply_rollup_delta(cur, observation_id, teacher_id, delta):
+    """
+    Adds delta (+1 / -1) to the rollup rows of one live observation.
+    Must run inside the caller's write transaction: before the row is
+    changed for -1, after it is written for +1.
+    """
+    _shift_rollups(
+        cur,
+        "id = ? AND teacher_id = ?",
+        (observation_id, teacher_id),
+        delta
+    )
+
+
+def _shift_rollups(cur, where, params, delta):
+    """
+    Set-based core of the rollup maintenance: adds delta for every
+    live observation matching `where` (a fixed SQL fragment, never
+    user input), grouped so a bulk insert costs one statement per table.
+    """
+    cur.execute(f"""
+        INSERT INTO daily_observation_rollups (teacher_id, day, observations)
+        SELECT teacher_id, date(created_at), COUNT(*) * ?
+        FROM observations
+        WHERE {where} AND is_deleted = 0
+        GROUP BY teacher_id, date(created_at)
+        ON CONFLICT (teacher_id, day)
+        DO UPDATE SET observations = observations + excluded.observations
+    """, (delta, *params))
+
+    cur.execute(f"""
+        INSERT INTO daily_observation_learner_skills
+            (teacher_id, day, learner_id, skill, observations)
+        SELECT teacher_id, date(created_at), learner_id, skill, COUNT(*) * ?
+        FROM observations
+        WHERE {where} AND is_deleted = 0
+        GROUP BY teacher_id, date(created_at), learner_id, skill
+        ON CONFLICT (teacher_id, day, learner_id, skill)
+        DO UPDATE SET observations = observations + excluded.observations
+    """, (delta, *params))
+
+    if delta < 0:
+        # drop emptied buckets so distinct counts stay exact
+        cur.execute(f"""
+            DELETE FROM daily_observation_learner_skills
+            WHERE observations <= 0
+              AND (teacher_id, day, learner_id, skill) IN (
+                  SELECT teacher_id, date(created_at), learner_id, skill
+                  FROM observations
+                  WHERE {where}
+              )
+        """, params)
+
+        cur.execute(f"""
+            DELETE FROM daily_observation_rollups
+            WHERE observations <= 0
+              AND (teacher_id, day) IN (
+                  SELECT teacher_id, date(created_at)
+                  FROM observations
+                  WHERE {where}
+              )
+        """, params)
+
+
+def _rebuild_rollups(cur):
+    cur.execute("DELETE FROM daily_observation_rollups")
+    cur.execute("DELETE FROM daily_observation_learner_skills")
+
+    cur.execute("""
+        INSERT INTO daily_observation_rollups (teacher_id, day, observations)
+        SELECT teacher_id, date(created_at), COUNT(*)
+        FROM observations
+        WHERE is_deleted = 0
+        GROUP BY teacher_id, date(created_at)
+    """)
+
+    cur.execute("""
+        INSERT INTO daily_observation_learner_skills
+            (teacher_id, day, learner_id, skill, observations)
+        SELECT teacher_id, date(created_at), learner_id, skill, COUNT(*)
+        FROM observations
+        WHERE is_deleted = 0
+        GROUP BY teacher_id, date(created_at), learner_id, skill
+    """)
+
+
+def _refresh_learner_skill_state(cur, pairs):
+    """
+    Recomputes learner_skill_state for the given (learner_id, skill)
+    pairs from that learner's live observations (an index range, not a
+    table scan). Pairs left without live observations are removed.
+    Must run inside the caller's write transaction, after the change.
+    """
+    keys = [
+        {"learner_id": learner_id, "skill": skill}
+        for learner_id, skill in set(pairs)
+    ]
+    if not keys:
+        return
+
+    cur.executemany("""
+        INSERT INTO learner_skill_state
+            (learner_id, skill, latest_level, first_observed_at,
+             last_observed_at, observations)
+        SELECT
+            learner_id,
+            skill,
+            (SELECT level FROM observations
+             WHERE learner_id = :learner_id AND skill = :skill AND is_deleted = 0
+             ORDER BY created_at DESC, id DESC
+             LIMIT 1),
+            MIN(created_at),
+            MAX(created_at),
+            COUNT(*)
+        FROM observations
+        WHERE learner_id = :learner_id AND skill = :skill AND is_deleted = 0
+        GROUP BY learner_id, skill
+        ON CONFLICT (learner_id, skill)
+        DO UPDATE SET
+            latest_level = excluded.latest_level,
+            first_observed_at = excluded.first_observed_at,
+            last_observed_at = excluded.last_observed_at,
+            observations = excluded.observations
+    """, keys)
+
+    cur.executemany("""
+        DELETE FROM learner_skill_state
+        WHERE learner_id = :learner_id
+          AND skill = :skill
+          AND NOT EXISTS (
+              SELECT 1 FROM observations
+              WHERE learner_id = :learner_id AND skill = :skill AND is_deleted = 0
+          )
+    """, keys)
+
+
+# one row per (learner, skill): the latest observation's level
+# (created_at, then id, breaks ties) plus the whole group's aggregates
+_LEARNER_SKILL_STATE_SQL = """
+    SELECT learner_id, skill, latest_level, first_observed_at,
+           last_observed_at, observations
+    FROM (
+        SELECT
+            learner_id,
+            skill,
+            level AS latest_level,
+            MIN(created_at) OVER pair AS first_observed_at,
+            MAX(created_at) OVER pair AS last_observed_at,
+            COUNT(*) OVER pair AS observations,
+            ROW_NUMBER() OVER (
+                PARTITION BY learner_id, skill
+                ORDER BY created_at DESC, id DESC
+            ) AS position
+        FROM observations
+        WHERE is_deleted = 0
+        WINDOW pair AS (PARTITION BY learner_id, skill)
+    )
+    WHERE position = 1
+"""
+
+
+def _rebuild_learner_skill_state(cur):
+    cur.execute("DELETE FROM learner_skill_state")
+    cur.execute(f"""
+        INSERT INTO learner_skill_state
+            (learner_id, skill, latest_level, first_observed_at,
+             last_observed_at, observations)
+        {_LEARNER_SKILL_STATE_SQL}
+    """)
+
+
+def rebuild_rollups():
+    """
+    Backfills both rollup tables and learner_skill_state from raw
+    observations in one transaction. Safe to rerun.
+    """
     conn = get_db()
     cur = conn.cursor()
 
-    cur.execute("SELECT COUNT(*) FROM teachers")
-    total_teachers = cur.fetchone()[0]
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        _rebuild_rollups(cur)
+        _rebuild_learner_skill_state(cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    mark_dashboard_stale()
 
-    cur.execute("SELECT COUNT(*) FROM learners")
-    total_learners = cur.fetchone()[0]
 
-    cur.execute("SELECT COUNT(*) FROM observations")
-    total_observations = cur.fetchone()[0]
+def check_rollups():
+    """
+    Compares the rollups with counts recomputed from raw observations.
+    Returns the differing rows as (table, key, expected, actual);
+    an empty list means the rollups are consistent.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+    mismatches = []
 
     cur.execute("""
-        SELECT COUNT(*) FROM observations
-        WHERE created_at >= datetime('now', '-7 days')
+        WITH raw AS (
+            SELECT teacher_id, date(created_at) AS day, COUNT(*) AS n
+            FROM observations
+            WHERE is_deleted = 0
+            GROUP BY teacher_id, date(created_at)
+        )
+        SELECT raw.teacher_id, raw.day, raw.n, r.observations
+        FROM raw
+        LEFT JOIN daily_observation_rollups r
+          ON r.teacher_id = raw.teacher_id AND r.day = raw.day
+        WHERE r.observations IS NOT raw.n
+        UNION ALL
+        SELECT r.teacher_id, r.day, NULL, r.observations
+        FROM daily_observation_rollups r
+        WHERE NOT EXISTS (SELECT 1 FROM raw
+                          WHERE raw.teacher_id = r.teacher_id
+                            AND raw.day = r.day)
     """)
-    observations_last_7_days = cur.fetchone()[0]
+    for row in cur.fetchall():
+        mismatches.append((
+            "daily_observation_rollups",
+            (row[0], row[1]),
+            row[2] or 0,
+            row[3] or 0,
+        ))
 
     cur.execute("""
-        SELECT t.name, COUNT(o.id) AS total
-        FROM observations o
-        JOIN teachers t ON o.teacher_id = t.id
-        WHERE o.created_at >= datetime('now', '-7 days')
-        GROUP BY t.id
-        ORDER BY total DESC
-        LIMIT 1
+        WITH raw AS (
+            SELECT teacher_id, date(created_at) AS day, learner_id, skill,
+                   COUNT(*) AS n
+            FROM observations
+            WHERE is_deleted = 0
+            GROUP BY teacher_id, date(created_at), learner_id, skill
+        )
+        SELECT raw.teacher_id, raw.day, raw.learner_id, raw.skill,
+               raw.n, r.observations
+        FROM raw
+        LEFT JOIN daily_observation_learner_skills r
+          ON r.teacher_id = raw.teacher_id AND r.day = raw.day
+         AND r.learner_id = raw.learner_id AND r.skill = raw.skill
+        WHERE r.observations IS NOT raw.n
+        UNION ALL
+        SELECT r.teacher_id, r.day, r.learner_id, r.skill, NULL, r.observations
+        FROM daily_observation_learner_skills r
+        WHERE NOT EXISTS (SELECT 1 FROM raw
+                          WHERE raw.teacher_id = r.teacher_id
+                            AND raw.day = r.day
+                            AND raw.learner_id = r.learner_id
+                            AND raw.skill = r.skill)
     """)
-    most_active_teacher = cur.fetchone()
+    for row in cur.fetchall():
+        mismatches.append((
+            "daily_observation_learner_skills",
+            (row[0], row[1], row[2], row[3]),
+            row[4] or 0,
+            row[5] or 0,
+        ))
 
-    conn.close()
+    cur.execute("""
+        SELECT learner_id, skill, latest_level, first_observed_at,
+               last_observed_at, observations
+        FROM learner_skill_state
+    """)
+    stored = {(row["learner_id"], row["skill"]): tuple(row)[2:] for row in cur.fetchall()}
 
-    return {
-        "total_teachers": total_teachers,
-        "total_learners": total_learners,
-        "total_observations": total_observations,
-        "observations_last_7_days": observations_last_7_days,
-        "most_active_teacher": most_active_teacher
-    }
+    cur.execute(_LEARNER_SKILL_STATE_SQL)
+    expected = {(row["learner_id"], row["skill"]): tuple(row)[2:] for row in cur.fetchall()}
 
+    for key in sorted(set(stored) | set(expected), key=str):
+        if stored.get(key) != expected.get(key):
+            mismatches.append(("learner_skill_state", key, expected.get(key), stored.get(key)))
 
+    return mismatches
 
 
 # -------------------------------------------------
@@ -621,9 +2312,13 @@ def save_observation(
     level,
     note
 ):
-    conn = get_db()
-    cur = conn.cursor()
+    return _write(
+        _insert_observation,
+        teacher_id, class_name, learner_id, activity, skill, level, note
+    )
 
+
+def _insert_observation(cur, teacher_id, class_name, learner_id, activity, skill, level, note):
     cur.execute(
         """
         INSERT INTO observations
@@ -632,9 +2327,142 @@ def save_observation(
         """,
         (teacher_id, class_name, learner_id, activity, skill, level, note)
     )
+    observation_id = cur.lastrowid
 
-    conn.commit()
-    conn.close()
+    _apply_rollup_delta(cur, observation_id, teacher_id, +1)
+    _refresh_learner_skill_state(cur, [(learner_id, skill)])
+
+    return observation_id
+
+
+def save_observations_bulk(teacher_id, class_name, activity, skill, entries):
+    """
+    Records one activity/skill for many learners at once.
+    entries: [(learner_id, level, note), ...] — the caller has already
+    checked ownership. One executemany, one commit; with group commit
+    on, merged into the writer's next group.
+    """
+    return _write(_insert_observations_bulk, teacher_id, class_name, activity, skill, entries)
+
+
+def _insert_observations_bulk(cur, teacher_id, class_name, activity, skill, entries):
+    # _write holds the write lock, so the id watermark below is ours alone
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM observations")
+    last_id = cur.fetchone()[0]
+
+    cur.executemany(
+        """
+        INSERT INTO observations
+        (teacher_id, class_name, learner_id, activity, skill, level, note)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (teacher_id, class_name, learner_id, activity, skill, level, note)
+            for learner_id, level, note in entries
+        ]
+    )
+
+    _shift_rollups(cur, "id > ? AND teacher_id = ?", (last_id, teacher_id), +1)
+    _refresh_learner_skill_state(cur, [(learner_id, skill) for learner_id, _, _ in entries])
+
+    return len(entries)
+
+
+@roster_cached("learners_for_teacher")
+def get_learners_for_teacher(teacher_id):
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT
+            learners.id,
+            learners.name,
+            classes.id AS class_id,
+            classes.name AS class_name
+        FROM classes
+        JOIN learners ON learners.class_id = classes.id
+        WHERE classes.teacher_id = ?
+        ORDER BY classes.name, learners.name
+    """, (teacher_id,))
+
+    return cur.fetchall()
+
+
+def sync_observations(teacher_id, items):
+    """
+    Inserts a batch of client-queued observations in one transaction
+    (with group commit on, as one operation of the writer's group).
+    items: dicts with client_uuid, learner_id, class_name, activity,
+    skill, level, note and observed_at (or None), already validated.
+
+    The unique client_uuid index makes retries harmless: a row that is
+    already stored is left alone. Returns one (status, id) per item, in
+    order, with status "created", "duplicate" or "conflict" (uuid owned
+    by another teacher).
+    """
+    return _write(_sync_observations, teacher_id, items)
+
+
+def _sync_observations(cur, teacher_id, items):
+    # _write holds the write lock, so the id watermark below is ours alone
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM observations")
+    last_id = cur.fetchone()[0]
+
+    cur.executemany(
+        """
+        INSERT INTO observations
+        (teacher_id, class_name, learner_id, activity, skill, level,
+         note, client_uuid, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        ON CONFLICT (client_uuid) WHERE client_uuid IS NOT NULL
+        DO NOTHING
+        """,
+        [
+            (
+                teacher_id,
+                item["class_name"],
+                item["learner_id"],
+                item["activity"],
+                item["skill"],
+                item["level"],
+                item["note"],
+                item["client_uuid"],
+                item["observed_at"],
+            )
+            for item in items
+        ]
+    )
+
+    _shift_rollups(cur, "id > ? AND teacher_id = ?", (last_id, teacher_id), +1)
+
+    cur.execute(
+        "SELECT DISTINCT learner_id, skill FROM observations WHERE id > ? AND teacher_id = ?",
+        (last_id, teacher_id)
+    )
+    _refresh_learner_skill_state(cur, [tuple(row) for row in cur.fetchall()])
+
+    uuids = [item["client_uuid"] for item in items]
+    placeholders = ", ".join("?" for _ in uuids)
+    cur.execute(f"""
+        SELECT id, teacher_id, client_uuid
+        FROM observations
+        WHERE client_uuid IN ({placeholders})
+    """, uuids)
+    stored = {row["client_uuid"]: row for row in cur.fetchall()}
+
+    results = []
+    seen = set()
+    for client_uuid in uuids:
+        row = stored[client_uuid]
+        if row["teacher_id"] != teacher_id:
+            results.append(("conflict", None))
+        elif row["id"] > last_id and client_uuid not in seen:
+            results.append(("created", row["id"]))
+        else:
+            results.append(("duplicate", row["id"]))
+        seen.add(client_uuid)
+
+    return results
 
 
 def get_recent_observations(teacher_id, limit=5):
@@ -654,52 +2482,374 @@ def get_recent_observations(teacher_id, limit=5):
         JOIN learners ON observations.learner_id = learners.id
         JOIN classes ON learners.class_id = classes.id
         WHERE observations.teacher_id = ?
+          AND observations.is_deleted = 0
         ORDER BY observations.created_at DESC
         LIMIT ?
     """, (teacher_id, limit))
 
     rows = cur.fetchall()
-    conn.close()
     return rows
 
-def get_all_observations(teacher_id):
-    conn = get_db()
-    cur = conn.cursor()
+def encode_cursor(row):
+    return f"{row['created_at']}|{row['id']}"
 
-    cur.execute("""
-        SELECT
-            observations.id AS id,
-            observations.created_at,
+
+def decode_cursor(cursor):
+    """
+    Parses a page cursor back into (created_at, id).
+    Raises ValueError for anything malformed.
+    """
+    created_at, _, observation_id = cursor.rpartition("|")
+    if not created_at:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return created_at, int(observation_id)
+
+
+def _execute_observations_page(cur, teacher_id, before, after, limit):
+    params = [teacher_id]
+    keyset = ""
+    order = "DESC"
+
+    if before:
+        keyset = "AND (observations.created_at, observations.id) < (?, ?)"
+        params.extend(decode_cursor(before))
+    elif after:
+        keyset = "AND (observations.created_at, observations.id) > (?, ?)"
+        params.extend(decode_cursor(after))
+        order = "ASC"
+
+    # one extra row tells us whether another page exists
+    params.append(limit + 1)
+
+    cur.execute(f"""
+        SELECT
+            observations.id AS id,
+            observations.created_at,
             classes.name AS class_name,
             learners.name AS learner_name,
+            observations.learner_id,
             observations.activity,
             observations.skill,
-            observations.level
+            observations.level,
+            observations.note
         FROM observations
         JOIN learners ON observations.learner_id = learners.id
         JOIN classes ON learners.class_id = classes.id
         WHERE observations.teacher_id = ?
           AND observations.is_deleted = 0
-        ORDER BY observations.created_at DESC
-    """, (teacher_id,))
+          {keyset}
+        ORDER BY observations.created_at {order}, observations.id {order}
+        LIMIT ?
+    """, params)
+    return cur
+
+
+def get_observations_page(
+    teacher_id,
+    before=None,
+    after=None,
+    limit=OBSERVATIONS_PAGE_SIZE
+):
+    """
+    One page of a teacher's live observations, newest first.
+
+    Keyset pagination on (created_at, id): `before` walks to older
+    rows, `after` to newer ones, so every page costs the same however
+    much history exists. Returns the rows plus the cursors for the
+    older / newer pages (None when there is nothing further).
+    """
+    conn = get_db()
+    cur = _execute_observations_page(conn.cursor(), teacher_id, before, after, limit)
 
     rows = cur.fetchall()
-    conn.close()
-    return rows
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
-def soft_delete_observation(observation_id, teacher_id):
+    if after:
+        rows.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = bool(before), has_more
+
+    return {
+        "observations": rows,
+        "newer": encode_cursor(rows[0]) if rows and has_newer else None,
+        "older": encode_cursor(rows[-1]) if rows and has_older else None,
+    }
+
+
+# -------------------------------------------------
+# STREAMED ROWS (FOR STREAMED TEMPLATES)
+# -------------------------------------------------
+class RowStream:
+    """
+    The rows of an executed cursor, read one at a time as a streamed
+    template iterates them, so a page never holds its rows in a list.
+
+    With limit, the query asks for limit + 1 rows; the extra one is
+    not yielded and only sets has_more. Truthiness peeks at the first
+    row, so "{% if rows %}" works before the loop. It can be iterated
+    once.
+    """
+
+    def __init__(self, cur, limit=None):
+        self._cur = cur
+        self._rows = iter(cur)
+        self._limit = limit
+        self._peeked = []
+        self.first = None
+        self.last = None
+        self.count = 0
+        self.has_more = False
+        self.exhausted = False
+
+    def __bool__(self):
+        if self.count or self._peeked:
+            return True
+        if self.exhausted:
+            return False
+        try:
+            self._peeked.append(next(self._rows))
+        except StopIteration:
+            self._close()
+            return False
+        return True
+
+    def __iter__(self):
+        while not self.exhausted:
+            try:
+                row = self._peeked.pop() if self._peeked else next(self._rows)
+            except StopIteration:
+                self._close()
+                break
+
+            if self._limit is not None and self.count == self._limit:
+                self.has_more = True
+                self._close()
+                break
+
+            if not self.count:
+                self.first = row
+            self.last = row
+            self.count += 1
+            yield row
+
+    def _close(self):
+        self.exhausted = True
+        self._cur.close()
+
+
+class StreamedObservationPage:
+    """
+    A keyset page whose rows stream. The newer / older cursors depend
+    on the first and last rows, so they are only right once the rows
+    have been iterated (the pager sits below the list).
+    """
+
+    def __init__(self, rows, before):
+        self.observations = rows
+        self._before = before
+
+    @property
+    def newer(self):
+        first = self.observations.first
+        return encode_cursor(first) if first is not None and self._before else None
+
+    @property
+    def older(self):
+        last = self.observations.last
+        return encode_cursor(last) if last is not None and self.observations.has_more else None
+
+
+def stream_observations_page(
+    teacher_id,
+    before=None,
+    after=None,
+    limit=OBSERVATIONS_PAGE_SIZE
+):
+    """
+    get_observations_page() for streamed templates: rows come straight
+    off the cursor. Pages walking to newer rows are read in ascending
+    order and must be reversed, so those are read into a list (the
+    same attributes, no streaming).
+    """
+    if after:
+        return SimpleNamespace(**get_observations_page(teacher_id, after=after, limit=limit))
+
+    conn = get_db()
+    cur = _execute_observations_page(conn.cursor(), teacher_id, before, None, limit)
+    return StreamedObservationPage(RowStream(cur, limit), before)
+
+
+def iter_observation_batches(teacher_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yields live observations (oldest first) in lists of batch_size,
+    read from one cursor with fetchmany so memory stays flat however
+    large the history is. teacher_id=None exports the whole school.
+    """
     conn = get_db()
     cur = conn.cursor()
 
+    if teacher_id is None:
+        scope = ""
+        params = ()
+    else:
+        scope = "AND observations.teacher_id = ?"
+        params = (teacher_id,)
+
+    cur.execute(f"""
+        SELECT
+            observations.id,
+            observations.created_at,
+            teachers.name AS teacher_name,
+            classes.name AS class_name,
+            learners.name AS learner_name,
+            observations.activity,
+            observations.skill,
+            observations.level,
+            observations.note
+        FROM observations
+        JOIN learners ON observations.learner_id = learners.id
+        JOIN classes ON learners.class_id = classes.id
+        JOIN teachers ON observations.teacher_id = teachers.id
+        WHERE observations.is_deleted = 0
+          {scope}
+        ORDER BY observations.created_at, observations.id
+    """, params)
+
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+
+def iter_analytics_batches(since_month=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yields the denormalised observation dataset (observation + learner
+    + class + teacher) in batches, ordered by time so each month's rows
+    arrive together. since_month ('YYYY-MM') limits it to that month
+    onwards, which is what incremental exports need.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    if since_month is None:
+        window = ""
+        params = ()
+    else:
+        window = "AND observations.created_at >= ?"
+        params = (f"{since_month}-01",)
+
+    cur.execute(f"""
+        SELECT
+            observations.id AS observation_id,
+            observations.created_at,
+            strftime('%Y-%m', observations.created_at) AS month,
+            teachers.id AS teacher_id,
+            teachers.name AS teacher_name,
+            classes.id AS class_id,
+            classes.name AS class_name,
+            classes.subject,
+            learners.id AS learner_id,
+            learners.name AS learner_name,
+            observations.activity,
+            observations.skill,
+            observations.level,
+            observations.note
+        FROM observations
+        JOIN learners ON observations.learner_id = learners.id
+        JOIN classes ON learners.class_id = classes.id
+        JOIN teachers ON observations.teacher_id = teachers.id
+        WHERE observations.is_deleted = 0
+          {window}
+        ORDER BY observations.created_at, observations.id
+    """, params)
+
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+
+def iter_report_card_rows(class_id=None, teacher_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yields every learner in scope with their live observations, one row
+    per observation (or one bare row for a learner with none), ordered
+    so each learner's rows are contiguous. No scope means the school.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    if class_id is not None:
+        scope = "WHERE classes.id = ?"
+        params = (class_id,)
+    elif teacher_id is not None:
+        scope = "WHERE classes.teacher_id = ?"
+        params = (teacher_id,)
+    else:
+        scope = ""
+        params = ()
+
+    cur.execute(f"""
+        SELECT
+            learners.id AS learner_id,
+            learners.name AS learner_name,
+            classes.name AS class_name,
+            classes.subject,
+            teachers.name AS teacher_name,
+            observations.created_at,
+            observations.activity,
+            observations.skill,
+            observations.level,
+            observations.note
+        FROM learners
+        JOIN classes ON learners.class_id = classes.id
+        JOIN teachers ON classes.teacher_id = teachers.id
+        LEFT JOIN observations
+          ON observations.learner_id = learners.id
+         AND observations.is_deleted = 0
+        {scope}
+        ORDER BY learners.id, observations.created_at, observations.id
+    """, params)
+
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+
+def soft_delete_observation(observation_id, teacher_id):
+    return _write(_soft_delete_observation, observation_id, teacher_id)
+
+
+def _soft_delete_observation(cur, observation_id, teacher_id):
+    _apply_rollup_delta(cur, observation_id, teacher_id, -1)
+
     cur.execute("""
         UPDATE observations
         SET is_deleted = 1
         WHERE id = ?
           AND teacher_id = ?
+          AND is_deleted = 0
     """, (observation_id, teacher_id))
 
-    conn.commit()
-    conn.close()
+    cur.execute(
+        "SELECT learner_id, skill FROM observations WHERE id = ? AND teacher_id = ?",
+        (observation_id, teacher_id)
+    )
+    _refresh_learner_skill_state(cur, [tuple(row) for row in cur.fetchall()])
 
 
 
@@ -709,16 +2859,15 @@ def get_weekly_summary(teacher_id):
 
     cur.execute("""
         SELECT
-            COUNT(*) as total_observations,
+            COALESCE(SUM(observations), 0) as total_observations,
             COUNT(DISTINCT learner_id) as learners_count,
             COUNT(DISTINCT skill) as skills_count
-        FROM observations
+        FROM daily_observation_learner_skills
         WHERE teacher_id = ?
-          AND date(created_at) >= date('now', '-7 days')
+          AND day >= date('now', '-7 days')
     """, (teacher_id,))
 
     row = cur.fetchone()
-    conn.close()
 
     return {
         "total": row["total_observations"],
@@ -726,6 +2875,7 @@ def get_weekly_summary(teacher_id):
         "skills": row["skills_count"]
     }
 
+@roster_cached("learner_with_class")
 def get_learner_with_class(learner_id):
     conn = get_db()
     cur = conn.cursor()
@@ -746,13 +2896,518 @@ def get_learner_with_class(learner_id):
     )
 
     row = cur.fetchone()
-    conn.close()
     return row
 
 
+# -------------------------------------------------
+# LEARNER PROGRESS (READ FROM learner_skill_state)
+# -------------------------------------------------
+def get_learner_skill_states(learner_id):
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT skill, latest_level, first_observed_at, last_observed_at, observations
+        FROM learner_skill_state
+        WHERE learner_id = ?
+        ORDER BY skill
+    """, (learner_id,))
+
+    rows = cur.fetchall()
+    return rows
+
+
+def get_learner_timeline(learner_id):
+    """
+    The learner's live observations, oldest first, straight off the
+    (learner_id, created_at) index.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT id, created_at, activity, skill, level, note
+        FROM observations
+        WHERE learner_id = ?
+          AND is_deleted = 0
+        ORDER BY created_at, id
+    """, (learner_id,))
+
+    rows = cur.fetchall()
+    return rows
+
+
+def get_class_progress(class_id):
+    """
+    {learner_id: {latest_level: number of skills}} for one class, for
+    the roster badges.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT s.learner_id, s.latest_level, COUNT(*) AS skills
+        FROM learners l
+        JOIN learner_skill_state s ON s.learner_id = l.id
+        WHERE l.class_id = ?
+        GROUP BY s.learner_id, s.latest_level
+    """, (class_id,))
+
+    progress = {}
+    for row in cur.fetchall():
+        progress.setdefault(row["learner_id"], {})[row["latest_level"]] = row["skills"]
+    return progress
+
+
+# -------------------------------------------------
+# DATA VERSIONS (CACHE INVALIDATION)
+# -------------------------------------------------
+def get_data_versions(teacher_ids):
+    """
+    {teacher_id: version} for the given teachers; 0 if never written.
+    """
+    teacher_ids = list(teacher_ids)
+    if not teacher_ids:
+        return {}
+
+    conn = get_db()
+    cur = conn.cursor()
+
+    placeholders = ", ".join("?" for _ in teacher_ids)
+    cur.execute(f"""
+        SELECT scope_id, version
+        FROM data_versions
+        WHERE scope = 'teacher'
+          AND scope_id IN ({placeholders})
+    """, teacher_ids)
+
+    versions = dict.fromkeys(teacher_ids, 0)
+    versions.update((row["scope_id"], row["version"]) for row in cur.fetchall())
+    return versions
+
+
+def get_school_data_version():
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute("SELECT version FROM data_versions WHERE scope = 'school' AND scope_id = 0")
+    row = cur.fetchone()
+    return row["version"] if row else 0
+
+
+def get_data_version_stamp(teacher_id=None):
+    """
+    (version, updated_at) of one teacher's data, or of the whole
+    school when teacher_id is None. One primary-key read, cheap enough
+    to run before deciding whether a page needs building at all.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    if teacher_id is None:
+        cur.execute("""
+            SELECT version, updated_at FROM data_versions
+            WHERE scope = 'school' AND scope_id = 0
+        """)
+    else:
+        cur.execute("""
+            SELECT version, updated_at FROM data_versions
+            WHERE scope = 'teacher' AND scope_id = ?
+        """, (teacher_id,))
+
+    row = cur.fetchone()
+    return (row["version"], row["updated_at"]) if row else (0, None)
+
+
+# -------------------------------------------------
+# MASTERY MATRIX (CLASS x SKILL)
+# -------------------------------------------------
+def get_classes_in_scope(teacher_id=None):
+    """
+    Classes a heatmap may cover: one teacher's, or the whole school.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    if teacher_id is None:
+        cur.execute("SELECT id, name, teacher_id FROM classes ORDER BY name")
+    else:
+        cur.execute(
+            "SELECT id, name, teacher_id FROM classes WHERE teacher_id = ? ORDER BY name",
+            (teacher_id,)
+        )
+
+    rows = cur.fetchall()
+    return rows
+
+
+def get_mastery_rows(class_ids):
+    """
+    One row per (learner, skill) with the latest level, for every
+    learner in the given classes; learners with no observations yet
+    come back once with skill NULL.
+
+    Rows are plain tuples (class_id, class_name, learner_id,
+    learner_name, skill, latest_level): they go straight into a
+    DataFrame, so sqlite3.Row would only add overhead.
+    """
+    class_ids = list(class_ids)
+    if not class_ids:
+        return []
+
+    conn = get_db()
+    cur = conn.cursor()
+    cur.row_factory = None
+
+    placeholders = ", ".join("?" for _ in class_ids)
+    cur.execute(f"""
+        SELECT
+            l.class_id,
+            c.name AS class_name,
+            l.id AS learner_id,
+            l.name AS learner_name,
+            s.skill,
+            s.latest_level
+        FROM learners l
+        JOIN classes c ON c.id = l.class_id
+        LEFT JOIN learner_skill_state s ON s.learner_id = l.id
+        WHERE l.class_id IN ({placeholders})
+    """, class_ids)
+
+    rows = cur.fetchall()
+    return rows
+
+
+def _bump_data_versions(cur):
+    """
+    Bumps the school and every teacher's version at once, for bulk
+    loads that ran with the per-row triggers suspended.
+    """
+    cur.execute("""
+        INSERT INTO data_versions (scope, scope_id, version, updated_at)
+        SELECT 'teacher', id, 1, CURRENT_TIMESTAMP FROM teachers
+        UNION ALL
+        SELECT 'school', 0, 1, CURRENT_TIMESTAMP
+        WHERE true
+        ON CONFLICT (scope, scope_id)
+        DO UPDATE SET version = version + 1,
+                      updated_at = excluded.updated_at
+    """)
+
+
+# per-row insert triggers a bulk load can do without
+_BULK_LOAD_TRIGGERS = ("observations_fts_insert", "observations_data_version_insert")
+
+
+@contextmanager
+def bulk_observation_load(cur):
+    """
+    For bulk loads inside the caller's write transaction: the per-row
+    search-index and data-version insert triggers are dropped while the
+    block runs, then recreated as they were. Rows added by the block
+    are indexed in one pass and every version is bumped once. If the
+    transaction rolls back, so do the dropped triggers.
+    """
+    cur.execute(
+        f"SELECT sql FROM sqlite_master WHERE type = 'trigger' "
+        f"AND name IN ({', '.join('?' * len(_BULK_LOAD_TRIGGERS))})",
+        _BULK_LOAD_TRIGGERS
+    )
+    triggers = [row[0] for row in cur.fetchall()]
+
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM observations")
+    last_id = cur.fetchone()[0]
+
+    for name in _BULK_LOAD_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    yield
+
+    for sql in triggers:
+        cur.execute(sql)
+
+    cur.execute("""
+        INSERT INTO observations_fts (rowid, activity, skill, note)
+        SELECT id, activity, skill, note
+        FROM observations
+        WHERE id > ? AND is_deleted = 0
+    """, (last_id,))
+    _bump_data_versions(cur)
+
+
+# -------------------------------------------------
+# FULL-TEXT SEARCH (FTS5)
+# -------------------------------------------------
+# Control characters never typed into a note; the route escapes the
+# text first and only then turns these into <mark> tags.
+SEARCH_MARK_OPEN = "\x02"
+SEARCH_MARK_CLOSE = "\x03"
+
+
+def _rebuild_search_index(cur):
+    # "rebuild" would index soft-deleted rows too, so refill by hand
+    cur.execute("INSERT INTO observations_fts (observations_fts) VALUES ('delete-all')")
+    cur.execute("""
+        INSERT INTO observations_fts (rowid, activity, skill, note)
+        SELECT id, activity, skill, note
+        FROM observations
+        WHERE is_deleted = 0
+    """)
+
+
+def rebuild_search_index():
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        _rebuild_search_index(cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def build_search_query(text):
+    """
+    Turns free text into a safe FTS5 query: every word becomes a quoted
+    prefix term and all of them must match, so user input can never be
+    parsed as FTS5 syntax. Returns None if there is nothing to search.
+    """
+    terms = [
+        '"' + word.replace('"', '""') + '"*'
+        for word in text.split()
+        if word.strip('"')
+    ]
+    return " ".join(terms) or None
+
+
+def search_observations(text, teacher_id=None, page=1, page_size=SEARCH_PAGE_SIZE):
+    """
+    Ranked (bm25) search over activity, skill and note. Scoped to one
+    teacher's observations, or the whole school with teacher_id=None.
+    Returns {"results", "page", "has_more"}; matches in activity and
+    note are wrapped in SEARCH_MARK_OPEN / SEARCH_MARK_CLOSE.
+    """
+    query = build_search_query(text)
+    if query is None:
+        return {"results": [], "page": 1, "has_more": False}
+
+    page = max(page, 1)
+    # fixed SQL fragment, never user input
+    scope = "" if teacher_id is None else "AND o.teacher_id = ?"
+    params = [query] + ([] if teacher_id is None else [teacher_id])
+
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute(f"""
+        SELECT
+            o.id,
+            o.teacher_id,
+            o.created_at,
+            o.class_name,
+            o.skill,
+            o.level,
+            l.name AS learner_name,
+            t.name AS teacher_name,
+            highlight(observations_fts, 0, ?, ?) AS activity,
+            snippet(observations_fts, 2, ?, ?, '…', 24) AS note
+        FROM observations_fts
+        JOIN observations o ON o.id = observations_fts.rowid
+        JOIN learners l ON o.learner_id = l.id
+        JOIN teachers t ON o.teacher_id = t.id
+        WHERE observations_fts MATCH ?
+          AND o.is_deleted = 0
+          {scope}
+        ORDER BY observations_fts.rank, o.created_at DESC
+        LIMIT ? OFFSET ?
+    """, (
+        SEARCH_MARK_OPEN, SEARCH_MARK_CLOSE,
+        SEARCH_MARK_OPEN, SEARCH_MARK_CLOSE,
+        *params,
+        page_size + 1, (page - 1) * page_size,
+    ))
+
+    rows = cur.fetchall()
+    return {
+        "results": rows[:page_size],
+        "page": page,
+        "has_more": len(rows) > page_size,
+    }
+
+
+# -------------------------------------------------
+# QUERY PLAN DIAGNOSTICS
+# -------------------------------------------------
+def explain_query_plan(sql, params=()):
+    conn = get_db()
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [row["detail"] for row in rows]
+
+
+def capture_query_plans(helper, *args, **kwargs):
+    """
+    Runs a db helper and returns (sql, plan) for every SELECT it issued.
+    The trace callback hands back the SQL with parameters inlined,
+    so each statement can be explained exactly as it ran.
+    """
+    conn = get_db()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    # explain what the helper really runs, not a cache hit
+    helper = inspect.unwrap(helper)
+    try:
+        result = helper(*args, **kwargs)
+        if inspect.isgenerator(result):
+            for _ in result:
+                pass
+    finally:
+        conn.set_trace_callback(_trace_statement)
+
+    # FTS5 reads its shadow tables (observations_fts_config, ...) with
+    # statements of its own, traced too; they are not the helper's
+    return [
+        (sql, explain_query_plan(sql))
+        for sql in statements
+        if sql.lstrip().upper().startswith(("SELECT", "WITH"))
+        and "observations_fts_" not in sql
+    ]
+
+
+def _read_helper_expectations():
+    # (helper, sample args, indexes its plan must use[, tables it may scan])
+    return [
+        (get_observations_page, (1,), ["idx_observations_teacher_live_keyset"]),
+        (get_observations_page, (1, "2000-01-01 00:00:00|1"), [
+            "idx_observations_teacher_live_keyset",
+        ]),
+        (get_observations_page, (1, None, "2000-01-01 00:00:00|1"), [
+            "idx_observations_teacher_live_keyset",
+        ]),
+        (get_recent_observations, (1,), ["idx_observations_teacher_live_keyset"]),
+        (iter_observation_batches, (1,), ["idx_observations_teacher_live_keyset"]),
+        (iter_observation_batches, (None,), ["idx_observations_created"]),
+        (iter_analytics_batches, ("2000-01",), ["idx_observations_created"]),
+        (iter_report_card_rows, (1,), [
+            "idx_learners_class_name",
+            "idx_observations_learner_live",
+        ]),
+        (get_observations_for_teacher_readonly, (1,), ["idx_observations_teacher_live_keyset"]),
+        (get_weekly_summary, (1,), [
+            "SEARCH daily_observation_learner_skills USING PRIMARY KEY",
+        ]),
+        (get_principal_teacher_summary, (1,), [
+            "idx_classes_teacher_name",
+            "idx_learners_class_name",
+            "SEARCH daily_observation_rollups USING PRIMARY KEY",
+        ]),
+        (get_principal_dashboard_summary, (), [
+            "SEARCH t USING INTEGER PRIMARY KEY",
+        ], ["daily_observation_rollups"]),
+        (get_classes_for_teacher, (1,), ["idx_classes_teacher_name"]),
+        (get_classes_for_teacher_readonly, (1,), ["idx_classes_teacher_name"]),
+        (get_classes_with_learner_counts_for_teacher, (1,), [
+            "idx_classes_teacher_name",
+            "idx_learners_class_name",
+        ]),
+        (get_learners_for_class, (1,), ["idx_learners_class_name"]),
+        (get_all_teachers, (), ["idx_teachers_name"]),
+        (get_learner_skill_states, (1,), [
+            "SEARCH learner_skill_state USING PRIMARY KEY",
+        ]),
+        (get_learner_timeline, (1,), ["idx_observations_learner_live"]),
+        (get_class_progress, (1,), [
+            "idx_learners_class_name",
+            "SEARCH s USING PRIMARY KEY",
+        ]),
+        (get_mastery_rows, ([1, 2],), [
+            "idx_learners_class_name",
+            "SEARCH s USING PRIMARY KEY",
+        ]),
+        (get_data_versions, ([1, 2],), [
+            "SEARCH data_versions USING PRIMARY KEY",
+        ]),
+        (get_data_version_stamp, (1,), [
+            "SEARCH data_versions USING PRIMARY KEY",
+        ]),
+        (search_observations, ("group work", 1), [
+            "VIRTUAL TABLE INDEX",
+            "SEARCH o USING INTEGER PRIMARY KEY",
+        ]),
+        (get_teacher_overview, ("total_observations", True), [
+            "idx_classes_teacher_name",
+            "idx_learners_class_name",
+        ], ["daily_observation_rollups", "daily_observation_learner_skills"]),
+    ]
+
+
+def check_query_plans():
+    """
+    Explains every read helper and reports problems: an expected index
+    missing from the plan, or a bare full-table SCAN.
+    Returns a list of (helper name, problem) tuples; empty means OK.
+    """
+    problems = []
+
+    for helper, args, indexes, *allowed in _read_helper_expectations():
+        scannable = allowed[0] if allowed else []
+        allowed_scans = {f"SCAN {table}" for table in scannable}
+        details = [
+            detail
+            for _, plan in capture_query_plans(helper, *args)
+            for detail in plan
+        ]
+        text = "\n".join(details)
+
+        for index in indexes:
+            if index not in text:
+                problems.append((helper.__name__, f"does not use {index}"))
+
+        for detail in table_scans(details):
+            if detail not in allowed_scans:
+                problems.append((helper.__name__, detail))
+
+    return problems
+
+
+def table_scans(details):
+    """
+    The full-table SCAN lines among query-plan details. Scans of a
+    materialized CTE, a subquery or the constant row read no table.
+    """
+    derived = {"SCAN CONSTANT ROW"}
+    derived.update(
+        f"SCAN {detail.split()[-1]}"
+        for detail in details
+        if detail.startswith("MATERIALIZE ")
+    )
+
+    return [
+        detail
+        for detail in details
+        if detail.startswith("SCAN ") and " USING " not in detail
+        and " VIRTUAL TABLE INDEX " not in detail
+        and not detail.startswith("SCAN (subquery-")
+        and detail not in derived
+    ]
+
+
 # -------------------------------------------------
 # SECURITY HELPERS
 # -------------------------------------------------
+def get_user_by_email(email):
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute(
+        "SELECT id, password_hash, role, is_active FROM users WHERE email = ?",
+        (email,)
+    )
+
+    return cur.fetchone()
+
+
 def hash_password(password: str) -> str:
     return generate_password_hash(password)
 
@@ -802,7 +3457,6 @@ def seed_default_users():
                 )
             )
     conn.commit()
-    conn.close()
 # -------------------------------------------------
 # DEMO DATA — TEACHERS (PHASE 3B-1)
 # -------------------------------------------------
@@ -812,6 +3466,11 @@ def seed_demo_teachers():
     Idempotent and safe to run multiple times.
     """
     demo_teachers = [
+        {
+            "email": "amina@school.test",
+            "name": "Amina Hassan",
+            "subject": "Mathematics",
+        },
         {
             "email": "brian@school.test",
             "name": "Brian Otieno",
@@ -860,6 +3519,5 @@ def seed_demo_teachers():
             )
 
     conn.commit()
-    conn.close()
 
 
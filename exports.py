@@ -0,0 +1,226 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+from itertools import groupby
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from db import iter_observation_batches, iter_analytics_batches
+
+
+# -------------------------------------------------
+# REPORT EXPORT COLUMNS
+# -------------------------------------------------
+TEACHER_REPORT_COLUMNS = [
+    ("created_at", "Date"),
+    ("class_name", "Class"),
+    ("learner_name", "Learner"),
+    ("activity", "Activity"),
+    ("skill", "Skill"),
+    ("level", "Level"),
+    ("note", "Note"),
+]
+
+SCHOOL_REPORT_COLUMNS = [("teacher_name", "Teacher")] + TEACHER_REPORT_COLUMNS
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+# -------------------------------------------------
+# CSV (STREAMED PER BATCH)
+# -------------------------------------------------
+def stream_csv(teacher_id=None):
+    """
+    Yields CSV text one cursor batch at a time; the header goes out
+    before the first query result so the download starts immediately.
+    """
+    columns = SCHOOL_REPORT_COLUMNS if teacher_id is None else TEACHER_REPORT_COLUMNS
+    keys = [key for key, _ in columns]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow([label for _, label in columns])
+    yield buffer.getvalue()
+
+    for rows in iter_observation_batches(teacher_id):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([row[key] for key in keys] for row in rows)
+        yield buffer.getvalue()
+
+
+# -------------------------------------------------
+# XLSX (WRITE-ONLY WORKBOOK)
+# -------------------------------------------------
+def stream_xlsx(teacher_id=None):
+    """
+    Builds the workbook in openpyxl's write-only mode, which spills
+    rows to disk instead of holding cells in memory, then streams the
+    saved file in chunks. An .xlsx is a zip whose directory is written
+    last, so bytes can only start once the sheet is complete.
+    """
+    columns = SCHOOL_REPORT_COLUMNS if teacher_id is None else TEACHER_REPORT_COLUMNS
+    keys = [key for key, _ in columns]
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Observations")
+    sheet.append([label for _, label in columns])
+
+    for rows in iter_observation_batches(teacher_id):
+        for row in rows:
+            sheet.append([row[key] for key in keys])
+
+    with tempfile.TemporaryFile() as fh:
+        workbook.save(fh)
+        yield from _stream_file(fh)
+
+
+def _stream_file(fh):
+    fh.seek(0)
+
+    while True:
+        chunk = fh.read(FILE_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+# -------------------------------------------------
+# PARQUET (ANALYTICS DATASET)
+# -------------------------------------------------
+# Low-cardinality text columns are dictionary-encoded so analysts get
+# categorical columns and the files stay small.
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+ANALYTICS_SCHEMA = pa.schema([
+    ("observation_id", pa.int64()),
+    ("created_at", pa.timestamp("s")),
+    ("teacher_id", pa.int64()),
+    ("teacher_name", pa.string()),
+    ("class_id", pa.int64()),
+    ("class_name", pa.string()),
+    ("subject", _CATEGORY),
+    ("learner_id", pa.int64()),
+    ("learner_name", pa.string()),
+    ("activity", _CATEGORY),
+    ("skill", _CATEGORY),
+    ("level", _CATEGORY),
+    ("note", pa.string()),
+])
+
+PARQUET_STATE_FILE = "_export_state.json"
+PARQUET_FILE_NAME = "part-0.parquet"
+
+
+def _record_batch(rows):
+    arrays = []
+
+    for field in ANALYTICS_SCHEMA:
+        values = [row[field.name] for row in rows]
+
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        elif pa.types.is_timestamp(field.type):
+            arrays.append(pa.array(values, pa.string()).cast(field.type))
+        else:
+            arrays.append(pa.array(values, field.type))
+
+    return pa.RecordBatch.from_arrays(arrays, schema=ANALYTICS_SCHEMA)
+
+
+def _drop_partitions(out_dir, since_month=None):
+    for part_dir in out_dir.glob("month=*"):
+        month = part_dir.name.split("=", 1)[1]
+        if since_month is None or month >= since_month:
+            shutil.rmtree(part_dir)
+
+
+def _open_partition(out_dir, month):
+    part_dir = out_dir / f"month={month}"
+    part_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = part_dir / f"{PARQUET_FILE_NAME}.tmp"
+    writer = pq.ParquetWriter(tmp_path, ANALYTICS_SCHEMA, compression="zstd")
+    return writer, tmp_path
+
+
+def _close_partition(writer, tmp_path):
+    writer.close()
+    tmp_path.rename(tmp_path.with_suffix(""))
+
+
+def write_parquet_dataset(out_dir, incremental=False):
+    """
+    Writes the observation dataset as a Hive-style Parquet dataset,
+    one month=YYYY-MM directory per month, straight from SQLite record
+    batches.
+
+    With incremental=True only the month of the previous run (which may
+    have grown since) and newer months are rewritten; older partitions
+    are left untouched. Edits to older months need a full export.
+    Returns {"partitions": {month: rows}, "since": month or None}.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    state_path = out_dir / PARQUET_STATE_FILE
+
+    since_month = None
+    if incremental and state_path.exists():
+        since_month = json.loads(state_path.read_text())["last_month"]
+
+    _drop_partitions(out_dir, since_month)
+
+    partitions = {}
+    writer = tmp_path = None
+    current_month = None
+
+    try:
+        for rows in iter_analytics_batches(since_month):
+            # rows are time-ordered, so each month is one contiguous run
+            for month, month_rows in groupby(rows, key=lambda row: row["month"]):
+                if month != current_month:
+                    if writer is not None:
+                        _close_partition(writer, tmp_path)
+                    writer, tmp_path = _open_partition(out_dir, month)
+                    current_month = month
+                    partitions[month] = 0
+
+                month_rows = list(month_rows)
+                writer.write_batch(_record_batch(month_rows))
+                partitions[month] += len(month_rows)
+    finally:
+        if writer is not None:
+            _close_partition(writer, tmp_path)
+
+    last_month = max(partitions, default=since_month)
+    if last_month is not None:
+        state_path.write_text(json.dumps({
+            "last_month": last_month,
+            "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }))
+
+    return {"partitions": partitions, "since": since_month}
+
+
+def stream_parquet_zip():
+    """
+    Builds a full dataset in a scratch directory and streams it as
+    one zip (stored, not deflated: Parquet is already compressed).
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_parquet_dataset(tmp_dir)
+        root = Path(tmp_dir)
+
+        with tempfile.TemporaryFile() as fh:
+            with zipfile.ZipFile(fh, "w", zipfile.ZIP_STORED) as archive:
+                for path in sorted(root.rglob("*.parquet")):
+                    archive.write(path, path.relative_to(root))
+
+            yield from _stream_file(fh)
@@ -0,0 +1,66 @@
+"""
+Gunicorn settings for CBC-Connect on SQLite in WAL mode. Picked up
+automatically from the working directory:
+
+    gunicorn                                   # this file's defaults
+    CBC_WORKERS=4 CBC_THREADS=8 gunicorn       # N workers x M threads
+
+SQLite lets readers run alongside the single writer in WAL mode, so
+reads scale across worker processes (one per core) while writes
+queue on the database lock (busy_timeout, 5 s) rather than failing.
+Threads cover the time a request spends waiting on the network or
+that lock; keep them at or below db.POOL_SIZE so every thread can
+hold a pooled connection.
+"""
+import multiprocessing
+import os
+
+from db import POOL_SIZE, reset_pool
+
+wsgi_app = "app:create_app()"
+bind = os.environ.get("CBC_BIND", "0.0.0.0:8000")
+
+worker_class = "gthread"
+workers = int(os.environ.get("CBC_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("CBC_THREADS", "4"))
+
+# create_app (migrations included) runs once in the master; workers
+# fork from it with the app already built
+preload_app = True
+
+# longer than busy_timeout, so a request waiting on the write lock
+# fails with a database error instead of a killed worker
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# recycle workers now and then; staggered so they do not all restart together
+max_requests = 2000
+max_requests_jitter = 200
+
+# heartbeat files in RAM, not on a possibly slow disk
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = os.environ.get("CBC_ACCESS_LOG")
+errorlog = "-"
+
+
+def when_ready(server):
+    if threads > POOL_SIZE:
+        server.log.warning(
+            "threads (%s) > db.POOL_SIZE (%s): the extra threads open a "
+            "connection per request", threads, POOL_SIZE
+        )
+
+
+def pre_fork(server, worker):
+    # SQLite connections must not cross fork(): close the master's
+    # (left from migrations) before any worker is created
+    reset_pool()
+
+
+def post_fork(server, worker):
+    # and drop anything inherited anyway; each worker connects afresh
+    # on first use. The group-commit writer and dashboard refresher
+    # restart themselves in the worker (they check the pid).
+    reset_pool()
@@ -0,0 +1,138 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from db import RosterCache, get_data_versions, get_mastery_rows
+
+# Cell codes: 0 = not observed yet, then worst to best
+LEVELS = ["Needs support", "Improving", "Doing well"]
+LEVEL_LABELS = np.array([""] + LEVELS, dtype=object)
+
+HEATMAP_CACHE_SIZE = 512
+# entries are keyed by data version, so the TTL only bounds memory
+HEATMAP_CACHE_TTL = 24 * 3600
+
+_matrix_cache = RosterCache(maxsize=HEATMAP_CACHE_SIZE, ttl=HEATMAP_CACHE_TTL)
+
+
+def class_grade(class_name):
+    """
+    "Grade 10 A" -> "Grade 10"; names without a grade are their own group.
+    """
+    match = re.match(r"(Grade \d+)\b", class_name)
+    return match.group(1) if match else class_name
+
+
+# -------------------------------------------------
+# PIVOT (ONE FRAME PER CLASS)
+# -------------------------------------------------
+def _pivot(rows):
+    """
+    Pivots mastery rows into {class_id: DataFrame}. Each frame is
+    indexed by (class_name, learner_name, learner_id), has one column
+    per skill and int8 level codes as values.
+
+    (learner, skill) is unique in learner_skill_state, so the pivot is
+    a single scatter into a zeroed NumPy array: no aggregation.
+    """
+    df = pd.DataFrame.from_records(
+        rows,
+        columns=["class_id", "class_name", "learner_id", "learner_name", "skill", "latest_level"],
+    )
+    codes = pd.Categorical(df["latest_level"], categories=LEVELS).codes.astype(np.int8) + 1
+
+    learners = (
+        df[["class_id", "class_name", "learner_name", "learner_id"]]
+        .drop_duplicates("learner_id")
+        .sort_values(["class_id", "learner_name", "learner_id"])
+    )
+    row_of = pd.Index(learners["learner_id"]).get_indexer(df["learner_id"])
+
+    observed = df["skill"].notna().to_numpy()
+    col_of, skills = pd.factorize(df["skill"], sort=True)
+
+    cells = np.zeros((len(learners), len(skills)), dtype=np.int8)
+    cells[row_of[observed], col_of[observed]] = codes[observed]
+
+    frames = {}
+    class_ids = learners["class_id"].to_numpy()
+    for class_id in pd.unique(class_ids):
+        mask = class_ids == class_id
+        block = cells[mask]
+        used = block.any(axis=0)
+        frames[class_id] = pd.DataFrame(
+            block[:, used],
+            index=pd.MultiIndex.from_frame(learners.loc[mask, ["class_name", "learner_name", "learner_id"]]),
+            columns=list(skills[used]),
+        )
+
+    return frames
+
+
+def mastery_matrix(classes):
+    """
+    Learner x skill matrix of latest-level codes for the given classes
+    (rows with id and teacher_id), one class after another.
+
+    Each class's frame is cached against its teacher's data version;
+    only classes whose teacher has written since are re-read, all in
+    one query.
+    """
+    versions = get_data_versions({c["teacher_id"] for c in classes})
+
+    frames = {}
+    stale = []
+    for c in classes:
+        hit, value = _matrix_cache.get(("class_matrix", c["id"]))
+        if hit and value[0] == versions[c["teacher_id"]]:
+            frames[c["id"]] = value[1]
+        else:
+            stale.append(c)
+
+    if stale:
+        fresh = _pivot(get_mastery_rows(c["id"] for c in stale))
+        for c in stale:
+            frame = fresh.get(c["id"], pd.DataFrame(dtype=np.int8))
+            _matrix_cache.set(("class_matrix", c["id"]), (versions[c["teacher_id"]], frame))
+            frames[c["id"]] = frame
+
+    parts = [frames[c["id"]] for c in classes if not frames[c["id"]].index.empty]
+    if not parts:
+        return pd.DataFrame(dtype=np.int8)
+
+    combined = pd.concat(parts)
+    skills = sorted(combined.columns)
+    return combined.reindex(columns=skills).fillna(0).astype(np.int8)
+
+
+# -------------------------------------------------
+# OUTPUTS
+# -------------------------------------------------
+def matrix_payload(matrix):
+    """
+    Compact JSON shape: skills and learners once, cells as code rows.
+    """
+    return {
+        "levels": LEVELS,
+        "skills": list(matrix.columns),
+        "learners": [
+            {"id": int(learner_id), "name": name, "class": class_name}
+            for class_name, name, learner_id in matrix.index
+        ],
+        # explicit dtype: a frame with no skill columns yet is float64
+        "cells": matrix.to_numpy(dtype=np.int8).tolist(),
+    }
+
+
+def matrix_csv(matrix):
+    """
+    One row per learner, one column per skill, level names as cells.
+    """
+    labels = pd.DataFrame(
+        LEVEL_LABELS[matrix.to_numpy(dtype=np.int8)],
+        index=matrix.index,
+        columns=matrix.columns,
+    )
+    labels.index = labels.index.set_names(["Class", "Learner", "Learner ID"])
+    return labels.reset_index().to_csv(index=False)
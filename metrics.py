@@ -0,0 +1,225 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, abort, current_app, g, request, session
+
+from db import begin_sql_stats, end_sql_stats
+
+# seconds; Prometheus "le" upper bounds, +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# -------------------------------------------------
+# METRIC TYPES (IN-PROCESS, THREAD-SAFE)
+# -------------------------------------------------
+class Histogram:
+    """
+    Cumulative-bucket histogram per label set, as Prometheus expects.
+    """
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+
+        for label_values, (counts, total) in series:
+            labels = _labels(self.labels, label_values)
+            running = 0
+            for bound, count in zip(self.buckets, counts):
+                running += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {running}')
+            running += counts[-1]
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {running}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {running}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{{{_labels(self.labels, label_values)}}} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def render(self):
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.value}",
+        ]
+
+
+def _labels(names, values):
+    return ",".join(
+        f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)
+    )
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# -------------------------------------------------
+# REQUEST METRICS
+# -------------------------------------------------
+# Labelled by endpoint (the view name), never by raw path, so ids in
+# URLs cannot blow up the number of series. Counts are per process.
+REQUESTS = Counter(
+    "cbc_http_requests_total",
+    "HTTP requests by endpoint, method and status code.",
+    ("endpoint", "method", "status"),
+)
+REQUEST_LATENCY = Histogram(
+    "cbc_http_request_duration_seconds",
+    "Time from the first request hook to teardown (streamed bodies included).",
+    ("endpoint", "method"),
+    LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge(
+    "cbc_http_requests_in_flight",
+    "Requests being handled right now.",
+)
+SQL_QUERIES = Histogram(
+    "cbc_sql_queries_per_request",
+    "SQL statements run on the request thread.",
+    ("endpoint",),
+    QUERY_COUNT_BUCKETS,
+)
+SQL_TIME = Histogram(
+    "cbc_sql_duration_seconds",
+    "Time spent in SQLite (execute, fetch, commit) per request.",
+    ("endpoint",),
+    LATENCY_BUCKETS,
+)
+
+ALL_METRICS = (REQUESTS, REQUEST_LATENCY, IN_FLIGHT, SQL_QUERIES, SQL_TIME)
+
+
+def render_metrics():
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _endpoint():
+    # unmatched URLs (404s) share one series
+    return request.endpoint or "unmatched"
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.sql_stats = begin_sql_stats()
+    IN_FLIGHT.inc()
+
+
+def _server_timing(response):
+    g.metrics_status = response.status_code
+
+    # Server-Timing exposes internals, so only in debug mode
+    if current_app.debug:
+        stats = g.sql_stats
+        elapsed = time.perf_counter() - g.metrics_start
+        response.headers["Server-Timing"] = (
+            f'sql;dur={stats.seconds * 1000:.1f};desc="{stats.queries} queries", '
+            f"app;dur={elapsed * 1000:.1f}"
+        )
+    return response
+
+
+def _finish_request(exc=None):
+    if "metrics_start" not in g:
+        return
+
+    elapsed = time.perf_counter() - g.metrics_start
+    stats = end_sql_stats()
+    endpoint = _endpoint()
+    # no after_request ran if the view raised
+    status = g.get("metrics_status", 500)
+
+    IN_FLIGHT.dec()
+    REQUESTS.inc((endpoint, request.method, str(status)))
+    REQUEST_LATENCY.observe((endpoint, request.method), elapsed)
+    if stats is not None:
+        SQL_QUERIES.observe((endpoint,), stats.queries)
+        SQL_TIME.observe((endpoint,), stats.seconds)
+
+
+def metrics_view():
+    """
+    Prometheus text exposition. Scrapers authenticate with
+    "Authorization: Bearer <METRICS_TOKEN>"; a signed-in principal can
+    read it in the browser. Without a token configured, only the
+    principal can.
+    """
+    token = current_app.config.get("METRICS_TOKEN")
+    supplied = request.headers.get("Authorization", "")
+
+    authorized = session.get("role") == "principal" or (
+        token and hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode())
+    )
+    if not authorized:
+        abort(401)
+
+    return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def init_metrics(app):
+    """
+    Registers the request hooks and the /metrics endpoint. Call before
+    any other before_request hook so the timing covers them too.
+    """
+    app.before_request(_start_request)
+    app.after_request(_server_timing)
+    app.teardown_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,270 @@
+import hashlib
+import io
+import json
+import os
+import re
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from db import BASE_DIR, iter_report_card_rows
+
+REPORT_CARD_DIR = BASE_DIR / "instance" / "report_cards"
+
+# Bump when the PDF layout changes so every cached card is re-rendered
+REPORT_CARD_LAYOUT_VERSION = 1
+
+# Below this many cards the pool start-up costs more than it saves
+MIN_CARDS_FOR_POOL = 4
+
+
+# -------------------------------------------------
+# PAYLOADS (PLAIN DATA, SAFE TO PICKLE)
+# -------------------------------------------------
+def collect_payloads(class_id=None, teacher_id=None):
+    """
+    One dict per learner in scope with everything the PDF needs.
+    Workers never touch the database; they only see these payloads.
+    """
+    payloads = []
+
+    for rows in _iter_learner_rows(class_id, teacher_id):
+        first = rows[0]
+        payloads.append({
+            "learner_id": first["learner_id"],
+            "learner_name": first["learner_name"],
+            "class_name": first["class_name"],
+            "subject": first["subject"],
+            "teacher_name": first["teacher_name"],
+            "observations": [
+                [row["created_at"], row["activity"], row["skill"], row["level"], row["note"] or ""]
+                for row in rows
+                if row["created_at"] is not None
+            ],
+        })
+
+    return payloads
+
+
+def _iter_learner_rows(class_id, teacher_id):
+    # learners can straddle batch boundaries, so carry the tail over
+    pending = []
+
+    for batch in iter_report_card_rows(class_id=class_id, teacher_id=teacher_id):
+        for learner_id, rows in groupby(batch, key=lambda row: row["learner_id"]):
+            rows = list(rows)
+            if pending and pending[0]["learner_id"] != learner_id:
+                yield pending
+                pending = []
+            pending.extend(rows)
+
+    if pending:
+        yield pending
+
+
+def payload_hash(payload):
+    blob = json.dumps(
+        [REPORT_CARD_LAYOUT_VERSION, payload],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------
+# PDF RENDERING (RUNS IN WORKER PROCESSES)
+# -------------------------------------------------
+def render_report_card(payload):
+    styles = getSampleStyleSheet()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=18 * mm,
+        rightMargin=18 * mm,
+        topMargin=18 * mm,
+        bottomMargin=18 * mm,
+        title=f"Report card — {payload['learner_name']}",
+    )
+
+    observations = payload["observations"]
+    story = [
+        Paragraph("CBC-Connect — Learner Report Card", styles["Title"]),
+        Paragraph(
+            f"<b>{_escape(payload['learner_name'])}</b> · "
+            f"{_escape(payload['class_name'])} · {_escape(payload['subject'])}",
+            styles["Normal"],
+        ),
+        Paragraph(f"Teacher: {_escape(payload['teacher_name'])}", styles["Normal"]),
+        Spacer(1, 8 * mm),
+        Paragraph("Competency summary", styles["Heading2"]),
+    ]
+
+    if not observations:
+        story.append(Paragraph("No observations recorded this term.", styles["Normal"]))
+    else:
+        story.append(_table(
+            [["Skill", "Latest level", "Observations", "Most common level"]]
+            + _skill_summary(observations),
+            [45 * mm, 40 * mm, 30 * mm, 45 * mm],
+        ))
+        story.append(Spacer(1, 8 * mm))
+        story.append(Paragraph("Observation log", styles["Heading2"]))
+
+        note_style = styles["BodyText"]
+        story.append(_table(
+            [["Date", "Activity", "Skill", "Level", "Note"]]
+            + [
+                [created_at[:10], activity, skill, level, Paragraph(_escape(note), note_style)]
+                for created_at, activity, skill, level, note in observations
+            ],
+            [22 * mm, 30 * mm, 32 * mm, 28 * mm, 62 * mm],
+        ))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def _skill_summary(observations):
+    by_skill = {}
+    for _, _, skill, level, _ in observations:
+        by_skill.setdefault(skill, []).append(level)
+
+    return [
+        [skill, levels[-1], str(len(levels)), Counter(levels).most_common(1)[0][0]]
+        for skill, levels in sorted(by_skill.items())
+    ]
+
+
+def _table(data, widths):
+    table = Table(data, colWidths=widths, repeatRows=1)
+    table.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f3f3f3")),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#dddddd")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    return table
+
+
+def _escape(text):
+    return (text or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _render_to_cache(job):
+    payload, path = job
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(tmp_path, "wb") as fh:
+        fh.write(render_report_card(payload))
+
+    os.replace(tmp_path, path)
+    return path
+
+
+# -------------------------------------------------
+# BATCH GENERATION
+# -------------------------------------------------
+def generate_report_cards(class_id=None, teacher_id=None, max_workers=None, cache_dir=None):
+    """
+    Renders one PDF per learner in scope (a class, a teacher, or the
+    whole school) and returns [(payload, path, was_cached)].
+
+    Each PDF is stored under the SHA-256 of its payload, so a learner
+    whose observations have not changed since the last run is skipped;
+    only the misses are fanned out over a process pool.
+    """
+    cache_dir = cache_dir or REPORT_CARD_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    jobs = []
+
+    for payload in collect_payloads(class_id, teacher_id):
+        path = cache_dir / f"{payload_hash(payload)}.pdf"
+        cached = path.exists()
+        results.append((payload, path, cached))
+        if not cached:
+            jobs.append((payload, str(path)))
+
+    if len(jobs) >= MIN_CARDS_FOR_POOL:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(_render_to_cache, jobs, chunksize=4))
+    else:
+        for job in jobs:
+            _render_to_cache(job)
+
+    return results
+
+
+def cached_report_cards(class_id=None, teacher_id=None, cache_dir=None):
+    """
+    The cards in scope that are already rendered, without rendering
+    any: returns ([(payload, path, True)], [payload still to render]).
+    Web requests use this; rendering is left to `flask report-cards`.
+    """
+    cache_dir = cache_dir or REPORT_CARD_DIR
+
+    results = []
+    missing = []
+
+    for payload in collect_payloads(class_id, teacher_id):
+        path = cache_dir / f"{payload_hash(payload)}.pdf"
+        if path.exists():
+            results.append((payload, path, True))
+        else:
+            missing.append(payload)
+
+    return results, missing
+
+
+def prune_report_cards(keep=None, cache_dir=None):
+    """
+    Deletes cached PDFs whose hash matches no learner's current payload
+    (a learner observed since, a layout bump, a removed learner).
+    keep: the current hashes, when the caller already has them.
+    Returns the number of files removed.
+    """
+    cache_dir = cache_dir or REPORT_CARD_DIR
+    if keep is None:
+        keep = {payload_hash(payload) for payload in collect_payloads()}
+
+    removed = 0
+    for path in cache_dir.glob("*.pdf"):
+        if path.stem not in keep:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def write_report_card_zip(results, fh, missing=()):
+    """
+    Writes the generated cards into one zip, foldered by class.
+    PDFs are already compressed, so entries are stored as-is. Learners
+    in missing are listed in NOT-YET-RENDERED.txt instead.
+    """
+    with zipfile.ZipFile(fh, "w", zipfile.ZIP_STORED) as archive:
+        for payload, path, _ in results:
+            name = (
+                f"{_slug(payload['class_name'])}/"
+                f"{_slug(payload['learner_name'])}-{payload['learner_id']}.pdf"
+            )
+            archive.write(path, name)
+
+        if missing:
+            archive.writestr("NOT-YET-RENDERED.txt", "".join(
+                f"{payload['class_name']}\t{payload['learner_name']}\t{payload['learner_id']}\n"
+                for payload in missing
+            ))
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-") or "unnamed"
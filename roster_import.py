@@ -0,0 +1,168 @@
+import csv
+import io
+
+from openpyxl import load_workbook
+
+from db import hash_password, import_roster
+
+# One row per learner; a row without learner_name just declares the
+# class. class_subject defaults to the teacher's subject and
+# teacher_password is only needed for teachers without a login yet.
+REQUIRED_COLUMNS = ["teacher_email", "teacher_name", "teacher_subject", "class_name"]
+OPTIONAL_COLUMNS = ["class_subject", "learner_name", "teacher_password"]
+
+MAX_NAME_LENGTH = 120
+
+
+class RosterImportError(ValueError):
+    """
+    Raised when a roster file fails validation; nothing is written.
+    `errors` holds one message per problem, with its row number.
+    """
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} problem(s) in roster file")
+        self.errors = errors
+
+
+# -------------------------------------------------
+# READING (CSV / XLSX)
+# -------------------------------------------------
+def read_roster_rows(fh, filename):
+    """
+    Yields (row_number, {column: value}) from a CSV or XLSX upload.
+    Header names are matched case-insensitively.
+    """
+    if filename.lower().endswith(".xlsx"):
+        rows = _xlsx_rows(fh)
+    elif filename.lower().endswith(".csv"):
+        rows = _csv_rows(fh)
+    else:
+        raise RosterImportError(["Roster must be a .csv or .xlsx file."])
+
+    header = next(rows, None)
+    if header is None:
+        raise RosterImportError(["Roster file is empty."])
+
+    columns = [str(name or "").strip().lower() for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise RosterImportError([f"Missing column(s): {', '.join(missing)}."])
+
+    for number, values in enumerate(rows, start=2):
+        record = {
+            name: str(value).strip() if value is not None else ""
+            for name, value in zip(columns, values)
+            if name in REQUIRED_COLUMNS or name in OPTIONAL_COLUMNS
+        }
+        if any(record.values()):
+            yield number, record
+
+
+def _csv_rows(fh):
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    yield from csv.reader(text)
+
+
+def _xlsx_rows(fh):
+    workbook = load_workbook(fh, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+# -------------------------------------------------
+# VALIDATION + IMPORT
+# -------------------------------------------------
+def build_roster(rows):
+    """
+    Validates parsed rows and folds them into the three de-duplicated
+    lists import_roster() expects. Raises RosterImportError listing
+    every problem found.
+    """
+    errors = []
+    teachers = {}
+    classes = {}
+    learners = set()
+
+    for number, row in rows:
+        row_errors = []
+
+        for name in REQUIRED_COLUMNS:
+            if not row.get(name):
+                row_errors.append(f"Row {number}: {name} is required.")
+
+        email = row.get("teacher_email", "").lower()
+        if email and "@" not in email:
+            row_errors.append(f"Row {number}: '{email}' is not an email address.")
+
+        for name in ("teacher_name", "class_name", "learner_name"):
+            if len(row.get(name, "")) > MAX_NAME_LENGTH:
+                row_errors.append(f"Row {number}: {name} is longer than {MAX_NAME_LENGTH} characters.")
+
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+
+        teacher = (row["teacher_name"], row["teacher_subject"])
+        known = teachers.setdefault(email, {"details": teacher, "password": ""})
+        if known["details"] != teacher:
+            errors.append(f"Row {number}: {email} is listed with a different name or subject.")
+            continue
+        if row.get("teacher_password"):
+            known["password"] = row["teacher_password"]
+
+        class_key = (email, row["class_name"])
+        subject = row.get("class_subject") or row["teacher_subject"]
+        if classes.setdefault(class_key, subject) != subject:
+            errors.append(f"Row {number}: {row['class_name']} is listed with two subjects.")
+            continue
+
+        if row.get("learner_name"):
+            learners.add((email, row["class_name"], row["learner_name"]))
+
+    if not teachers and not errors:
+        errors.append("Roster file has no data rows.")
+
+    if errors:
+        raise RosterImportError(errors)
+
+    return (
+        [
+            (email, t["details"][0], t["details"][1], t["password"])
+            for email, t in teachers.items()
+        ],
+        [(email, name, subject) for (email, name), subject in classes.items()],
+        sorted(learners),
+    )
+
+
+def import_roster_file(fh, filename):
+    """
+    Parses, validates and imports one roster upload in a single
+    transaction. Returns the counts from db.import_roster().
+    """
+    teachers, classes, learners = build_roster(read_roster_rows(fh, filename))
+
+    # hash outside the write transaction: it is deliberately slow
+    teachers = [
+        (email, name, subject, hash_password(password) if password else None)
+        for email, name, subject, password in teachers
+    ]
+
+    result = import_roster(teachers, classes, learners)
+
+    # import_roster rolled back: nothing was written
+    if result["not_teachers"]:
+        raise RosterImportError([
+            f"{email} is not a teacher's login; it cannot be given classes."
+            for email in result["not_teachers"]
+        ])
+    if result["missing_logins"]:
+        raise RosterImportError([
+            f"{email} has no login yet; add a teacher_password for them."
+            for email in result["missing_logins"]
+        ])
+
+    return result
@@ -0,0 +1,6 @@
+function toggleNav() {
+  const nav = document.querySelector('.nav-links');
+  const icon = document.getElementById('nav-icon');
+  nav.classList.toggle('active');
+  icon.textContent = nav.classList.contains('active') ? '✕' : '☰';
+}
@@ -0,0 +1,206 @@
+import random
+from datetime import date, datetime, timedelta
+
+from db import (
+    _rebuild_learner_skill_state,
+    _rebuild_rollups,
+    bulk_observation_load,
+    get_db,
+    hash_password,
+    invalidate_roster_cache,
+    mark_dashboard_stale,
+    migrate,
+)
+
+# The schema has one school per database, so "schools" are kept apart
+# by teacher email domain (school1.synthetic.test, ...) and class name.
+SYNTHETIC_DOMAIN = "synthetic.test"
+SYNTHETIC_PASSWORD = "password123"
+
+SUBJECTS = ["Mathematics", "English", "Kiswahili", "Biology", "Chemistry",
+            "Physics", "History", "Geography", "CRE", "Business Studies"]
+ACTIVITIES = ["Group work", "Oral response", "Practical task", "Written task", "Observation"]
+SKILLS = ["Communication", "Collaboration", "Critical thinking", "Creativity",
+          "Self-management", "Digital literacy", "Citizenship", "Learning to learn"]
+LEVELS = ["Doing well", "Improving", "Needs support"]
+LEVEL_WEIGHTS = [5, 4, 2]
+
+FIRST_NAMES = ["Amina", "Brian", "Faith", "John", "Sarah", "Mark", "Lucy", "Daniel",
+               "Mercy", "Kevin", "Ann", "Peter", "Joyce", "Samuel", "Grace", "Allan",
+               "Ruth", "Dennis", "Emily", "Victor", "Janet", "Paul", "Beatrice", "Caleb"]
+LAST_NAMES = ["Kamau", "Achieng", "Mwangi", "Wanjiku", "Otieno", "Njeri", "Kiptoo",
+              "Atieno", "Mutua", "Wambui", "Ouma", "Chebet", "Kariuki", "Muthoni",
+              "Kiplagat", "Nyambura", "Onyango", "Wairimu", "Rotich", "Auma"]
+NOTE_WORDS = ["explained", "shared", "listened", "asked", "helped", "peers", "group",
+              "clearly", "confidently", "needed", "prompting", "materials", "answer",
+              "question", "task", "finished", "early", "support", "idea", "model"]
+
+INSERT_BATCH_SIZE = 10000
+
+
+def _names(rng, count):
+    return [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(count)]
+
+
+def _note(rng):
+    # about a third of observations carry no note, as in real use
+    if rng.random() < 0.35:
+        return None
+    return " ".join(rng.choice(NOTE_WORDS) for _ in range(rng.randint(3, 12))).capitalize()
+
+
+def generate(
+    schools=1,
+    teachers_per_school=20,
+    classes_per_teacher=3,
+    learners_per_class=40,
+    observations=100000,
+    days=180,
+    end_date=None,
+    seed=42,
+    batch_size=INSERT_BATCH_SIZE,
+    progress=None,
+):
+    """
+    Fills the database with deterministic synthetic data: the same
+    arguments (including end_date) always produce the same rows.
+
+    Roster rows go in with executemany; observations are streamed in
+    batches of batch_size per executemany, all in one transaction.
+    The search index, rollups and learner_skill_state are rebuilt once
+    at the end instead of row by row. Returns a summary of what was
+    written.
+    """
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    end = datetime.combine(end_date, datetime.min.time()) + timedelta(days=1)
+    span_seconds = days * 24 * 3600
+
+    conn = get_db()
+    migrate(conn)
+    cur = conn.cursor()
+
+    cur.execute(
+        "SELECT COUNT(*) FROM teachers WHERE email LIKE ?",
+        (f"%.{SYNTHETIC_DOMAIN}",)
+    )
+    if cur.fetchone()[0]:
+        raise ValueError("Database already holds synthetic data; start from a fresh one.")
+
+    # one hash for every synthetic login: hashing is deliberately slow
+    password_hash = hash_password(SYNTHETIC_PASSWORD)
+
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        teachers = []
+        for school in range(1, schools + 1):
+            for n in range(1, teachers_per_school + 1):
+                email = f"teacher{n}@school{school}.{SYNTHETIC_DOMAIN}"
+                teachers.append((email, *_names(rng, 1), rng.choice(SUBJECTS)))
+
+        cur.executemany(
+            "INSERT INTO users (email, password_hash, role) VALUES (?, ?, 'teacher')",
+            [(email, password_hash) for email, _, _ in teachers]
+        )
+        cur.executemany(
+            "INSERT INTO teachers (email, name, subject) VALUES (?, ?, ?)",
+            teachers
+        )
+
+        cur.execute(
+            "SELECT id, email, subject FROM teachers WHERE email LIKE ? ORDER BY id",
+            (f"%.{SYNTHETIC_DOMAIN}",)
+        )
+        teacher_rows = cur.fetchall()
+
+        classes = []
+        for t in teacher_rows:
+            for n in range(classes_per_teacher):
+                grade = 7 + (n % 6)
+                section = chr(ord("A") + (t["id"] + n) % 26)
+                classes.append((t["id"], f"Grade {grade} {section}", t["subject"]))
+        cur.executemany(
+            "INSERT INTO classes (teacher_id, name, subject) VALUES (?, ?, ?)",
+            classes
+        )
+
+        cur.execute("""
+            SELECT c.id, c.name, c.teacher_id
+            FROM classes c
+            JOIN teachers t ON t.id = c.teacher_id
+            WHERE t.email LIKE ?
+            ORDER BY c.id
+        """, (f"%.{SYNTHETIC_DOMAIN}",))
+        class_rows = cur.fetchall()
+
+        cur.executemany(
+            "INSERT INTO learners (class_id, name) VALUES (?, ?)",
+            [
+                (c["id"], name)
+                for c in class_rows
+                for name in _names(rng, learners_per_class)
+            ]
+        )
+
+        cur.execute("""
+            SELECT l.id, l.class_id
+            FROM learners l
+            JOIN classes c ON c.id = l.class_id
+            JOIN teachers t ON t.id = c.teacher_id
+            WHERE t.email LIKE ?
+            ORDER BY l.id
+        """, (f"%.{SYNTHETIC_DOMAIN}",))
+        class_info = {c["id"]: (c["teacher_id"], c["name"]) for c in class_rows}
+        learners = [(row["id"], *class_info[row["class_id"]]) for row in cur.fetchall()]
+
+        written = 0
+        with bulk_observation_load(cur):
+            while written < observations:
+                count = min(batch_size, observations - written)
+                batch = []
+                for _ in range(count):
+                    learner_id, teacher_id, class_name = rng.choice(learners)
+                    created_at = end - timedelta(seconds=rng.randrange(span_seconds))
+                    batch.append((
+                        teacher_id,
+                        class_name,
+                        learner_id,
+                        rng.choice(ACTIVITIES),
+                        rng.choice(SKILLS),
+                        rng.choices(LEVELS, LEVEL_WEIGHTS)[0],
+                        _note(rng),
+                        created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    ))
+                cur.executemany(
+                    """
+                    INSERT INTO observations
+                    (teacher_id, class_name, learner_id, activity, skill, level, note, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    batch
+                )
+                written += count
+                if progress:
+                    progress(written, observations)
+
+        _rebuild_rollups(cur)
+        _rebuild_learner_skill_state(cur)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    invalidate_roster_cache()
+    mark_dashboard_stale()
+
+    return {
+        "seed": seed,
+        "end_date": end_date.isoformat(),
+        "days": days,
+        "schools": schools,
+        "teachers": len(teacher_rows),
+        "classes": len(class_rows),
+        "learners": len(learners),
+        "observations": written,
+    }
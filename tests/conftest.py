@@ -0,0 +1,62 @@
+import pytest
+
+import db
+import heatmap
+from app import create_app
+
+# a seeded demo teacher with classes and learners from init_db
+TEACHER_EMAIL = "brian@school.test"
+TEACHER_PASSWORD = "password123"
+
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    The app on a fresh database under tmp_path, migrated and seeded
+    with the demo school.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "DATABASE": str(tmp_path / "cbc.db"),
+        "ASSETS_BUILD": False,
+        "SLOW_QUERY_MS": 0,
+    })
+    yield app
+
+    # the group-commit writer keeps a connection of its own
+    db.disable_group_commit()
+    db.invalidate_roster_cache()
+    db._dashboard_snapshot.reset()
+    heatmap._matrix_cache.clear()
+    db.reset_pool()
+
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def teacher(ctx):
+    return db.get_db().execute(
+        "SELECT id, name, email FROM teachers WHERE email = ?", (TEACHER_EMAIL,)
+    ).fetchone()
+
+
+def sign_in(app, path, email, password):
+    client = app.test_client()
+    response = client.post(path, data={"email": email, "password": password})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def teacher_client(app):
+    return sign_in(app, "/", TEACHER_EMAIL, TEACHER_PASSWORD)
+
+
+@pytest.fixture
+def principal_client(app):
+    return sign_in(app, "/principal/login", "principal@school.test", "admin123")
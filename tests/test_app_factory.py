@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+from app import _instance_secret_key, config_from_env, create_app
+from db import get_db
+
+
+def test_config_from_env_reads_cbc_variables():
+    config = config_from_env({
+        "CBC_GROUP_COMMIT": "1",
+        "CBC_SLOW_QUERY_MS": "40",
+        "CBC_ASSETS_BUILD": "0",
+        "CBC_DATABASE": "/srv/cbc/cbc.db",
+        "CBC_SECRET_KEY": "from-env",
+    })
+
+    assert config["GROUP_COMMIT"] is True
+    assert config["SLOW_QUERY_MS"] == 40
+    assert config["ASSETS_BUILD"] is False
+    assert config["DATABASE"] == "/srv/cbc/cbc.db"
+    assert config["SECRET_KEY"] == "from-env"
+    assert config["OBSERVATIONS_PAGE_SIZE"] == 50
+
+
+def test_config_from_env_leaves_unset_keys_to_create_app():
+    config = config_from_env({})
+
+    assert "SECRET_KEY" not in config and "DATABASE" not in config
+    assert config["GROUP_COMMIT"] is False
+    assert config["INIT_DB"] is True
+
+
+def test_create_app_config_wins_over_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("CBC_SLOW_QUERY_MS", "40")
+    monkeypatch.setenv("CBC_SECRET_KEY", "from-env")
+    app = create_app({
+        "SECRET_KEY": "explicit",
+        "DATABASE": str(tmp_path / "cbc.db"),
+        "ASSETS_BUILD": False,
+        "SLOW_QUERY_MS": 0,
+        "INIT_DB": False,
+    })
+
+    assert app.config["SECRET_KEY"] == "explicit"
+    assert app.config["SLOW_QUERY_MS"] == 0
+    # INIT_DB off: nothing touched the database file
+    assert not (tmp_path / "cbc.db").exists()
+
+
+def test_instance_secret_key_is_created_once(tmp_path):
+    instance = SimpleNamespace(instance_path=str(tmp_path / "instance"))
+
+    key = _instance_secret_key(instance)
+    assert len(key) == 64
+    assert _instance_secret_key(instance) == key
+    assert (tmp_path / "instance" / "secret_key").stat().st_mode & 0o777 == 0o600
+
+
+def test_create_app_migrates_and_seeds(app):
+    with app.app_context():
+        teachers = get_db().execute("SELECT COUNT(*) FROM teachers").fetchone()[0]
+    assert teachers > 0
+    assert app.test_client().get("/").status_code == 200
+
+
+def test_every_app_gets_the_routes(app, tmp_path):
+    other = create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "DATABASE": app.config["DATABASE"],
+        "ASSETS_BUILD": False,
+        "SLOW_QUERY_MS": 0,
+    })
+
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()}
+    assert endpoints == {rule.endpoint for rule in other.url_map.iter_rules()}
+    assert "dashboard" in endpoints
+    assert "generate-data" in app.cli.commands and "generate-data" in other.cli.commands
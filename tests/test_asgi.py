@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from contextlib import aclosing
+
+import db
+from asgi import AsgiApp
+from db import DbExecutor
+
+
+def test_iterate_keeps_sqlite_off_the_loop(app, monkeypatch):
+    threads = []
+    acquire, release = db._acquire, db._release
+
+    def tracked_acquire():
+        threads.append(("acquire", threading.current_thread().name))
+        return acquire()
+
+    def tracked_release(conn):
+        threads.append(("release", threading.current_thread().name))
+        release(conn)
+
+    monkeypatch.setattr(db, "_acquire", tracked_acquire)
+    monkeypatch.setattr(db, "_release", tracked_release)
+
+    def teacher_ids():
+        cur = db.get_db().cursor()
+        cur.execute("SELECT id FROM teachers ORDER BY id")
+        yield from (row["id"] for row in cur)
+
+    async def read_all():
+        executor = DbExecutor(2)
+        try:
+            async with aclosing(executor.iterate(teacher_ids)) as rows:
+                return [row async for row in rows]
+        finally:
+            executor.shutdown()
+
+    assert asyncio.run(read_all())
+    assert [event for event, _ in threads] == ["acquire", "release"]
+    assert all(name.startswith("cbc-db") for _, name in threads)
+
+
+def _call(asgi_app, method, path, body=b"", headers=()):
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        try:
+            await asgi_app(scope, receive, send)
+        finally:
+            asgi_app.executor.shutdown()
+
+    asyncio.run(run())
+    start = sent[0]
+    return start["status"], dict(start["headers"]), b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def test_sync_over_asgi_matches_the_flask_view(app, teacher_client):
+    cookie = teacher_client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+    body = b'{"observations": []}'
+    headers = [("cookie", f"{cookie.key}={cookie.value}"), ("content-type", "application/json")]
+
+    status, _, data = _call(AsgiApp(app), "POST", "/api/sync/observations", body, headers)
+    flask = teacher_client.post("/api/sync/observations", data=body, content_type="application/json")
+
+    assert (status, data) == (flask.status_code, flask.data)
+
+
+def test_other_routes_go_to_flask(app):
+    status, headers, _ = _call(AsgiApp(app), "GET", "/dashboard")
+    assert status == 302
+    assert headers[b"location"].endswith(b"/")
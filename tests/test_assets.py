@@ -0,0 +1,89 @@
+import gzip
+
+import pytest
+
+from app import create_app
+from assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    MANIFEST_NAME,
+    build_assets,
+    load_manifest,
+    minify_css,
+    prune_assets,
+)
+
+
+@pytest.fixture
+def built_app(app, tmp_path):
+    """
+    A second app on the same database that builds its assets into
+    tmp_path instead of relying on a static/dist left by an earlier run.
+    """
+    return create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "DATABASE": app.config["DATABASE"],
+        "SLOW_QUERY_MS": 0,
+        "ASSETS_BUILD": True,
+        "ASSETS_FOLDER": str(tmp_path / "built"),
+    })
+
+
+def test_minify_css_keeps_descendant_selectors():
+    css = "/* nav */\n.nav a:hover ,\n.nav  li > a {\n  color: red;\n  margin: 0 auto;\n}\n"
+    assert minify_css(css) == ".nav a:hover,.nav li>a{color:red;margin:0 auto}"
+
+
+def test_build_writes_fingerprinted_and_compressed_copies(app, tmp_path):
+    out = tmp_path / "dist"
+    manifest = build_assets(app.static_folder, out)
+
+    built = manifest["css/base.css"]
+    assert built.startswith("css/base.") and built.endswith(".css") and built != "css/base.css"
+    assert gzip.decompress((out / (built + ".gz")).read_bytes()) == (out / built).read_bytes()
+    assert load_manifest(out) == manifest
+
+    # unchanged sources are not rewritten
+    mtime = (out / built).stat().st_mtime_ns
+    assert build_assets(app.static_folder, out) == manifest
+    assert (out / built).stat().st_mtime_ns == mtime
+
+
+def test_prune_removes_only_unreferenced_files(app, tmp_path):
+    out = tmp_path / "dist"
+    manifest = build_assets(app.static_folder, out)
+    stale = out / "css" / "base.000000000000.css"
+    stale.write_text("old")
+    (out / "css" / "base.000000000000.css.gz").write_bytes(b"old")
+
+    assert prune_assets(out, manifest) == [
+        "css/base.000000000000.css", "css/base.000000000000.css.gz",
+    ]
+    assert (out / MANIFEST_NAME).exists()
+    assert all((out / built).exists() for built in manifest.values())
+
+
+def test_pages_link_the_fingerprinted_stylesheet(built_app):
+    built = built_app.extensions["assets"]["css/base.css"]
+    assert f"/assets/{built}".encode() in built_app.test_client().get("/").data
+
+
+def test_asset_is_served_precompressed_and_immutable(built_app):
+    url = "/assets/" + built_app.extensions["assets"]["css/base.css"]
+    client = built_app.test_client()
+
+    zipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert zipped.status_code == 200
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    assert zipped.mimetype == "text/css"
+
+    plain = client.get(url)
+    assert "Content-Encoding" not in plain.headers
+    assert gzip.decompress(zipped.data) == plain.data
+
+
+def test_compressed_variants_are_not_served_directly(built_app):
+    url = "/assets/" + built_app.extensions["assets"]["css/base.css"] + ".gz"
+    assert built_app.test_client().get(url).status_code == 404
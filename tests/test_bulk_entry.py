@@ -0,0 +1,65 @@
+import pytest
+
+from db import (
+    check_rollups,
+    get_classes_for_teacher,
+    get_db,
+    get_learners_for_class,
+    save_observations_bulk,
+)
+
+
+@pytest.fixture
+def roster(teacher):
+    class_row = get_classes_for_teacher(teacher["id"])[0]
+    return class_row, get_learners_for_class(class_row["id"])
+
+
+def _count(teacher_id, activity):
+    return get_db().execute(
+        "SELECT COUNT(*) FROM observations WHERE teacher_id = ? AND activity = ?",
+        (teacher_id, activity)
+    ).fetchone()[0]
+
+
+def test_bulk_save_keeps_rollups_in_step(teacher, roster):
+    class_row, learners = roster
+    saved = save_observations_bulk(
+        teacher["id"], class_row["name"], "Class debate", "Communication",
+        [(learner["id"], "Doing well", "") for learner in learners[:5]]
+    )
+
+    assert saved == 5
+    assert _count(teacher["id"], "Class debate") == 5
+    assert check_rollups() == []
+
+
+def test_class_form_saves_only_learners_with_a_level(teacher_client, teacher, roster):
+    class_row, learners = roster
+    form = {"activity": "Class debate", "skill": "Communication"}
+    for learner in learners[:3]:
+        form[f"level_{learner['id']}"] = "Improving"
+        form[f"note_{learner['id']}"] = "spoke up"
+
+    response = teacher_client.post(f"/observe/class?class_id={class_row['id']}", data=form)
+    assert response.status_code == 302
+    assert _count(teacher["id"], "Class debate") == 3
+
+
+def test_class_form_without_levels_saves_nothing(teacher_client, teacher, roster):
+    class_row, _ = roster
+    response = teacher_client.post(
+        f"/observe/class?class_id={class_row['id']}",
+        data={"activity": "Class debate", "skill": "Communication"}
+    )
+    assert response.status_code == 200
+    assert _count(teacher["id"], "Class debate") == 0
+
+
+def test_class_form_for_another_teachers_class_is_403(teacher_client):
+    other_class = get_db().execute("""
+        SELECT classes.id FROM classes
+        JOIN teachers ON classes.teacher_id = teachers.id
+        WHERE teachers.email = 'grace@school.test'
+    """).fetchone()
+    assert teacher_client.get(f"/observe/class?class_id={other_class['id']}").status_code == 403
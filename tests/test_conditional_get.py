@@ -0,0 +1,60 @@
+import pytest
+
+from db import get_classes_for_teacher, get_db, get_learners_for_class, save_observation
+
+
+def _observe(email):
+    teacher_id = get_db().execute("SELECT id FROM teachers WHERE email = ?", (email,)).fetchone()[0]
+    class_row = get_classes_for_teacher(teacher_id)[0]
+    learner = get_learners_for_class(class_row["id"])[0]
+    save_observation(teacher_id, class_row["name"], learner["id"],
+                     "Group work", "Communication", "Doing well", "")
+
+
+@pytest.mark.parametrize("path", ["/dashboard", "/week", "/show", "/reports"])
+def test_unchanged_page_is_304(teacher_client, path):
+    first = teacher_client.get(path)
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = teacher_client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_own_write_changes_the_etag(teacher_client, teacher):
+    etag = teacher_client.get("/dashboard").headers["ETag"]
+
+    _observe(teacher["email"])
+    response = teacher_client.get("/dashboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_other_teachers_write_keeps_the_etag(teacher_client, ctx):
+    etag = teacher_client.get("/dashboard").headers["ETag"]
+
+    _observe("grace@school.test")
+    assert teacher_client.get("/dashboard", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_etag_depends_on_the_query_string(teacher_client):
+    etag = teacher_client.get("/reports").headers["ETag"]
+    assert teacher_client.get("/reports?page_size=5", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_if_modified_since(teacher_client):
+    last_modified = teacher_client.get("/dashboard").headers["Last-Modified"]
+    response = teacher_client.get("/dashboard", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+
+def test_principal_dashboard_is_304(principal_client):
+    etag = principal_client.get("/principal/dashboard").headers["ETag"]
+    response = principal_client.get("/principal/dashboard", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_signed_out_request_is_not_answered_from_cache(app):
+    response = app.test_client().get("/dashboard", headers={"If-None-Match": "*"})
+    assert response.status_code == 302
@@ -0,0 +1,67 @@
+import time
+
+import db
+from db import DashboardSnapshot, get_db, get_principal_dashboard_summary
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"calls": self.calls}
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_first_read_computes_inline_then_serves_the_snapshot():
+    compute = Counter()
+    snapshot = DashboardSnapshot(compute, interval=3600, min_gap=0)
+
+    assert snapshot.get() == {"calls": 1}
+    assert snapshot.get() == {"calls": 1}
+    assert compute.calls == 1
+
+
+def test_marking_stale_refreshes_in_the_background():
+    compute = Counter()
+    snapshot = DashboardSnapshot(compute, interval=3600, min_gap=0)
+    snapshot.get()
+
+    snapshot.mark_stale()
+    assert _wait_for(lambda: snapshot.get() == {"calls": 2})
+
+
+def test_writes_mark_the_snapshot_stale(teacher, monkeypatch):
+    marked = []
+    monkeypatch.setattr(db, "mark_dashboard_stale", lambda: marked.append(True))
+
+    class_row = db.get_classes_for_teacher(teacher["id"])[0]
+    learner = db.get_learners_for_class(class_row["id"])[0]
+    db.save_observation(teacher["id"], class_row["name"], learner["id"],
+                        "Group work", "Communication", "Doing well", "")
+    assert marked == [True]
+
+
+def test_summary_matches_raw_counts(ctx):
+    summary = get_principal_dashboard_summary()
+    conn = get_db()
+
+    assert summary["total_teachers"] == conn.execute("SELECT COUNT(*) FROM teachers").fetchone()[0]
+    assert summary["total_classes"] == conn.execute("SELECT COUNT(*) FROM classes").fetchone()[0]
+    assert summary["total_learners"] == conn.execute("SELECT COUNT(*) FROM learners").fetchone()[0]
+    assert summary["taken_at"]
+
+
+def test_dashboard_shows_when_figures_were_taken(principal_client):
+    response = principal_client.get("/principal/dashboard")
+    assert response.status_code == 200
+    assert b"Figures as of" in response.data
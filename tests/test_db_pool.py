@@ -0,0 +1,53 @@
+import db
+from db import POOL_SIZE, get_db
+
+
+def test_one_connection_per_app_context(app):
+    with app.app_context():
+        conn = get_db()
+        assert get_db() is conn
+
+    # handed back on teardown and reused by the next request
+    with app.app_context():
+        assert get_db() is conn
+
+
+def test_production_pragmas(ctx):
+    conn = get_db()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == db.BUSY_TIMEOUT_MS
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+
+def test_open_transaction_is_rolled_back_on_release(app):
+    with app.app_context():
+        conn = get_db()
+        conn.execute("UPDATE users SET is_active = 0 WHERE email = 'amina@school.test'")
+        assert conn.in_transaction
+
+    with app.app_context():
+        assert get_db() is conn
+        assert not conn.in_transaction
+        active = conn.execute("SELECT is_active FROM users WHERE email = 'amina@school.test'").fetchone()[0]
+        assert active == 1
+
+
+def test_pool_is_bounded(app):
+    db.reset_pool()
+    conns = [db._connect() for _ in range(POOL_SIZE + 2)]
+    for conn in conns:
+        db._release(conn)
+    assert db._pool.qsize() == POOL_SIZE
+    # the extras were closed, not kept
+    closed = 0
+    for conn in conns:
+        try:
+            conn.execute("SELECT 1")
+        except Exception:
+            closed += 1
+    assert closed == 2
+
+
+def test_login_uses_the_pool(teacher_client):
+    assert teacher_client.get("/dashboard").status_code == 200
@@ -0,0 +1,71 @@
+import csv
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from db import (
+    get_classes_for_teacher,
+    get_db,
+    get_learners_for_class,
+    iter_observation_batches,
+    save_observation,
+    soft_delete_observation,
+)
+
+
+def _observe_class(teacher_id, note, count):
+    class_row = get_classes_for_teacher(teacher_id)[0]
+    for learner in get_learners_for_class(class_row["id"])[:count]:
+        save_observation(teacher_id, class_row["name"], learner["id"],
+                         "Group work", "Communication", "Improving", note)
+    return get_db().execute("SELECT MAX(id) FROM observations").fetchone()[0]
+
+
+@pytest.fixture
+def observed(teacher):
+    other = get_db().execute("SELECT id FROM teachers WHERE email = 'grace@school.test'").fetchone()
+    last_id = _observe_class(teacher["id"], "mine", 4)
+    soft_delete_observation(last_id, teacher["id"])
+    _observe_class(other["id"], "theirs", 2)
+    return teacher
+
+
+def _csv(response):
+    return list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+
+def test_batches_cover_every_live_row_once(observed):
+    rows = [row["id"] for batch in iter_observation_batches(observed["id"], batch_size=2) for row in batch]
+    assert len(rows) == len(set(rows)) == 3
+
+
+def test_teacher_csv_has_only_their_live_rows(teacher_client, observed):
+    response = teacher_client.get("/reports/export.csv")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert "attachment" in response.headers["Content-Disposition"]
+
+    rows = _csv(response)
+    assert rows[0] == ["Date", "Class", "Learner", "Activity", "Skill", "Level", "Note"]
+    assert [row[-1] for row in rows[1:]] == ["mine"] * 3
+
+
+def test_teacher_xlsx_matches_csv(teacher_client, observed):
+    response = teacher_client.get("/reports/export.xlsx")
+    assert response.status_code == 200
+
+    sheet = load_workbook(io.BytesIO(response.data), read_only=True)["Observations"]
+    rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+    assert rows[0][0] == "Date"
+    assert [row[-1] for row in rows[1:]] == ["mine"] * 3
+
+
+def test_principal_csv_covers_the_school(principal_client, observed):
+    rows = _csv(principal_client.get("/principal/reports/export.csv"))
+    assert rows[0][0] == "Teacher"
+    assert sorted(row[-1] for row in rows[1:]) == ["mine"] * 3 + ["theirs"] * 2
+
+
+def test_exports_need_sign_in(app):
+    assert app.test_client().get("/reports/export.csv").status_code == 302
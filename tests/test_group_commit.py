@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+
+import pytest
+
+import db
+from db import (
+    WriteQueue,
+    check_rollups,
+    get_classes_for_teacher,
+    get_db,
+    get_learners_for_class,
+    save_observation,
+    save_observations_bulk,
+    sync_observations,
+)
+
+
+@pytest.fixture
+def numbers(ctx):
+    conn = get_db()
+    conn.execute("CREATE TABLE numbers (value INTEGER UNIQUE)")
+    conn.commit()
+    return conn
+
+
+def _insert(cur, value):
+    cur.execute("INSERT INTO numbers (value) VALUES (?)", (value,))
+    return value
+
+
+def _values(conn):
+    return sorted(row[0] for row in conn.execute("SELECT value FROM numbers"))
+
+
+def test_failing_op_fails_alone(numbers):
+    writes = WriteQueue(max_batch=8, max_wait=0.2)
+    try:
+        # queued together, so they share one transaction
+        futures = [writes.submit(_insert, value) for value in (1, 2, 2, 3)]
+
+        assert futures[0].result() == 1
+        assert futures[1].result() == 2
+        with pytest.raises(sqlite3.IntegrityError):
+            futures[2].result()
+        assert futures[3].result() == 3
+    finally:
+        writes.stop()
+
+    assert _values(numbers) == [1, 2, 3]
+
+
+def test_result_is_committed_when_the_future_resolves(numbers):
+    writes = WriteQueue()
+    try:
+        writes.submit(_insert, 7).result()
+        # a fresh connection sees it: the group was committed, not pending
+        other = db._connect()
+        assert _values(other) == [7]
+        other.close()
+    finally:
+        writes.stop()
+
+
+def test_direct_write_rolls_back_a_failing_op(numbers):
+    def insert_then_fail(cur):
+        _insert(cur, 1)
+        _insert(cur, 1)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db._write(insert_then_fail)
+
+    assert not numbers.in_transaction
+    assert _values(numbers) == []
+
+
+def test_observation_writes_through_the_writer(app, teacher):
+    db.enable_group_commit(max_wait=0.05)
+    class_row = get_classes_for_teacher(teacher["id"])[0]
+    learners = get_learners_for_class(class_row["id"])
+
+    ids = []
+
+    def save(learner):
+        with app.app_context():
+            ids.append(save_observation(
+                teacher["id"], class_row["name"], learner["id"],
+                "Group work", "Communication", "Doing well", ""
+            ))
+
+    threads = [threading.Thread(target=save, args=(learner,)) for learner in learners[:6]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == 6 and None not in ids
+
+    assert save_observations_bulk(
+        teacher["id"], class_row["name"], "Class debate", "Communication",
+        [(learner["id"], "Improving", "") for learner in learners[:3]]
+    ) == 3
+
+    item = {
+        "client_uuid": "0f4d3c8e-6a43-4a8e-9d53-0c4a1f2e7b11",
+        "learner_id": learners[0]["id"],
+        "class_name": class_row["name"],
+        "activity": "Group work",
+        "skill": "Collaboration",
+        "level": "Improving",
+        "note": "",
+        "observed_at": None,
+    }
+    [(status, observation_id)] = sync_observations(teacher["id"], [item])
+    assert status == "created"
+    assert sync_observations(teacher["id"], [item]) == [("duplicate", observation_id)]
+
+    assert check_rollups() == []
@@ -0,0 +1,46 @@
+import csv
+import io
+
+import pytest
+
+from db import get_classes_for_teacher, get_learners_for_class, save_observation
+
+
+@pytest.fixture
+def class_row(teacher):
+    return get_classes_for_teacher(teacher["id"])[0]
+
+
+@pytest.mark.parametrize("path", ["/heatmap", "/heatmap.json", "/heatmap.csv"])
+def test_class_without_observations(teacher_client, class_row, path):
+    response = teacher_client.get(f"{path}?class_id={class_row['id']}")
+    assert response.status_code == 200
+
+
+def test_exports_for_class_without_observations(app, teacher_client, class_row):
+    with app.app_context():
+        learners = get_learners_for_class(class_row["id"])
+
+    payload = teacher_client.get(f"/heatmap.json?class_id={class_row['id']}").get_json()
+    assert payload["skills"] == []
+    assert payload["cells"] == [[] for _ in learners]
+
+    rows = list(csv.reader(io.StringIO(
+        teacher_client.get(f"/heatmap.csv?class_id={class_row['id']}").get_data(as_text=True)
+    )))
+    assert rows[0] == ["Class", "Learner", "Learner ID"]
+    assert len(rows) == len(learners) + 1
+
+
+def test_exports_show_latest_level(app, teacher, teacher_client, class_row):
+    learner = get_learners_for_class(class_row["id"])[0]
+    # cache the empty matrix first: the write must invalidate it
+    teacher_client.get(f"/heatmap.json?class_id={class_row['id']}")
+
+    save_observation(teacher["id"], class_row["name"], learner["id"],
+                     "Group work", "Communication", "Improving", "")
+
+    payload = teacher_client.get(f"/heatmap.json?class_id={class_row['id']}").get_json()
+    assert payload["skills"] == ["Communication"]
+    row = [l["id"] for l in payload["learners"]].index(learner["id"])
+    assert payload["cells"][row] == [payload["levels"].index("Improving") + 1]
@@ -0,0 +1,64 @@
+import pytest
+
+from db import (
+    decode_cursor,
+    get_classes_for_teacher,
+    get_learners_for_class,
+    get_observations_page,
+    save_observation,
+)
+
+
+@pytest.fixture
+def observed(teacher):
+    class_row = get_classes_for_teacher(teacher["id"])[0]
+    # saved within the same second: created_at ties, broken by id
+    for learner in get_learners_for_class(class_row["id"])[:7]:
+        save_observation(teacher["id"], class_row["name"], learner["id"],
+                         "Group work", "Communication", "Doing well", "")
+    return teacher
+
+
+@pytest.mark.parametrize("cursor", ["", "garbage", "2026-01-01 00:00:00|", "2026-01-01|x", "|5"])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_decode_cursor_round_trip():
+    assert decode_cursor("2026-01-01 08:00:00|42") == ("2026-01-01 08:00:00", 42)
+
+
+@pytest.mark.parametrize("path", ["/observations", "/reports"])
+@pytest.mark.parametrize("param", ["before", "after"])
+def test_bad_cursor_is_400(teacher_client, path, param):
+    assert teacher_client.get(f"{path}?{param}=garbage").status_code == 400
+
+
+def test_pages_neither_repeat_nor_skip(observed):
+    teacher_id = observed["id"]
+    everything = [row["id"] for row in get_observations_page(teacher_id, limit=1000)["observations"]]
+    assert len(everything) >= 7
+
+    pages, seen = [], []
+    page = get_observations_page(teacher_id, limit=3)
+    assert page["newer"] is None
+    while True:
+        pages.append(page)
+        seen.extend(row["id"] for row in page["observations"])
+        if page["older"] is None:
+            break
+        page = get_observations_page(teacher_id, before=page["older"], limit=3)
+
+    assert seen == everything
+
+    # and back again: each `after` page is the page before it
+    for older, newer in zip(pages[1:], pages):
+        back = get_observations_page(teacher_id, after=older["newer"], limit=3)
+        assert [row["id"] for row in back["observations"]] == [row["id"] for row in newer["observations"]]
+
+
+def test_valid_cursor_pages_render(teacher_client, observed):
+    first = get_observations_page(observed["id"], limit=3)
+    response = teacher_client.get(f"/observations?before={first['older']}&page_size=3")
+    assert response.status_code == 200
@@ -0,0 +1,85 @@
+import pytest
+
+from db import (
+    get_classes_for_teacher,
+    get_db,
+    get_learner_skill_states,
+    get_learners_for_class,
+    save_observation,
+    save_observations_bulk,
+    soft_delete_observation,
+    update_observation,
+)
+
+
+@pytest.fixture
+def roster(teacher):
+    class_row = get_classes_for_teacher(teacher["id"])[0]
+    return class_row, get_learners_for_class(class_row["id"])
+
+
+def _other_class_and_learner():
+    return get_db().execute("""
+        SELECT classes.id AS class_id, learners.id AS learner_id
+        FROM learners
+        JOIN classes ON learners.class_id = classes.id
+        JOIN teachers ON classes.teacher_id = teachers.id
+        WHERE teachers.email = 'grace@school.test'
+    """).fetchone()
+
+
+def _states(learner_id):
+    return {row["skill"]: (row["latest_level"], row["observations"])
+            for row in get_learner_skill_states(learner_id)}
+
+
+def test_state_follows_save_edit_and_delete(teacher, roster):
+    class_row, learners = roster
+    learner = learners[0]
+    before = _states(learner["id"]).get("Creativity", (None, 0))[1]
+
+    first = save_observation(teacher["id"], class_row["name"], learner["id"],
+                             "Drawing", "Creativity", "Needs support", "")
+    second = save_observation(teacher["id"], class_row["name"], learner["id"],
+                              "Drawing", "Creativity", "Doing well", "")
+    assert _states(learner["id"])["Creativity"] == ("Doing well", before + 2)
+
+    # moving an observation to another skill refreshes both skills
+    update_observation(second, teacher["id"], "Drawing", "Self-efficacy", "Improving", "")
+    states = _states(learner["id"])
+    assert states["Creativity"][1] == before + 1
+    assert states["Self-efficacy"][0] == "Improving"
+
+    soft_delete_observation(first, teacher["id"])
+    soft_delete_observation(second, teacher["id"])
+    assert _states(learner["id"]).get("Creativity", (None, 0))[1] == before
+
+
+def test_bulk_entry_updates_state(teacher, roster):
+    class_row, learners = roster
+    save_observations_bulk(
+        teacher["id"], class_row["name"], "Class debate", "Citizenship",
+        [(learner["id"], "Improving", "") for learner in learners[:3]]
+    )
+    for learner in learners[:3]:
+        assert _states(learner["id"])["Citizenship"][0] == "Improving"
+
+
+def test_own_class_roster_renders(teacher_client, roster):
+    class_row, _ = roster
+    assert teacher_client.get(f"/learners?class_id={class_row['id']}").status_code == 200
+
+
+def test_another_teachers_class_roster_is_403(teacher_client, ctx):
+    other = _other_class_and_learner()
+    assert teacher_client.get(f"/learners?class_id={other['class_id']}").status_code == 403
+
+
+def test_another_teachers_learner_profile_is_403(teacher_client, ctx):
+    other = _other_class_and_learner()
+    assert teacher_client.get(f"/learner/{other['learner_id']}").status_code == 403
+
+
+def test_principal_sees_any_learner_profile(principal_client, ctx):
+    other = _other_class_and_learner()
+    assert principal_client.get(f"/learner/{other['learner_id']}").status_code == 200
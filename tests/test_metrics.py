@@ -0,0 +1,46 @@
+import pytest
+
+from metrics import render_metrics
+
+TOKEN = "scrape-secret"
+
+
+@pytest.fixture
+def token(app, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", TOKEN)
+    return TOKEN
+
+
+def test_anonymous_is_401(app):
+    assert app.test_client().get("/metrics").status_code == 401
+
+
+def test_teacher_is_401(teacher_client):
+    assert teacher_client.get("/metrics").status_code == 401
+
+
+def test_principal_can_read(principal_client):
+    principal_client.get("/principal/dashboard")
+
+    response = principal_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    assert 'endpoint="principal_dashboard",method="GET",status="200"' in response.get_data(as_text=True)
+
+
+def test_bearer_token(app, token):
+    client = app.test_client()
+    assert client.get("/metrics", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+
+def test_no_token_configured_rejects_empty_bearer(app, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", None)
+    assert app.test_client().get("/metrics", headers={"Authorization": "Bearer "}).status_code == 401
+
+
+def test_sql_is_counted_per_endpoint(teacher_client):
+    teacher_client.get("/dashboard")
+    # a teacher can't read /metrics, so render it directly
+    text = render_metrics()
+    assert 'cbc_sql_queries_per_request_count{endpoint="dashboard"}' in text
@@ -0,0 +1,54 @@
+import shutil
+
+import pytest
+
+import db
+from db import BASE_DIR, MIGRATIONS, check_query_plans, get_db, get_schema_version, migrate
+
+
+@pytest.fixture
+def empty_app(app, tmp_path, monkeypatch):
+    # a second, never-migrated database for the same app
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "empty.db")
+    db.reset_pool()
+    return app
+
+
+def test_migrate_applies_every_step_once(empty_app):
+    with empty_app.app_context():
+        conn = get_db()
+
+        assert migrate(conn) == [version for version, _, _ in MIGRATIONS]
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+
+        assert migrate(conn) == []
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+
+
+def test_versions_are_increasing():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_upgrades_a_database_from_before_migrations(app, tmp_path, monkeypatch):
+    # the checked-in database predates schema_version
+    legacy = tmp_path / "legacy.db"
+    shutil.copy(BASE_DIR / "instance" / "cbc.db", legacy)
+    monkeypatch.setattr(db, "DB_PATH", legacy)
+    db.reset_pool()
+
+    with app.app_context():
+        conn = get_db()
+        migrate(conn)
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+        assert check_query_plans() == []
+
+
+def test_read_helpers_use_their_indexes(empty_app):
+    with empty_app.app_context():
+        migrate(get_db())
+        assert check_query_plans() == []
+
+
+def test_read_helpers_use_their_indexes_with_data(ctx):
+    assert check_query_plans() == []
@@ -0,0 +1,73 @@
+import io
+import zipfile
+
+import pyarrow.parquet as pq
+import pytest
+
+from db import get_classes_for_teacher, get_db, get_learners_for_class, save_observation
+from exports import PARQUET_STATE_FILE, write_parquet_dataset
+
+
+@pytest.fixture
+def observed(teacher):
+    class_row = get_classes_for_teacher(teacher["id"])[0]
+    for learner in get_learners_for_class(class_row["id"])[:4]:
+        save_observation(teacher["id"], class_row["name"], learner["id"],
+                         "Group work", "Communication", "Improving", "")
+
+    # spread the rows over two months
+    conn = get_db()
+    conn.execute("""
+        UPDATE observations SET created_at = '2026-01-15 09:00:00'
+        WHERE id IN (SELECT id FROM observations ORDER BY id DESC LIMIT 2)
+    """)
+    conn.commit()
+    return teacher
+
+
+def _live_by_month():
+    rows = get_db().execute("""
+        SELECT strftime('%Y-%m', created_at), COUNT(*) FROM observations
+        WHERE is_deleted = 0 GROUP BY 1
+    """).fetchall()
+    return {month: count for month, count in rows}
+
+
+def test_dataset_has_one_partition_per_month(observed, tmp_path):
+    out_dir = tmp_path / "dataset"
+    result = write_parquet_dataset(out_dir)
+
+    assert result["since"] is None
+    assert result["partitions"] == _live_by_month()
+    assert "2026-01" in result["partitions"]
+
+    for month, count in result["partitions"].items():
+        table = pq.read_table(out_dir / f"month={month}")
+        assert table.num_rows == count
+    assert (out_dir / PARQUET_STATE_FILE).exists()
+    assert not list(out_dir.rglob("*.tmp"))
+
+
+def test_incremental_run_rewrites_only_the_last_month(observed, tmp_path):
+    out_dir = tmp_path / "dataset"
+    first = write_parquet_dataset(out_dir)
+    last_month = max(first["partitions"])
+
+    second = write_parquet_dataset(out_dir, incremental=True)
+    assert second["since"] == last_month
+    assert set(second["partitions"]) == {last_month}
+    assert {p.name for p in out_dir.glob("month=*")} == {f"month={m}" for m in first["partitions"]}
+
+
+def test_principal_downloads_the_dataset_zip(principal_client, observed):
+    response = principal_client.get("/principal/analytics/export.zip")
+    assert response.status_code == 200
+    assert response.is_streamed
+
+    names = zipfile.ZipFile(io.BytesIO(response.get_data())).namelist()
+    assert "month=2026-01/part-0.parquet" in names
+    assert all(name.startswith("month=") for name in names)
+
+
+def test_teachers_cannot_download_the_dataset(teacher_client):
+    assert teacher_client.get("/principal/analytics/export.zip").status_code == 403
@@ -0,0 +1,47 @@
+import io
+import zipfile
+
+import pytest
+
+import report_cards
+from report_cards import cached_report_cards, generate_report_cards, prune_report_cards
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "report_cards"
+    path.mkdir()
+    monkeypatch.setattr(report_cards, "REPORT_CARD_DIR", path)
+    return path
+
+
+def _names(response):
+    return zipfile.ZipFile(io.BytesIO(response.data)).namelist()
+
+
+def test_download_serves_only_cached_cards(teacher, teacher_client, cache_dir):
+    response = teacher_client.get("/reports/report-cards.zip")
+    assert response.status_code == 200
+    assert _names(response) == ["NOT-YET-RENDERED.txt"]
+    assert int(response.headers["X-Report-Cards-Missing"]) > 0
+    # the request rendered nothing
+    assert list(cache_dir.iterdir()) == []
+
+    results = generate_report_cards(teacher_id=teacher["id"], max_workers=1)
+
+    response = teacher_client.get("/reports/report-cards.zip")
+    assert response.headers["X-Report-Cards-Missing"] == "0"
+    assert len(_names(response)) == len(results)
+
+
+def test_prune_removes_cards_no_learner_matches(teacher, cache_dir):
+    results = generate_report_cards(teacher_id=teacher["id"], max_workers=1)
+    stale = cache_dir / ("0" * 64 + ".pdf")
+    stale.write_bytes(b"%PDF stale")
+
+    assert prune_report_cards() == 1
+    assert not stale.exists()
+    assert all(path.exists() for _, path, _ in results)
+
+    cached, missing = cached_report_cards(teacher_id=teacher["id"])
+    assert len(cached) == len(results) and missing == []
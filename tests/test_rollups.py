@@ -0,0 +1,87 @@
+import pytest
+
+from db import (
+    check_rollups,
+    get_classes_for_teacher,
+    get_db,
+    get_learners_for_class,
+    get_principal_dashboard_summary,
+    get_principal_teacher_summary,
+    get_weekly_summary,
+    rebuild_rollups,
+    save_observation,
+    soft_delete_observation,
+    update_observation,
+)
+
+# what the rollup-backed summaries count: live rows, by calendar day
+# from date('now', '-7 days') (the principal totals used to include
+# soft-deleted rows and a rolling datetime('now', '-7 days') window)
+LIVE = "is_deleted = 0"
+LAST_7_DAYS = "date(created_at) >= date('now', '-7 days')"
+
+
+@pytest.fixture
+def roster(teacher):
+    class_row = get_classes_for_teacher(teacher["id"])[0]
+    return class_row, get_learners_for_class(class_row["id"])
+
+
+def _observe(teacher, class_row, learner, skill="Communication", level="Doing well"):
+    save_observation(
+        teacher["id"], class_row["name"], learner["id"],
+        "Group work", skill, level, "worked in a group"
+    )
+    return get_db().execute("SELECT MAX(id) FROM observations").fetchone()[0]
+
+
+def _count(where, params=()):
+    return get_db().execute(f"SELECT COUNT(*) FROM observations WHERE {where}", params).fetchone()[0]
+
+
+def test_rollups_follow_save_update_and_delete(teacher, roster):
+    class_row, learners = roster
+    assert check_rollups() == []
+
+    observation_id = _observe(teacher, class_row, learners[0])
+    _observe(teacher, class_row, learners[0], skill="Creativity", level="Improving")
+    assert check_rollups() == []
+
+    update_observation(observation_id, teacher["id"], "Oral response", "Critical thinking", "Needs support", "")
+    assert check_rollups() == []
+
+    soft_delete_observation(observation_id, teacher["id"])
+    assert check_rollups() == []
+
+    # a repeated soft delete changes nothing
+    soft_delete_observation(observation_id, teacher["id"])
+    assert check_rollups() == []
+
+
+def test_summaries_match_raw_counts(teacher, roster):
+    class_row, learners = roster
+    ids = [_observe(teacher, class_row, learner) for learner in learners[:6]]
+
+    # spread over the window edges: today, 3, 7 (first day in), 8 and 30 days ago
+    conn = get_db()
+    for observation_id, days in zip(ids, [0, 3, 7, 8, 30, 0]):
+        conn.execute(
+            "UPDATE observations SET created_at = datetime('now', ?, 'start of day', '+1 hour') WHERE id = ?",
+            (f"-{days} days", observation_id)
+        )
+    conn.commit()
+    rebuild_rollups()
+    soft_delete_observation(ids[-1], teacher["id"])
+    assert check_rollups() == []
+
+    mine = f"teacher_id = {teacher['id']}"
+    weekly = get_weekly_summary(teacher["id"])
+    assert weekly["total"] == _count(f"{mine} AND {LIVE} AND {LAST_7_DAYS}") == 3
+
+    summary = get_principal_teacher_summary(teacher["id"])
+    assert summary["total_observations"] == _count(f"{mine} AND {LIVE}") == 5
+    assert summary["observations_last_7_days"] == weekly["total"]
+
+    school = get_principal_dashboard_summary()
+    assert school["total_observations"] == _count(LIVE)
+    assert school["observations_last_7_days"] == _count(f"{LIVE} AND {LAST_7_DAYS}")
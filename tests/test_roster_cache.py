@@ -0,0 +1,52 @@
+import db
+from db import (
+    RosterCache,
+    get_classes_for_teacher,
+    import_roster,
+    roster_cache_stats,
+)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(db.time, "monotonic", lambda: clock[0])
+
+    cache = RosterCache(ttl=60)
+    cache.set(("teacher", 1), "row")
+    assert cache.get(("teacher", 1)) == (True, "row")
+
+    clock[0] += 61
+    assert cache.get(("teacher", 1)) == (False, None)
+    assert cache.stats() == {"size": 0, "hits": {"teacher": 1}, "misses": {"teacher": 1}}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RosterCache(maxsize=2)
+    cache.set(("a",), 1)
+    cache.set(("b",), 2)
+    cache.get(("a",))
+    cache.set(("c",), 3)
+
+    assert cache.get(("b",)) == (False, None)
+    assert cache.get(("a",)) == (True, 1)
+    assert cache.get(("c",)) == (True, 3)
+
+
+def test_lookups_are_cached_and_frozen(teacher):
+    first = get_classes_for_teacher(teacher["id"])
+    second = get_classes_for_teacher(teacher["id"])
+
+    assert isinstance(first, tuple)
+    assert second is first
+    assert roster_cache_stats()["hits"]["classes_for_teacher"] >= 1
+
+
+def test_roster_writes_invalidate(teacher):
+    before = get_classes_for_teacher(teacher["id"])
+
+    import_roster(
+        [(teacher["email"], teacher["name"], "Mathematics", None)],
+        [(teacher["email"], "Grade 12 Z", "Mathematics")],
+        []
+    )
+    assert len(get_classes_for_teacher(teacher["id"])) == len(before) + 1
@@ -0,0 +1,79 @@
+import io
+
+import pytest
+
+from db import get_db
+from roster_import import RosterImportError, import_roster_file
+
+HEADER = "teacher_email,teacher_name,teacher_subject,class_name,learner_name,teacher_password\n"
+
+
+def _import(text):
+    return import_roster_file(io.BytesIO(text.encode()), "roster.csv")
+
+
+def _count(table):
+    return get_db().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_import_creates_teachers_classes_and_learners(ctx):
+    result = _import(
+        HEADER
+        + "new@school.test,New Teacher,English,Grade 9 E,Ann Njeri,secret123\n"
+        + "new@school.test,New Teacher,English,Grade 9 E,Tom Ouma,\n"
+    )
+    assert result["users_created"] == 1
+    assert result["classes_created"] == 1
+    assert result["learners_created"] == 2
+
+    # a second run adds nothing
+    again = _import(HEADER + "new@school.test,New Teacher,English,Grade 9 E,Ann Njeri,\n")
+    assert again["classes_created"] == again["learners_created"] == 0
+
+
+def test_invalid_rows_are_all_reported_and_nothing_is_written(ctx):
+    before = _count("classes")
+    with pytest.raises(RosterImportError) as error:
+        _import(
+            HEADER
+            + "not-an-email,Someone,English,Grade 9 E,,x\n"
+            + "new@school.test,,English,Grade 9 E,,x\n"
+        )
+
+    assert [message.split(":")[0] for message in error.value.errors] == ["Row 2", "Row 3"]
+    assert _count("classes") == before
+
+
+def test_teacher_without_login_needs_a_password(ctx):
+    with pytest.raises(RosterImportError) as error:
+        _import(HEADER + "nobody@school.test,No Body,English,Grade 9 E,,\n")
+    assert "nobody@school.test has no login yet" in error.value.errors[0]
+
+
+def test_principal_email_cannot_be_given_classes(ctx):
+    teachers = _count("teachers")
+    with pytest.raises(RosterImportError) as error:
+        _import(
+            HEADER
+            + "principal@school.test,The Principal,English,Grade 9 E,Ann Njeri,\n"
+            + "new@school.test,New Teacher,English,Grade 9 F,,secret123\n"
+        )
+
+    assert error.value.errors == [
+        "principal@school.test is not a teacher's login; it cannot be given classes."
+    ]
+    assert _count("teachers") == teachers
+
+
+def test_upload_reports_errors(principal_client):
+    response = principal_client.post(
+        "/principal/roster/import",
+        data={"roster": (io.BytesIO(b"name\nx\n"), "roster.csv")},
+        content_type="multipart/form-data"
+    )
+    assert response.status_code == 400
+    assert b"Missing column(s)" in response.data
+
+
+def test_teachers_cannot_import(teacher_client):
+    assert teacher_client.get("/principal/roster/import").status_code == 403
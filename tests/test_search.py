@@ -0,0 +1,73 @@
+import pytest
+
+from db import (
+    build_search_query,
+    get_classes_for_teacher,
+    get_db,
+    get_learners_for_class,
+    save_observation,
+    search_observations,
+    soft_delete_observation,
+    update_observation,
+)
+
+
+@pytest.fixture
+def observation(teacher):
+    class_row = get_classes_for_teacher(teacher["id"])[0]
+    learner = get_learners_for_class(class_row["id"])[0]
+    return save_observation(
+        teacher["id"], class_row["name"], learner["id"],
+        "Fraction puzzles", "Problem solving", "Doing well", "explained halves to the group"
+    )
+
+
+def _indexed(term):
+    # the FTS index itself, without the is_deleted filter of search
+    rows = get_db().execute(
+        "SELECT rowid FROM observations_fts WHERE observations_fts MATCH ?",
+        (build_search_query(term),)
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _found(term, teacher_id=None):
+    return [row["id"] for row in search_observations(term, teacher_id)["results"]]
+
+
+@pytest.mark.parametrize("text, query", [
+    ("halves", '"halves"*'),
+    ('say "hi"', '"say"* """hi"""*'),
+    ("NEAR( OR", '"NEAR("* "OR"*'),
+    ('  "" ', None),
+])
+def test_user_input_becomes_quoted_prefix_terms(text, query):
+    assert build_search_query(text) == query
+
+
+def test_new_observation_is_found_by_prefix(teacher, observation):
+    assert _found("halv", teacher["id"]) == [observation]
+    assert _indexed("halves") == [observation]
+
+
+def test_edit_replaces_the_indexed_text(teacher, observation):
+    update_observation(observation, teacher["id"], "Fraction puzzles", "Problem solving",
+                       "Doing well", "shared thirds with a partner")
+
+    assert _indexed("halves") == []
+    assert _found("thirds", teacher["id"]) == [observation]
+
+
+def test_soft_delete_drops_the_row_from_the_index(teacher, observation):
+    soft_delete_observation(observation, teacher["id"])
+
+    assert _indexed("halves") == []
+    assert _found("halves") == []
+
+
+def test_teacher_search_is_scoped(teacher_client, principal_client, observation):
+    other = get_db().execute("SELECT id FROM teachers WHERE email = 'grace@school.test'").fetchone()
+    assert _found("halves", other["id"]) == []
+
+    assert b"Fraction" in teacher_client.get("/search?q=halves").data
+    assert b"Fraction" in principal_client.get("/search?q=halves").data
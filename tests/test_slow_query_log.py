@@ -0,0 +1,81 @@
+import inspect
+import json
+import logging
+
+import pytest
+
+import db
+
+
+@pytest.fixture
+def slow_log(monkeypatch, caplog):
+    def enable(threshold_ms):
+        monkeypatch.setattr(db, "SLOW_QUERY_MS", threshold_ms)
+
+    caplog.set_level(logging.WARNING, logger="cbc.slow_query")
+    return enable
+
+
+def _records(caplog):
+    return [json.loads(record.getMessage()) for record in caplog.records
+            if record.name == "cbc.slow_query"]
+
+
+def test_fast_statements_do_not_walk_the_stack(ctx, slow_log, monkeypatch, caplog):
+    slow_log(60_000)
+
+    def fail():
+        raise AssertionError("_calling_helper called for a fast statement")
+
+    monkeypatch.setattr(db, "_calling_helper", fail)
+    db.get_user_by_email("amina@school.test")
+    db.get_observations_page(1)
+    assert _records(caplog) == []
+
+
+def test_single_row_read_is_logged_on_fetch(ctx, slow_log, caplog):
+    slow_log(0)
+
+    cur = db.get_db().cursor()
+    cur.execute("SELECT id FROM teachers ORDER BY id")
+    assert cur.fetchone() is not None
+    # logged at once, though the cursor stays open on its next row
+    [record] = _records(caplog)
+    assert record["sql"] == "SELECT id FROM teachers ORDER BY id"
+
+    # and only once
+    cur.close()
+    assert len(_records(caplog)) == 1
+
+
+def test_slow_statement_names_its_helper(ctx, slow_log, caplog):
+    slow_log(0)
+
+    inspect.unwrap(db.get_teacher_by_id)(1)
+    db.get_user_by_email("amina@school.test")
+
+    assert [record["helper"] for record in _records(caplog)] == [
+        "get_teacher_by_id", "get_user_by_email",
+    ]
+
+
+def test_fingerprint_folds_literals_and_in_lists():
+    a = db.fingerprint_sql("SELECT * FROM learners WHERE id IN (1, 2, 3) AND name = 'Faith'")
+    b = db.fingerprint_sql("SELECT *\n  FROM learners WHERE id IN (?, ?) AND name = :name")
+    assert a == b == "SELECT * FROM learners WHERE id IN (?...) AND name = ?"
+
+
+def test_report_groups_by_fingerprint_slowest_first():
+    records = [
+        {"fingerprint": "A", "sql": "a", "duration_ms": 5.0, "helper": "one"},
+        {"fingerprint": "B", "sql": "b", "duration_ms": 30.0, "helper": None,
+         "full_scans": ["observations"]},
+        {"fingerprint": "A", "sql": "a", "duration_ms": 15.0, "helper": "two"},
+    ]
+    slowest, other = db.slow_query_report(records)
+
+    assert slowest["fingerprint"] == "B" and slowest["full_scans"] == ["observations"]
+    assert other == {
+        "fingerprint": "A", "sql": "a", "count": 2, "total_ms": 20.0, "max_ms": 15.0,
+        "mean_ms": 10.0, "helpers": ["one", "two"], "full_scans": [],
+    }
@@ -0,0 +1,85 @@
+import gzip
+import html
+import re
+
+import pytest
+
+from db import (
+    RowStream,
+    get_classes_for_teacher,
+    get_db,
+    get_learners_for_class,
+    get_observations_page,
+    save_observation,
+)
+
+
+@pytest.fixture
+def observed(teacher):
+    class_row = get_classes_for_teacher(teacher["id"])[0]
+    for learner in get_learners_for_class(class_row["id"]):
+        save_observation(teacher["id"], class_row["name"], learner["id"],
+                         "Streamed activity", "Communication", "Doing well", "")
+    return teacher
+
+
+def _ids(text):
+    return [int(i) for i in re.findall(r"/observations/(\d+)/edit", text)]
+
+
+def _older_link(text):
+    found = re.search(r'href="([^"]+)">Older →', text)
+    return html.unescape(found.group(1)) if found else None
+
+
+def test_row_stream_peeks_and_stops_at_limit(ctx):
+    cur = get_db().execute("SELECT id FROM teachers ORDER BY id")
+    total = get_db().execute("SELECT COUNT(*) FROM teachers").fetchone()[0]
+
+    rows = RowStream(cur, limit=total - 1)
+    assert rows
+    assert len(list(rows)) == total - 1
+    assert rows.has_more and rows.exhausted
+
+    empty = RowStream(get_db().execute("SELECT id FROM teachers WHERE id < 0"))
+    assert not empty
+    assert list(empty) == []
+
+
+def test_streamed_pages_walk_like_the_list_pages(teacher_client, observed):
+    expected = [row["id"] for row in get_observations_page(observed["id"], limit=1000)["observations"]]
+
+    seen = []
+    path = "/observations?page_size=3"
+    while path:
+        response = teacher_client.get(path)
+        assert response.status_code == 200
+        assert response.is_streamed
+        text = response.get_data(as_text=True)
+        seen.extend(_ids(text))
+        path = _older_link(text)
+
+    assert seen == expected
+
+
+def test_gzip_when_accepted(teacher_client, observed):
+    response = teacher_client.get("/observations", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert "Streamed activity" in gzip.decompress(response.data).decode()
+
+
+def test_gzip_can_be_turned_off(app, teacher_client, observed, monkeypatch):
+    monkeypatch.setitem(app.config, "STREAM_GZIP", False)
+    response = teacher_client.get("/observations", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert "Streamed activity" in response.get_data(as_text=True)
+
+
+def test_principal_teacher_view_streams(principal_client, observed):
+    response = principal_client.get(f"/principal/teacher/{observed['id']}")
+    assert response.status_code == 200
+    assert response.is_streamed
+    text = response.get_data(as_text=True)
+    assert "No observations found." not in text
+    assert text.count("<td>Communication</td>") >= 5
@@ -0,0 +1,136 @@
+import uuid
+
+import pytest
+
+from db import (
+    check_rollups,
+    get_classes_for_teacher,
+    get_db,
+    get_learners_for_class,
+    save_observation,
+    sync_observations,
+)
+
+
+@pytest.fixture
+def roster(teacher):
+    class_row = get_classes_for_teacher(teacher["id"])[0]
+    return class_row, get_learners_for_class(class_row["id"])
+
+
+def _sync_item(class_row, learner, client_uuid=None, observed_at=None):
+    return {
+        "client_uuid": client_uuid or str(uuid.uuid4()),
+        "learner_id": learner["id"],
+        "class_name": class_row["name"],
+        "activity": "Group work",
+        "skill": "Collaboration",
+        "level": "Improving",
+        "note": "",
+        "observed_at": observed_at,
+    }
+
+
+def _api_item(learner, **overrides):
+    return {
+        "client_uuid": str(uuid.uuid4()),
+        "learner_id": learner["id"],
+        "activity": "Group work",
+        "skill": "Collaboration",
+        "level": "Improving",
+        **overrides,
+    }
+
+
+def _live_count(teacher_id):
+    return get_db().execute(
+        "SELECT COUNT(*) FROM observations WHERE teacher_id = ? AND is_deleted = 0",
+        (teacher_id,)
+    ).fetchone()[0]
+
+
+def test_sync_retry_is_idempotent(teacher, roster):
+    class_row, learners = roster
+    items = [_sync_item(class_row, learner) for learner in learners[:3]]
+
+    first = sync_observations(teacher["id"], items)
+    assert [status for status, _ in first] == ["created"] * 3
+    count = _live_count(teacher["id"])
+
+    retry = sync_observations(teacher["id"], items)
+    assert retry == [("duplicate", observation_id) for _, observation_id in first]
+    assert _live_count(teacher["id"]) == count
+    assert check_rollups() == []
+
+
+def test_sync_watermark_with_mixed_batch(teacher, roster):
+    class_row, learners = roster
+    old = _sync_item(class_row, learners[0])
+    [(_, old_id)] = sync_observations(teacher["id"], [old])
+
+    # a row saved between batches is not ours to report
+    save_observation(teacher["id"], class_row["name"], learners[1]["id"],
+                     "Group work", "Communication", "Doing well", "")
+
+    new = _sync_item(class_row, learners[2], observed_at="2026-03-02 08:00:00")
+    results = sync_observations(teacher["id"], [old, new, new])
+
+    assert results[0] == ("duplicate", old_id)
+    assert results[1][0] == "created" and results[1][1] > old_id
+    # the same uuid twice in one batch is stored once
+    assert results[2] == ("duplicate", results[1][1])
+    assert check_rollups() == []
+
+
+def test_sync_uuid_of_another_teacher_conflicts(teacher, roster):
+    class_row, learners = roster
+    item = _sync_item(class_row, learners[0])
+    sync_observations(teacher["id"], [item])
+
+    other = get_db().execute("SELECT id FROM teachers WHERE email = 'grace@school.test'").fetchone()
+    assert sync_observations(other["id"], [item]) == [("conflict", None)]
+
+
+def test_sync_api_retry_returns_same_ids(teacher_client, roster):
+    _, learners = roster
+    body = {"observations": [_api_item(learner) for learner in learners[:2]]}
+
+    first = teacher_client.post("/api/sync/observations", json=body)
+    retry = teacher_client.post("/api/sync/observations", json=body)
+
+    assert first.status_code == retry.status_code == 200
+    assert [r["status"] for r in first.get_json()["results"]] == ["created", "created"]
+    assert [r["status"] for r in retry.get_json()["results"]] == ["duplicate", "duplicate"]
+    assert [r["id"] for r in retry.get_json()["results"]] == [r["id"] for r in first.get_json()["results"]]
+
+
+@pytest.mark.parametrize("learner_id", [[1], {"id": 1}, True, "1", None])
+def test_sync_api_bad_learner_id_is_an_invalid_item(teacher_client, roster, learner_id):
+    _, learners = roster
+    body = {"observations": [
+        _api_item(learners[0], learner_id=learner_id),
+        _api_item(learners[1]),
+    ]}
+
+    response = teacher_client.post("/api/sync/observations", json=body)
+    assert response.status_code == 200
+
+    bad, good = response.get_json()["results"]
+    assert bad["status"] == "invalid" and bad["error"]
+    assert good["status"] == "created"
+
+
+def test_sync_api_rejects_learners_of_other_teachers(teacher_client):
+    other_learner = get_db().execute("""
+        SELECT learners.id FROM learners
+        JOIN classes ON learners.class_id = classes.id
+        JOIN teachers ON classes.teacher_id = teachers.id
+        WHERE teachers.email = 'grace@school.test'
+    """).fetchone()
+
+    response = teacher_client.post(
+        "/api/sync/observations",
+        json={"observations": [_api_item(other_learner)]}
+    )
+    [result] = response.get_json()["results"]
+    assert result == {"client_uuid": result["client_uuid"], "status": "invalid", "error": "unknown learner"}
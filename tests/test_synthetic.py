@@ -0,0 +1,70 @@
+import subprocess
+import sys
+from datetime import date
+
+import db
+from benchmark import helper_cases, pick_samples
+from synthetic import generate
+
+SMALL = dict(
+    schools=2, teachers_per_school=2, classes_per_teacher=2, learners_per_class=5,
+    observations=300, days=30, end_date=date(2026, 3, 31), seed=7,
+)
+
+
+def _observations():
+    rows = db.get_db().execute("""
+        SELECT t.email, o.class_name, l.name, o.activity, o.skill, o.level, o.note, o.created_at
+        FROM observations o
+        JOIN teachers t ON t.id = o.teacher_id
+        JOIN learners l ON l.id = o.learner_id
+        WHERE t.email LIKE '%.synthetic.test'
+        ORDER BY o.id
+    """).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def _generate_into(app, path, monkeypatch, **kwargs):
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.reset_pool()
+    db.invalidate_roster_cache()
+    with app.app_context():
+        db.init_db()
+        result = generate(**kwargs)
+        return result, _observations()
+
+
+def test_same_seed_same_rows(app, tmp_path, monkeypatch):
+    first, rows = _generate_into(app, tmp_path / "a.db", monkeypatch, **SMALL)
+    second, again = _generate_into(app, tmp_path / "b.db", monkeypatch, **SMALL)
+
+    assert first == second
+    assert first["observations"] == len(rows) == 300
+    assert rows == again
+
+    _, other = _generate_into(app, tmp_path / "c.db", monkeypatch, **{**SMALL, "seed": 8})
+    assert other != rows
+
+
+def test_generated_read_models_are_consistent(ctx):
+    generate(**SMALL)
+    assert db.check_rollups() == []
+
+
+def test_save_then_edit_case_runs_the_edit(ctx):
+    generate(**SMALL)
+    cases = {name: (fn, args) for name, fn, args, _ in helper_cases(pick_samples())}
+    fn, args = cases["save_observation + update_observation"]
+
+    observation_id = fn(*args)
+    row = db.get_db().execute(
+        "SELECT activity, skill FROM observations WHERE id = ?", (observation_id,)
+    ).fetchone()
+    assert tuple(row) == ("Oral response", "Communication")
+
+
+def test_app_import_leaves_generator_and_benchmark_unloaded():
+    check = "import sys, app; print(sorted({'synthetic', 'benchmark'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True,
+                         cwd=db.BASE_DIR, check=True).stdout
+    assert out.strip() == "[]"
@@ -0,0 +1,32 @@
+import pytest
+
+from db import TEACHER_OVERVIEW_SORTS, get_db, get_teacher_overview
+
+
+@pytest.mark.parametrize("sort", sorted(TEACHER_OVERVIEW_SORTS))
+def test_every_whitelisted_sort_runs(ctx, sort):
+    rows = get_teacher_overview(sort, descending=True)
+    assert len(rows) == get_db().execute("SELECT COUNT(*) FROM teachers").fetchone()[0]
+
+
+def test_unknown_sort_falls_back_to_name(ctx):
+    names = [row["name"] for row in get_teacher_overview("name; DROP TABLE teachers")]
+    assert names == sorted(names)
+
+
+def test_learner_counts_match_the_roster(ctx):
+    conn = get_db()
+    for row in get_teacher_overview("learners", descending=True):
+        expected = conn.execute("""
+            SELECT COUNT(*) FROM learners
+            JOIN classes ON learners.class_id = classes.id
+            WHERE classes.teacher_id = ?
+        """, (row["id"],)).fetchone()[0]
+        assert row["learners"] == expected
+
+
+def test_page_ignores_sort_outside_the_whitelist(principal_client):
+    response = principal_client.get("/principal/teachers?sort=password_hash&dir=desc")
+    assert response.status_code == 200
+    # rendered as a name sort, descending
+    assert "Name ▼" in response.get_data(as_text=True)